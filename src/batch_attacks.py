@@ -0,0 +1,175 @@
+"""
+Set-wise attack generation over many positions at once.
+
+Positions are rows of an (N, 12) uint64 array of piece bitboards in the
+`bb` order of BitboardGameState (colour * 6 + piece type - 1). Every
+operation works on whole columns with NumPy shifts, masks and Kogge-Stone
+fills, so there is no Python loop over positions or squares and the cost
+per position falls as N grows.
+
+    batch_attacks(pieces)   (N, 2) squares attacked by white, black
+    batch_checkers(pieces)  (N, 2) enemy pieces checking the white, black king
+    batch_mobility(pieces)  (N, 2) per-piece mobility of knights, bishops, rooks, queens and king
+"""
+import numpy as np
+
+from slider_attacks import SHIFTS, WRAP_MASKS, BISHOP_DIRECTIONS, ROOK_DIRECTIONS
+
+PIECE_BOARDS = 12
+WHITE, BLACK = 0, 1
+
+NOT_FILE_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+NOT_FILE_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+NOT_FILE_AB = np.uint64(0xFCFCFCFCFCFCFCFC)
+NOT_FILE_GH = np.uint64(0x3F3F3F3F3F3F3F3F)
+
+# SWAR popcount masks (np.bitwise_count needs NumPy 2)
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+
+_SHIFTS = [np.uint64(abs(shift)) for shift in SHIFTS]
+_WRAP_MASKS = [np.uint64(mask) for mask in WRAP_MASKS]
+
+
+def stack_bitboards(states):
+    """(N, 12) piece bitboard array of a sequence of BitboardGameStates."""
+    return np.array([gs.bb[:PIECE_BOARDS] for gs in states], dtype=np.uint64)
+
+def popcount(bb):
+    """int64 bit counts of a uint64 array."""
+    bb = bb - ((bb >> np.uint64(1)) & _M1)
+    bb = (bb & _M2) + ((bb >> np.uint64(2)) & _M2)
+    bb = (bb + (bb >> np.uint64(4))) & _M4
+    return ((bb * _H01) >> np.uint64(56)).astype(np.int64)
+
+def single_pieces(bb):
+    """Split a column of bitboards into columns of one piece each (lowest first, zero where none is left)."""
+    bb = bb.copy()
+    while bb.any():
+        piece = bb & (~bb + np.uint64(1))
+        yield piece
+        bb ^= piece
+
+
+# --- Set-wise attacks of every piece in a column of bitboards ---
+
+def _shift(bb, direction, steps=1):
+    amount = _SHIFTS[direction] * np.uint64(steps)
+    return bb << amount if SHIFTS[direction] > 0 else bb >> amount
+
+def _fill_attacks(sliders, empty, direction):
+    """Kogge-Stone occluded fill: squares attacked along `direction` through `empty`."""
+    wrap = _WRAP_MASKS[direction]
+    empty = empty & wrap
+    sliders = sliders | (empty & _shift(sliders, direction))
+    empty = empty & _shift(empty, direction)
+    sliders = sliders | (empty & _shift(sliders, direction, 2))
+    empty = empty & _shift(empty, direction, 2)
+    sliders = sliders | (empty & _shift(sliders, direction, 4))
+    return _shift(sliders, direction) & wrap
+
+def bishop_fill(bishops, empty):
+    attacks = np.zeros_like(bishops)
+    for direction in BISHOP_DIRECTIONS:
+        attacks |= _fill_attacks(bishops, empty, direction)
+    return attacks
+
+def rook_fill(rooks, empty):
+    attacks = np.zeros_like(rooks)
+    for direction in ROOK_DIRECTIONS:
+        attacks |= _fill_attacks(rooks, empty, direction)
+    return attacks
+
+def pawn_fill(pawns, colour):
+    if colour == WHITE:
+        return ((pawns << np.uint64(7)) & NOT_FILE_H) | ((pawns << np.uint64(9)) & NOT_FILE_A)
+    return ((pawns >> np.uint64(9)) & NOT_FILE_H) | ((pawns >> np.uint64(7)) & NOT_FILE_A)
+
+def knight_fill(knights):
+    one = ((knights >> np.uint64(1)) & NOT_FILE_H) | ((knights << np.uint64(1)) & NOT_FILE_A)
+    two = ((knights >> np.uint64(2)) & NOT_FILE_GH) | ((knights << np.uint64(2)) & NOT_FILE_AB)
+    return (one << np.uint64(16)) | (one >> np.uint64(16)) | (two << np.uint64(8)) | (two >> np.uint64(8))
+
+def king_fill(kings):
+    row = kings | ((kings >> np.uint64(1)) & NOT_FILE_H) | ((kings << np.uint64(1)) & NOT_FILE_A)
+    return (row | (row << np.uint64(8)) | (row >> np.uint64(8))) ^ kings
+
+
+# --- Batch API ---
+
+def _columns(pieces):
+    pieces = np.asarray(pieces, dtype=np.uint64)
+    if pieces.ndim != 2 or pieces.shape[1] < PIECE_BOARDS:
+        raise ValueError(f"expected an (N, {PIECE_BOARDS}) array of piece bitboards, got shape {pieces.shape}")
+    # Row per piece type, contiguous so every column operation streams through memory
+    return np.ascontiguousarray(pieces[:, :PIECE_BOARDS].T)
+
+def _piece_type_attacks(boards, colour, empty):
+    """Attack sets of pawns, knights, bishops, rooks, queens and king of one side."""
+    pawns, knights, bishops, rooks, queens, king = boards[6 * colour:6 * colour + 6]
+    return (pawn_fill(pawns, colour), knight_fill(knights), bishop_fill(bishops, empty),
+            rook_fill(rooks, empty), bishop_fill(queens, empty) | rook_fill(queens, empty), king_fill(king))
+
+def _occupancies(boards):
+    white = np.bitwise_or.reduce(boards[:6], axis=0)
+    black = np.bitwise_or.reduce(boards[6:], axis=0)
+    return white, black, ~(white | black)
+
+def _mobility(boards, colour, own, empty):
+    """Squares not holding an own piece attacked by each knight, bishop, rook, queen and king, summed."""
+    knights, bishops, rooks, queens, king = boards[6 * colour + 1:6 * colour + 6]
+    fills = ((knights, knight_fill), (bishops, lambda piece: bishop_fill(piece, empty)),
+             (rooks, lambda piece: rook_fill(piece, empty)),
+             (queens, lambda piece: bishop_fill(piece, empty) | rook_fill(piece, empty)), (king, king_fill))
+    mobility = np.zeros(boards.shape[1], dtype=np.int64)
+    targets = ~own
+    for board, fill in fills:
+        # One piece per column at a time, so squares two pieces share count twice
+        for piece in single_pieces(board):
+            mobility += popcount(fill(piece) & targets)
+    return mobility
+
+def _attacks_and_mobility(boards):
+    white, black, empty = _occupancies(boards)
+    attacks, mobility = [], []
+    for colour, own in ((WHITE, white), (BLACK, black)):
+        attacks.append(np.bitwise_or.reduce(_piece_type_attacks(boards, colour, empty), axis=0))
+        mobility.append(_mobility(boards, colour, own, empty))
+    return np.stack(attacks, axis=1), np.stack(mobility, axis=1)
+
+def _checkers(boards):
+    empty = _occupancies(boards)[2]
+    columns = []
+    for colour in (WHITE, BLACK):
+        king = boards[6 * colour + 5]
+        pawns, knights, bishops, rooks, queens, _ = boards[6 * (1 - colour):6 * (1 - colour) + 6]
+        # Look outwards from the king as each piece type; an enemy piece of that type found there gives check
+        columns.append((pawn_fill(king, colour) & pawns) | (knight_fill(king) & knights)
+                       | (bishop_fill(king, empty) & (bishops | queens)) | (rook_fill(king, empty) & (rooks | queens)))
+    return np.stack(columns, axis=1)
+
+def batch_attacks(pieces):
+    """(N, 2) uint64: squares attacked by white (column 0) and black (column 1)."""
+    return _attacks_and_mobility(_columns(pieces))[0]
+
+def batch_checkers(pieces):
+    """(N, 2) uint64: enemy pieces attacking the white king (column 0) and the black king (column 1)."""
+    return _checkers(_columns(pieces))
+
+def batch_mobility(pieces):
+    """
+    (N, 2) int64 mobility of white and black: for every knight, bishop,
+    rook, queen and king, the squares it attacks that are not occupied by
+    its own side, summed over the pieces, so a square two pieces reach
+    counts twice. Pawns are left out: their captures are not moves unless
+    an enemy piece stands there, and pushes are not attacks.
+    """
+    return _attacks_and_mobility(_columns(pieces))[1]
+
+def batch_attack_info(pieces):
+    """(attacks, checkers, mobility) of every position in one pass; see the functions above."""
+    boards = _columns(pieces)
+    attacks, mobility = _attacks_and_mobility(boards)
+    return attacks, _checkers(boards), mobility
@@ -0,0 +1,75 @@
+"""
+Micro-benchmark for the magic slider lookups.
+
+Times bishop and rook lookups over random squares and occupancies in three
+ways: the pure Python functions, the compiled functions called one at a
+time from Python, and the compiled functions inside a compiled loop (the
+cost a nopython movegen or search pays).
+
+Usage: python bench_magic.py [lookups]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+from numba import njit
+
+from bitboard_magic import (
+    bishop_attacks, rook_attacks, bishop_attacks_jit, rook_attacks_jit,
+)
+
+
+def random_lookups(count, seed=1):
+    rng = random.Random(seed)
+    squares = [rng.randrange(64) for _ in range(count)]
+    # About a quarter of the board occupied, like a middlegame
+    occupancies = [rng.getrandbits(64) & rng.getrandbits(64) for _ in range(count)]
+    return squares, occupancies
+
+
+@njit
+def _compiled_loop(squares, occupancies, rook):
+    checksum = np.uint64(0)
+    for i in range(len(squares)):
+        if rook:
+            checksum ^= rook_attacks_jit(squares[i], occupancies[i])
+        else:
+            checksum ^= bishop_attacks_jit(squares[i], occupancies[i])
+    return checksum
+
+
+def _rate(fn, count):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def bench(count=200000):
+    squares, occupancies = random_lookups(count)
+    squares_np = np.array(squares, dtype=np.int64)
+    occupancies_np = np.array(occupancies, dtype=np.uint64)
+    pairs = list(zip(squares, occupancies))
+    # From Python the compiled lookups take the occupancy as np.uint64
+    compiled_pairs = list(zip(squares, occupancies_np))
+
+    # Compile outside the timed region
+    bishop_attacks_jit(0, occupancies_np[0])
+    rook_attacks_jit(0, occupancies_np[0])
+    _compiled_loop(squares_np[:1], occupancies_np[:1], True)
+    _compiled_loop(squares_np[:1], occupancies_np[:1], False)
+
+    for name, python_fn, compiled_fn, rook in (
+        ("bishop", bishop_attacks, bishop_attacks_jit, False),
+        ("rook", rook_attacks, rook_attacks_jit, True),
+    ):
+        python = _rate(lambda: [python_fn(sq, occ) for sq, occ in pairs], count)
+        compiled_calls = _rate(lambda: [compiled_fn(sq, occ) for sq, occ in compiled_pairs], count)
+        compiled_loop = _rate(lambda: _compiled_loop(squares_np, occupancies_np, rook), count)
+        print(f"{name:6s} python {python / 1e6:7.2f} M/s | "
+              f"njit per call {compiled_calls / 1e6:7.2f} M/s | "
+              f"njit in loop {compiled_loop / 1e6:8.2f} M/s")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark for BitboardGameState.make_move / undo_move.
+
+Replays a few short openings to get a mix of quiet moves, captures,
+double pushes and castling, then times make/undo pairs over every
+pseudo-legal move of each position.
+
+Usage: python bench_make_undo.py [repeats]
+"""
+import sys
+import time
+
+from bitboard_game import BitboardGameState
+from generate_moves import generate_all_moves
+
+OPENINGS = [
+    [],
+    [(12, 28, 0), (52, 36, 0), (6, 21, 0), (57, 42, 0), (5, 26, 0), (61, 34, 0)],  # Italian
+    [(11, 27, 0), (51, 35, 0), (10, 26, 0), (35, 26, 0), (12, 20, 0), (62, 45, 0)],  # QGA
+    [(12, 28, 0), (50, 34, 0), (6, 21, 0), (51, 43, 0), (11, 27, 0), (34, 27, 0), (21, 27, 0)],  # Sicilian
+]
+
+
+def collect_positions():
+    positions = []
+    for line in OPENINGS:
+        gs = BitboardGameState()
+        for move in line:
+            gs.make_move(move)
+        positions.append((gs, generate_all_moves(gs)))
+    return positions
+
+
+def bench(repeats=2000):
+    positions = collect_positions()
+    pairs = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for gs, moves in positions:
+            for move in moves:
+                gs.make_move(move)
+                gs.undo_move()
+            pairs += len(moves)
+    elapsed = time.perf_counter() - start
+    print(f"{pairs} make/undo pairs in {elapsed:.3f}s: {elapsed / pairs * 1e9:.0f} ns per pair")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
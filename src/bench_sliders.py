@@ -0,0 +1,87 @@
+"""
+Benchmark of the slider attack backends in slider_attacks.
+
+Plays seeded random games to collect a position set, takes every bishop,
+rook and queen on those boards with its real occupancy, and times each
+backend on that mix: the pure Python version, and the @njit version inside
+a compiled loop. Run it to pick SLIDER_BACKEND for this machine.
+
+Usage: python bench_sliders.py [games]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+from numba import njit
+
+from bitboard_game import BitboardGameState
+from constants import BISHOP, ROOK, QUEEN
+from generate_moves import generate_legal_moves
+from slider_attacks import PYTHON_BACKENDS, JIT_BACKENDS
+
+# Lookup kinds, indexing (bishop_attacks, rook_attacks, queen_attacks)
+SLIDER_KINDS = {BISHOP: 0, ROOK: 1, QUEEN: 2}
+
+
+def slider_samples(games=40, max_plies=80, seed=1):
+    """(kind, square, occupancy) of every slider in the positions of `games` random games."""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(games):
+        gs = BitboardGameState()
+        for _ in range(max_plies):
+            for colour in (0, 1):
+                for piece, kind in SLIDER_KINDS.items():
+                    pieces = gs.bb[colour * 6 + piece - 1]
+                    while pieces:
+                        square = (pieces & -pieces).bit_length() - 1
+                        samples.append((kind, square, gs.occupied))
+                        pieces &= pieces - 1
+            moves = generate_legal_moves(gs)
+            if not moves:
+                break
+            gs.make_move(rng.choice(moves))
+    return samples
+
+
+@njit
+def _compiled_loop(kinds, squares, occupancies, bishop_attacks, rook_attacks, queen_attacks):
+    checksum = np.uint64(0)
+    for i in range(len(kinds)):
+        if kinds[i] == 0:
+            checksum ^= bishop_attacks(squares[i], occupancies[i])
+        elif kinds[i] == 1:
+            checksum ^= rook_attacks(squares[i], occupancies[i])
+        else:
+            checksum ^= queen_attacks(squares[i], occupancies[i])
+    return checksum
+
+
+def _rate(fn, count):
+    start = time.perf_counter()
+    fn()
+    return count / (time.perf_counter() - start)
+
+
+def bench(games=40):
+    samples = slider_samples(games)
+    count = len(samples)
+    kinds = np.array([kind for kind, _, _ in samples], dtype=np.int64)
+    squares = np.array([square for _, square, _ in samples], dtype=np.int64)
+    occupancies = np.array([occupancy for _, _, occupancy in samples], dtype=np.uint64)
+    print(f"{count} slider lookups from {games} random games")
+
+    for name, backend in PYTHON_BACKENDS.items():
+        lookups = (backend.bishop_attacks, backend.rook_attacks, backend.queen_attacks)
+        python = _rate(lambda: [lookups[kind](sq, occ) for kind, sq, occ in samples], count)
+
+        compiled = JIT_BACKENDS[name]
+        args = (kinds, squares, occupancies, compiled.bishop_attacks, compiled.rook_attacks, compiled.queen_attacks)
+        _compiled_loop(*args)  # compile outside the timed region
+        compiled_loop = _rate(lambda: _compiled_loop(*args), count)
+        print(f"{name:12s} python {python / 1e6:6.2f} M/s | njit in loop {compiled_loop / 1e6:8.2f} M/s")
+
+
+if __name__ == "__main__":
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
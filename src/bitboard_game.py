@@ -1,33 +1,156 @@
-import numpy as np
 from bitboard_nomagic import (
     pawn_attacks, knight_attacks, king_attacks,
 )
-from bitboard_magic import bishop_attacks, rook_attacks, queen_attacks
-from constants import KNIGHT, BISHOP, ROOK, QUEEN
+from slider_attacks import bishop_attacks, rook_attacks, queen_attacks
+from geometry import BETWEEN_PY
+from constants import (
+    KNIGHT, BISHOP, ROOK, QUEEN, PIECE_SYMBOLS,
+    WHITE_PAWNS, WHITE_KNIGHTS, WHITE_BISHOPS, WHITE_ROOKS, WHITE_QUEENS, WHITE_KING,
+    BLACK_PAWNS, BLACK_KNIGHTS, BLACK_BISHOPS, BLACK_ROOKS, BLACK_QUEENS, BLACK_KING,
+    WHITE_OCCUPANCY, BLACK_OCCUPANCY, OCCUPIED,
+)
+import numpy as np
+
+from zobrist import (
+    bitboard_key, PIECE_KEYS_PY, CASTLING_KEYS_PY, EP_FILE_KEYS_PY, SIDE_KEY_PY,
+)
+
+# Castling rights [wK, wQ, bK, bQ] lost when a move starts or ends on these squares
+CASTLING_RIGHTS_LOST = {4: (0, 1), 7: (0,), 0: (1,), 60: (2, 3), 63: (2,), 56: (3,)}
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+
+# Undo records are preallocated for this many plies and grow if a game runs longer
+MAX_PLY = 256
+# Undo record fields
+(UNDO_FROM, UNDO_TO, UNDO_PROMO, UNDO_PIECE, UNDO_CAPTURED,
+ UNDO_CASTLING, UNDO_EP, UNDO_HALFMOVE, UNDO_KEY) = range(9)
+
+# Fixed-size binary position record (little-endian, 112 bytes, a multiple of 8 so
+# records in a contiguous buffer keep their bitboards aligned). Move history is not included.
+POSITION_DTYPE = np.dtype([
+    ('pieces', '<u8', 12),       # piece bitboards in bb order
+    ('zobrist_key', '<u8'),
+    ('halfmove_clock', '<u2'),
+    ('fullmove_number', '<u2'),
+    ('en_passant_target', 'i1'),  # square index or -1
+    ('castling', 'u1'),           # bit i set = castling_rights[i]
+    ('white_to_move', 'u1'),
+    ('reserved', 'u1'),
+])
+POSITION_SIZE = POSITION_DTYPE.itemsize
+POSITION_FIELDS = POSITION_DTYPE.names[:-1]
+
+
+class AttackInfo:
+    """
+    Attack and check information for the side to move, computed once per
+    node and shared by move generation and check tests.
+
+    enemy_attacks  squares the opponent attacks, seen through our king (so
+                   the king cannot step back along a checking ray)
+    checkers       enemy pieces giving check
+    check_mask     squares a non-king move must land on: everything when
+                   not in check, the checker and the ray to it in single
+                   check, nothing in double check
+    pinned         our pieces pinned to the king
+    pin_rays       pinned square -> ray from the king up to and including the pinner
+    """
+    __slots__ = ('king_square', 'enemy_attacks', 'checkers', 'check_mask', 'pinned', 'pin_rays')
+
+    def __init__(self, king_square, enemy_attacks, checkers, check_mask, pinned, pin_rays):
+        self.king_square = king_square
+        self.enemy_attacks = enemy_attacks
+        self.checkers = checkers
+        self.check_mask = check_mask
+        self.pinned = pinned
+        self.pin_rays = pin_rays
+
+
+def _bitboard_property(index):
+    """Expose bb[index] under its piece name (e.g. gs.white_pawns)."""
+    def getter(self):
+        return self.bb[index]
+
+    def setter(self, value):
+        self.bb[index] = int(value)
+
+    return property(getter, setter)
 
 
 class BitboardGameState:
+    """
+    Bitboard position. The twelve piece boards and three occupancies are
+    plain Python ints in one list, `bb`, indexed by the constants in
+    constants.py (colour * 6 + piece type - 1, then WHITE_OCCUPANCY,
+    BLACK_OCCUPANCY, OCCUPIED). The named attributes (white_pawns, ...,
+    occupied) remain available as properties over that list.
+
+    `board` mirrors the bitboards square by square: board[sq] is the
+    piece index on sq, or -1 if it is empty.
+
+    `attack_info` caches the AttackInfo of the current node; make_move,
+    undo_move and update_occupancies clear it.
+    """
+    __slots__ = (
+        'bb', 'board', 'ply', 'undo_stack', 'white_to_move', 'castling_rights',
+        'en_passant_target', 'halfmove_clock', 'fullmove_number', 'zobrist_key', 'attack_info',
+    )
+
+    white_pawns = _bitboard_property(WHITE_PAWNS)
+    white_knights = _bitboard_property(WHITE_KNIGHTS)
+    white_bishops = _bitboard_property(WHITE_BISHOPS)
+    white_rooks = _bitboard_property(WHITE_ROOKS)
+    white_queens = _bitboard_property(WHITE_QUEENS)
+    white_king = _bitboard_property(WHITE_KING)
+    black_pawns = _bitboard_property(BLACK_PAWNS)
+    black_knights = _bitboard_property(BLACK_KNIGHTS)
+    black_bishops = _bitboard_property(BLACK_BISHOPS)
+    black_rooks = _bitboard_property(BLACK_ROOKS)
+    black_queens = _bitboard_property(BLACK_QUEENS)
+    black_king = _bitboard_property(BLACK_KING)
+    white_occupancy = _bitboard_property(WHITE_OCCUPANCY)
+    black_occupancy = _bitboard_property(BLACK_OCCUPANCY)
+    occupied = _bitboard_property(OCCUPIED)
+
     def __init__(self):
-        self.move_info = []
-        # Piece bitboard
-        self.white_pawns = np.uint64(0)
-        self.white_knights = np.uint64(0)
-        self.white_bishops = np.uint64(0)
-        self.white_rooks = np.uint64(0)
-        self.white_queens = np.uint64(0)
-        self.white_king = np.uint64(0)
-
-        self.black_pawns = np.uint64(0)
-        self.black_knights = np.uint64(0)
-        self.black_bishops = np.uint64(0)
-        self.black_rooks = np.uint64(0)
-        self.black_queens = np.uint64(0)
-        self.black_king = np.uint64(0)
-
-        # Overall occupancy
-        self.white_occupancy = np.uint64(0)
-        self.black_occupancy = np.uint64(0)
-        self.occupied = np.uint64(0)
+        self._init_fields()
+        self._init_starting_position()
+        self.zobrist_key = bitboard_key(self)
+
+    @classmethod
+    def from_bitboards(cls, pieces, board=None, white_to_move=True, castling_rights=(1, 1, 1, 1),
+                       en_passant_target=-1, halfmove_clock=0, fullmove_number=1, zobrist_key=None):
+        """
+        Build a position from its twelve piece bitboards, without setting up
+        the starting position first. The square -> piece `board` and the
+        Zobrist key are rebuilt when not given.
+        """
+        gs = cls.__new__(cls)
+        # Undo records are appended by make_move as needed, so building many positions stays cheap
+        gs._init_fields(undo_records=0)
+        gs.bb[:12] = [int(bb) for bb in pieces]
+        gs.update_occupancies()
+        if board is None:
+            gs.update_board()
+        else:
+            gs.board = list(board)
+        gs.white_to_move = bool(white_to_move)
+        gs.castling_rights = [int(right) for right in castling_rights]
+        gs.en_passant_target = int(en_passant_target)
+        gs.halfmove_clock = int(halfmove_clock)
+        gs.fullmove_number = int(fullmove_number)
+        gs.zobrist_key = bitboard_key(gs) if zobrist_key is None else int(zobrist_key)
+        return gs
+
+    def _init_fields(self, undo_records=MAX_PLY):
+        # One reusable undo record per ply (see the UNDO_* field indices)
+        self.ply = 0
+        self.undo_stack = [[0] * 9 for _ in range(undo_records)]
+        # Piece bitboards followed by the overall occupancies
+        self.bb = [0] * 15
+        # Piece index on each square, -1 if empty
+        self.board = [-1] * 64
 
         # Game state info
         self.white_to_move = True
@@ -35,86 +158,61 @@ class BitboardGameState:
         self.en_passant_target = -1  # Square index or -1
         self.halfmove_clock = 0
         self.fullmove_number = 1
-
-        self._init_starting_position()
-
-    def _init_starting_position(self):    
-        # White pawns (A2 to H2)
-        self.white_pawns   = np.uint64(0x000000000000FF00)
-        # Black pawns (A7 to H7)
-        self.black_pawns   = np.uint64(0x00FF000000000000)
-        # White rooks (A1 and H1)
-        self.white_rooks   = np.uint64(0x0000000000000081)
-        # Black rooks (A8 and H8)
-        self.black_rooks   = np.uint64(0x8100000000000000)
-        # White knights (B1 and G1)
-        self.white_knights = np.uint64(0x0000000000000042)
-        # Black knights (B8 and G8)
-        self.black_knights = np.uint64(0x4200000000000000)
-        # White bishops (C1 and F1)
-        self.white_bishops = np.uint64(0x0000000000000024)
-        # Black bishops (C8 and F8)
-        self.black_bishops = np.uint64(0x2400000000000000)
-        # White queens (D1)
-        self.white_queens  = np.uint64(0x0000000000000008)
-        # Black queens (D8)
-        self.black_queens  = np.uint64(0x0800000000000000)
-        # White king (E1)
-        self.white_king    = np.uint64(0x0000000000000010)
-        # Black king (E8)
-        self.black_king    = np.uint64(0x1000000000000000)
+        self.zobrist_key = 0
+        self.attack_info = None
+
+    def _init_starting_position(self):
+        bb = self.bb
+        bb[WHITE_PAWNS]   = 0x000000000000FF00  # A2 to H2
+        bb[BLACK_PAWNS]   = 0x00FF000000000000  # A7 to H7
+        bb[WHITE_ROOKS]   = 0x0000000000000081  # A1 and H1
+        bb[BLACK_ROOKS]   = 0x8100000000000000  # A8 and H8
+        bb[WHITE_KNIGHTS] = 0x0000000000000042  # B1 and G1
+        bb[BLACK_KNIGHTS] = 0x4200000000000000  # B8 and G8
+        bb[WHITE_BISHOPS] = 0x0000000000000024  # C1 and F1
+        bb[BLACK_BISHOPS] = 0x2400000000000000  # C8 and F8
+        bb[WHITE_QUEENS]  = 0x0000000000000008  # D1
+        bb[BLACK_QUEENS]  = 0x0800000000000000  # D8
+        bb[WHITE_KING]    = 0x0000000000000010  # E1
+        bb[BLACK_KING]    = 0x1000000000000000  # E8
 
         self.update_occupancies()
-        
+        self.update_board()
+
     def is_check(self, white: bool) -> bool:
         """Check if side `white` is in check."""
-        king_bb = self.white_king if white else self.black_king
-        king_sq = int(king_bb).bit_length() - 1
-        enemy_pawns = self.black_pawns if white else self.white_pawns
-        enemy_knights = self.black_knights if white else self.white_knights
-        enemy_bishops = self.black_bishops if white else self.white_bishops
-        enemy_rooks = self.black_rooks if white else self.white_rooks
-        enemy_queens = self.black_queens if white else self.white_queens
-        enemy_king = self.black_king if white else self.white_king
-        occupancy = self.white_occupancy | self.black_occupancy
-
-        if np.uint64(pawn_attacks(king_sq, not white)) & np.uint64(enemy_pawns):
+        if white == self.white_to_move:
+            return self.get_attack_info().checkers != 0
+        king_bb = self.bb[WHITE_KING if white else BLACK_KING]
+        return self.is_square_attacked(king_bb.bit_length() - 1, not white)
+
+    def is_square_attacked(self, square: int, by_white: bool) -> bool:
+        """Check if `square` is attacked by side `by_white`."""
+        bb = self.bb
+        base = 0 if by_white else 6
+        occupancy = bb[OCCUPIED]
+
+        # A pawn of `by_white` attacks `square` if a pawn of the other colour on `square` would attack it
+        if pawn_attacks(square, not by_white) & bb[base]:
             return True
-        if np.uint64(knight_attacks(king_sq)) & np.uint64(enemy_knights):
+        if knight_attacks(square) & bb[base + 1]:
             return True
-        if np.uint64(bishop_attacks(king_sq, occupancy)) & np.uint64(enemy_bishops | enemy_queens):
+        if bishop_attacks(square, occupancy) & (bb[base + 2] | bb[base + 4]):
             return True
-        if np.uint64(rook_attacks(king_sq, occupancy)) & np.uint64(enemy_rooks | enemy_queens):
+        if rook_attacks(square, occupancy) & (bb[base + 3] | bb[base + 4]):
             return True
-        if np.uint64(king_attacks(king_sq)) & np.uint64(enemy_king):
+        if king_attacks(square) & bb[base + 5]:
             return True
         return False
-    
-    def attack_map(self, is_white):
+
+    def attack_map(self, is_white, occupied=None):
+        """Squares attacked by side `is_white`, optionally over a different occupancy."""
         attacks = 0
+        base = 0 if is_white else 6
+        if occupied is None:
+            occupied = self.bb[OCCUPIED]
+        pawns, knights, bishops, rooks, queens, king = self.bb[base:base + 6]
 
-        if is_white:
-            pawns = self.white_pawns
-            knights = self.white_knights
-            bishops = self.white_bishops
-            rooks = self.white_rooks
-            queens = self.white_queens
-            king = self.white_king
-        else:
-            pawns = self.black_pawns
-            knights = self.black_knights
-            bishops = self.black_bishops
-            rooks = self.black_rooks
-            queens = self.black_queens
-            king = self.black_king
-
-        pawns = int(pawns)
-        knights = int(knights)
-        bishops = int(bishops)
-        rooks = int(rooks)
-        queens = int(queens)
-        king = int(king)
-        
         while pawns:
             sq = (pawns & -pawns).bit_length() - 1
             attacks |= pawn_attacks(sq, is_white)
@@ -127,17 +225,17 @@ class BitboardGameState:
 
         while bishops:
             sq = (bishops & -bishops).bit_length() - 1
-            attacks |= bishop_attacks(sq, self.occupied)
+            attacks |= bishop_attacks(sq, occupied)
             bishops &= bishops - 1
 
         while rooks:
             sq = (rooks & -rooks).bit_length() - 1
-            attacks |= rook_attacks(sq, self.occupied)
+            attacks |= rook_attacks(sq, occupied)
             rooks &= rooks - 1
 
         while queens:
             sq = (queens & -queens).bit_length() - 1
-            attacks |= queen_attacks(sq, self.occupied)
+            attacks |= queen_attacks(sq, occupied)
             queens &= queens - 1
 
         if king:
@@ -145,191 +243,300 @@ class BitboardGameState:
             attacks |= king_attacks(sq)
 
         return attacks
-        
+
+    def get_attack_info(self):
+        """AttackInfo for the side to move, computed on first use at each node."""
+        if self.attack_info is None:
+            self.attack_info = self._compute_attack_info()
+        return self.attack_info
+
+    def _compute_attack_info(self):
+        bb = self.bb
+        is_white = self.white_to_move
+        us, them = (0, 6) if is_white else (6, 0)
+        enemy = bb[BLACK_OCCUPANCY if is_white else WHITE_OCCUPANCY]
+        occupied = bb[OCCUPIED]
+        king_bb = bb[us + 5]
+        king_sq = king_bb.bit_length() - 1
+        enemy_diagonal = bb[them + 2] | bb[them + 4]
+        enemy_orthogonal = bb[them + 3] | bb[them + 4]
+
+        enemy_attacks = self.attack_map(not is_white, occupied ^ king_bb)
+
+        # --- Checkers and the squares that resolve a single check
+        checkers = (pawn_attacks(king_sq, is_white) & bb[them]) | (knight_attacks(king_sq) & bb[them + 1]) \
+            | (bishop_attacks(king_sq, occupied) & enemy_diagonal) | (rook_attacks(king_sq, occupied) & enemy_orthogonal)
+        if not checkers:
+            check_mask = FULL_BOARD
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            # The checker and, for a slider, the squares between it and the king
+            check_mask = checkers | BETWEEN_PY[king_sq][checkers.bit_length() - 1]
+
+        # --- Pinned pieces: the only piece between the king and an enemy slider
+        pin_rays = {}
+        snipers = (rook_attacks(king_sq, enemy) & enemy_orthogonal) | (bishop_attacks(king_sq, enemy) & enemy_diagonal)
+        between = BETWEEN_PY[king_sq]
+        while snipers:
+            sniper_sq = (snipers & -snipers).bit_length() - 1
+            ray = between[sniper_sq]
+            blockers = ray & occupied
+            if blockers and not blockers & (blockers - 1):
+                pin_rays[blockers.bit_length() - 1] = ray | (1 << sniper_sq)
+            snipers &= snipers - 1
+        pinned = sum(1 << sq for sq in pin_rays)
+
+        return AttackInfo(king_sq, enemy_attacks, checkers, check_mask, pinned, pin_rays)
+
     def make_move(self, move):
         """Apply a move to the current state."""
-        self.move_info.append((
-            self.white_pawns,
-            self.white_knights,
-            self.white_bishops,
-            self.white_rooks,
-            self.white_queens,
-            self.white_king,
-            self.black_pawns,
-            self.black_knights,
-            self.black_bishops,
-            self.black_rooks,
-            self.black_queens,
-            self.black_king,
-            self.white_occupancy,
-            self.black_occupancy,
-            self.occupied,
-            self.white_to_move,
-            self.castling_rights,
-            self.en_passant_target,
-            self.halfmove_clock,
-            self.fullmove_number,
-        ))
-
-        from_sq, to_sq, promo = move
-
-        mover_bb = np.uint64(1) << np.uint64(from_sq)
-        to_bb = np.uint64(1) << np.uint64(to_sq)
-
-        moving_side = 'white' if self.white_to_move else 'black'
-        opponent_side = 'black' if self.white_to_move else 'white'
-
-        # --- Detect piece type being moved
-        for piece_type in ['pawns', 'knights', 'bishops', 'rooks', 'queens', 'king']:
-            bb = getattr(self, f"{moving_side}_{piece_type}")
-            if bb & mover_bb:
-                # Remove from source, add to destination
-                setattr(self, f"{moving_side}_{piece_type}", (bb & ~mover_bb) | to_bb)
-
-                # --- En passant capture
-                if piece_type == 'pawns' and to_sq == self.en_passant_target:
-                    ep_capture_sq = to_sq + (-8 if self.white_to_move else 8)
-                    ep_capture_bb = np.uint64(1) << np.uint64(ep_capture_sq)
-                    opp_pawns_attr = f"{opponent_side}_pawns"
-                    setattr(self, opp_pawns_attr, getattr(self, opp_pawns_attr) & ~ep_capture_bb)
-
-                # --- Promotion
-                if promo:
-                    pawn_attr = f"{moving_side}_pawns"
-                    setattr(self, pawn_attr, getattr(self, pawn_attr) & ~to_bb)
-                    promo_attr = f"{moving_side}_{['', '', '', '', 'knights', 'bishops', 'rooks', 'queens'][promo]}"
-                    setattr(self, promo_attr, getattr(self, promo_attr) | to_bb)
-
-                # --- Set en passant square
-                if piece_type == 'pawns' and abs(to_sq - from_sq) == 16:
-                    self.en_passant_target = (from_sq + to_sq) // 2
-                else:
-                    self.en_passant_target = -1
-
-                break
+        self.attack_info = None
+        bb = self.bb
+        from_sq, to_sq, promo = int(move[0]), int(move[1]), int(move[2])
+        from_bb = 1 << from_sq
+        to_bb = 1 << to_sq
+
+        # Piece index offsets (0-5 white, 6-11 black)
+        if self.white_to_move:
+            us, them, us_occ, them_occ = 0, 6, WHITE_OCCUPANCY, BLACK_OCCUPANCY
         else:
-            raise ValueError(f"No moving piece found at {from_sq}")
+            us, them, us_occ, them_occ = 6, 0, BLACK_OCCUPANCY, WHITE_OCCUPANCY
 
-        # --- Normal capture (skips if en passant already captured)
-        for piece_type in ['pawns', 'knights', 'bishops', 'rooks', 'queens', 'king']:
-            opp_bb = getattr(self, f"{opponent_side}_{piece_type}")
-            if opp_bb & to_bb:
-                setattr(self, f"{opponent_side}_{piece_type}", opp_bb & ~to_bb)
-                break
+        board = self.board
+        piece = board[from_sq]
+        if piece < us or piece >= us + 6:
+            raise ValueError(f"No moving piece found at {from_sq}")
+        victim = board[to_sq]
+
+        # --- Save what this move changes
+        if self.ply == len(self.undo_stack):
+            self.undo_stack.append([0] * 9)
+        record = self.undo_stack[self.ply]
+        self.ply += 1
+        record[UNDO_FROM] = from_sq
+        record[UNDO_TO] = to_sq
+        record[UNDO_PROMO] = promo
+        record[UNDO_PIECE] = piece
+        record[UNDO_CAPTURED] = victim
+        record[UNDO_CASTLING] = -1
+        record[UNDO_EP] = ep_target = self.en_passant_target
+        record[UNDO_HALFMOVE] = self.halfmove_clock
+        record[UNDO_KEY] = key = self.zobrist_key
+
+        key ^= SIDE_KEY_PY
+        if ep_target != -1:
+            key ^= EP_FILE_KEYS_PY[ep_target % 8]
+        self.en_passant_target = -1
+
+        # --- Normal capture
+        if victim != -1:
+            bb[victim] ^= to_bb
+            bb[them_occ] ^= to_bb
+            key ^= PIECE_KEYS_PY[victim][to_sq]
+
+        # --- Remove from source, add to destination
+        bb[piece] ^= from_bb | to_bb
+        bb[us_occ] ^= from_bb | to_bb
+        board[from_sq] = -1
+        board[to_sq] = piece
+        key ^= PIECE_KEYS_PY[piece][from_sq] ^ PIECE_KEYS_PY[piece][to_sq]
+
+        if piece == us:
+            # --- En passant capture
+            if to_sq == ep_target:
+                ep_capture_sq = to_sq + (-8 if us == 0 else 8)
+                bb[them] ^= 1 << ep_capture_sq
+                bb[them_occ] ^= 1 << ep_capture_sq
+                board[ep_capture_sq] = -1
+                key ^= PIECE_KEYS_PY[them][ep_capture_sq]
+
+            # --- Promotion
+            elif promo:
+                promo_piece = us + promo - 1
+                bb[us] ^= to_bb
+                bb[promo_piece] |= to_bb
+                board[to_sq] = promo_piece
+                key ^= PIECE_KEYS_PY[us][to_sq] ^ PIECE_KEYS_PY[promo_piece][to_sq]
+
+            # --- Set en passant square
+            elif abs(to_sq - from_sq) == 16:
+                self.en_passant_target = (from_sq + to_sq) // 2
+                key ^= EP_FILE_KEYS_PY[self.en_passant_target % 8]
+
+        # --- Castling: move the rook alongside the king
+        elif piece == us + 5 and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            rook_bb = (1 << rook_from) | (1 << rook_to)
+            bb[us + 3] ^= rook_bb
+            bb[us_occ] ^= rook_bb
+            board[rook_from] = -1
+            board[rook_to] = us + 3
+            key ^= PIECE_KEYS_PY[us + 3][rook_from] ^ PIECE_KEYS_PY[us + 3][rook_to]
+
+        # --- Castling rights: moving the king or a rook, or capturing a rook, forfeits them
+        lost = CASTLING_RIGHTS_LOST.get(from_sq, ()) + CASTLING_RIGHTS_LOST.get(to_sq, ())
+        if lost:
+            rights = self.castling_rights
+            old_rights = rights[0] | rights[1] << 1 | rights[2] << 2 | rights[3] << 3
+            for i in lost:
+                if rights[i]:
+                    rights[i] = 0
+                    key ^= CASTLING_KEYS_PY[i]
+                    record[UNDO_CASTLING] = old_rights
+
+        # --- Move clocks
+        if piece == us or victim != -1:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if us:
+            self.fullmove_number += 1
 
-        # --- Update occupancies and switch sides
-        self.update_occupancies()
+        # --- Update occupancy and switch sides
+        bb[OCCUPIED] = bb[WHITE_OCCUPANCY] | bb[BLACK_OCCUPANCY]
         self.white_to_move = not self.white_to_move
-    
+        self.zobrist_key = key
+
     def undo_move(self):
         """
-        Undo a move by restoring saved game state.
+        Undo the last move, restoring only the fields it changed.
         """
-        (
-            self.white_pawns,
-            self.white_knights,
-            self.white_bishops,
-            self.white_rooks,
-            self.white_queens,
-            self.white_king,
-            self.black_pawns,
-            self.black_knights,
-            self.black_bishops,
-            self.black_rooks,
-            self.black_queens,
-            self.black_king,
-            self.white_occupancy,
-            self.black_occupancy,
-            self.occupied,
-            self.white_to_move,
-            self.castling_rights,
-            self.en_passant_target,
-            self.halfmove_clock,
-            self.fullmove_number
-        ) = self.move_info.pop()
+        self.attack_info = None
+        self.ply -= 1
+        (from_sq, to_sq, promo, piece, captured,
+         castling, ep_target, halfmove_clock, key) = self.undo_stack[self.ply]
+        bb = self.bb
+        board = self.board
+        from_bb = 1 << from_sq
+        to_bb = 1 << to_sq
 
+        self.white_to_move = not self.white_to_move
+        if self.white_to_move:
+            us, them, us_occ, them_occ = 0, 6, WHITE_OCCUPANCY, BLACK_OCCUPANCY
+        else:
+            us, them, us_occ, them_occ = 6, 0, BLACK_OCCUPANCY, WHITE_OCCUPANCY
+            self.fullmove_number -= 1
+
+        # --- Move the piece back (a promoted pawn leaves its new piece on the target)
+        if promo:
+            bb[us + promo - 1] ^= to_bb
+            bb[piece] ^= from_bb
+        else:
+            bb[piece] ^= from_bb | to_bb
+        bb[us_occ] ^= from_bb | to_bb
+        board[from_sq] = piece
+        board[to_sq] = captured
+
+        # --- Restore captured pieces and the castling rook
+        if captured != -1:
+            bb[captured] |= to_bb
+            bb[them_occ] |= to_bb
+        elif piece == us and to_sq == ep_target:
+            ep_capture_sq = to_sq + (-8 if us == 0 else 8)
+            bb[them] |= 1 << ep_capture_sq
+            bb[them_occ] |= 1 << ep_capture_sq
+            board[ep_capture_sq] = them
+        elif piece == us + 5 and abs(to_sq - from_sq) == 2:
+            rook_from, rook_to = (to_sq + 1, to_sq - 1) if to_sq > from_sq else (to_sq - 2, to_sq + 1)
+            rook_bb = (1 << rook_from) | (1 << rook_to)
+            bb[us + 3] ^= rook_bb
+            bb[us_occ] ^= rook_bb
+            board[rook_to] = -1
+            board[rook_from] = us + 3
+        bb[OCCUPIED] = bb[WHITE_OCCUPANCY] | bb[BLACK_OCCUPANCY]
+
+        if castling != -1:
+            rights = self.castling_rights
+            for i in range(4):
+                rights[i] = (castling >> i) & 1
+        self.en_passant_target = ep_target
+        self.halfmove_clock = halfmove_clock
+        self.zobrist_key = key
 
     def update_occupancies(self):
-        self.white_occupancy = (
-            self.white_pawns | self.white_knights | self.white_bishops |
-            self.white_rooks | self.white_queens | self.white_king
-        )
-        self.black_occupancy = (
-            self.black_pawns | self.black_knights | self.black_bishops |
-            self.black_rooks | self.black_queens | self.black_king
-        )
-        self.occupied = self.white_occupancy | self.black_occupancy
-        
-    def copy(self):
-        """Return a deep copy of the game state."""
-        new_state = BitboardGameState()
-        new_state.white_pawns = self.white_pawns
-        new_state.white_knights = self.white_knights
-        new_state.white_bishops = self.white_bishops
-        new_state.white_rooks = self.white_rooks
-        new_state.white_queens = self.white_queens
-        new_state.white_king = self.white_king
-
-        new_state.black_pawns = self.black_pawns
-        new_state.black_knights = self.black_knights
-        new_state.black_bishops = self.black_bishops
-        new_state.black_rooks = self.black_rooks
-        new_state.black_queens = self.black_queens
-        new_state.black_king = self.black_king
-
-        new_state.white_occupancy = self.white_occupancy
-        new_state.black_occupancy = self.black_occupancy
-        new_state.occupied = self.occupied
+        self.attack_info = None
+        bb = self.bb
+        bb[WHITE_OCCUPANCY] = bb[0] | bb[1] | bb[2] | bb[3] | bb[4] | bb[5]
+        bb[BLACK_OCCUPANCY] = bb[6] | bb[7] | bb[8] | bb[9] | bb[10] | bb[11]
+        bb[OCCUPIED] = bb[WHITE_OCCUPANCY] | bb[BLACK_OCCUPANCY]
+
+    def update_board(self):
+        """Rebuild the square -> piece array from the piece bitboards."""
+        board = self.board
+        for sq in range(64):
+            board[sq] = -1
+        for piece in range(12):
+            bb = self.bb[piece]
+            while bb:
+                board[(bb & -bb).bit_length() - 1] = piece
+                bb &= bb - 1
+
+    def piece_at(self, square):
+        """Piece index on `square` (0-5 white, 6-11 black), or -1 if empty."""
+        return self.board[square]
 
+    def copy(self):
+        """Return a copy of the position (the undo history is not copied)."""
+        new_state = BitboardGameState.__new__(BitboardGameState)
+        new_state._init_fields(undo_records=0)
+        new_state.bb = self.bb[:]
+        new_state.board = self.board[:]
         new_state.white_to_move = self.white_to_move
-        new_state.castling_rights = list(self.castling_rights)
+        new_state.castling_rights = self.castling_rights[:]
         new_state.en_passant_target = self.en_passant_target
         new_state.halfmove_clock = self.halfmove_clock
         new_state.fullmove_number = self.fullmove_number
+        new_state.zobrist_key = self.zobrist_key
+        new_state.attack_info = self.attack_info
         return new_state
-    
+
+    def _write_record(self, record):
+        record['pieces'] = self.bb[:12]
+        record['zobrist_key'] = self.zobrist_key
+        record['halfmove_clock'] = self.halfmove_clock
+        record['fullmove_number'] = self.fullmove_number
+        record['en_passant_target'] = self.en_passant_target
+        record['castling'] = sum(1 << i for i in range(4) if self.castling_rights[i])
+        record['white_to_move'] = self.white_to_move
+
+    @classmethod
+    def _from_fields(cls, pieces, zobrist_key, halfmove_clock, fullmove_number, en_passant_target, castling,
+                     white_to_move):
+        return cls.from_bitboards(pieces, None, white_to_move, [(castling >> i) & 1 for i in range(4)],
+                                  en_passant_target, halfmove_clock, fullmove_number, zobrist_key)
+
+    def to_bytes(self):
+        """The position as one POSITION_SIZE byte record (see POSITION_DTYPE)."""
+        record = np.zeros((), dtype=POSITION_DTYPE)
+        self._write_record(record)
+        return record.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Rebuild a position from the record written by to_bytes."""
+        record = np.frombuffer(data, dtype=POSITION_DTYPE, count=1)
+        return cls._from_fields(*(record[field][0].tolist() for field in POSITION_FIELDS))
+
     def print_board(self, return_str=False):
         """Print the current board with pieces."""
-        # Create a list of piece symbols
-        piece_symbols = {
-            "white_pawns": "P", "black_pawns": "p",
-            "white_knights": "N", "black_knights": "n",
-            "white_bishops": "B", "black_bishops": "b",
-            "white_rooks": "R", "black_rooks": "r",
-            "white_queens": "Q", "black_queens": "q",
-            "white_king": "K", "black_king": "k"
-        }
-
         # Iterate over the board squares (0 to 63)
         board_str = ""
         for rank in range(7, -1, -1):
             row = ""
             for file in range(8):
-                square_index = (rank * 8) + file
-                piece_found = False
-
-                # Check if the piece is on this square
-                for piece_type in piece_symbols:
-                    bb = getattr(self, piece_type)
-                    # Ensure that square_index is cast to np.uint64
-                    if bb & (np.uint64(1) << np.uint64(square_index)):
-                        row += piece_symbols[piece_type] + " "
-                        piece_found = True
-                        break
-
-                # If no piece found, print a dot for an empty square
-                if not piece_found:
-                    row += "* "
-                    
+                # Print a dot for an empty square
+                piece = self.board[rank * 8 + file]
+                row += (PIECE_SYMBOLS[piece] if piece != -1 else "*") + " "
+
             if return_str:
-                
                 board_str += row + "\n"
             else:
                 print(row)
-        
+
         if return_str:
             return board_str
-        
+
     def print_bitboard(self, bitboard: int, label: str = ""):
         if label:
             print(f"{label}")
@@ -359,10 +566,32 @@ class BitboardGameState:
             # Adding promotion notation if needed
             if promo != 0:
                 promo_piece = {KNIGHT: 'N', BISHOP: 'B', ROOK: 'R', QUEEN: 'Q'}
-                move_notation = f"{from_square_algebraic}{to_square_algebraic}{promo_piece}"
+                move_notation = f"{from_square_algebraic}{to_square_algebraic}{promo_piece[promo]}"
             else:
                 move_notation = f"{from_square_algebraic}{to_square_algebraic}"
                 
             return move_notation
         else:
-            return self.index_to_square(move_or_loc)
\ No newline at end of file
+            return self.index_to_square(move_or_loc)
+
+
+# === Batch serialization ===
+
+def encode_positions(states):
+    """Pack positions into one contiguous POSITION_DTYPE array; .tobytes() gives the wire form."""
+    records = np.zeros(len(states), dtype=POSITION_DTYPE)
+    records['pieces'] = [gs.bb[:12] for gs in states]
+    records['zobrist_key'] = [gs.zobrist_key for gs in states]
+    records['halfmove_clock'] = [gs.halfmove_clock for gs in states]
+    records['fullmove_number'] = [gs.fullmove_number for gs in states]
+    records['en_passant_target'] = [gs.en_passant_target for gs in states]
+    records['castling'] = [sum(right << i for i, right in enumerate(gs.castling_rights)) for gs in states]
+    records['white_to_move'] = [gs.white_to_move for gs in states]
+    return records
+
+def decode_positions(buffer):
+    """Positions from a buffer of POSITION_DTYPE records (bytes, memoryview or array), without copying it."""
+    records = buffer if isinstance(buffer, np.ndarray) else np.frombuffer(buffer, dtype=POSITION_DTYPE)
+    # Whole columns to Python values at once; per-record numpy scalar access is far slower
+    columns = [records[field].tolist() for field in POSITION_FIELDS]
+    return [BitboardGameState._from_fields(*fields) for fields in zip(*columns)]
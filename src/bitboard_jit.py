@@ -0,0 +1,560 @@
+"""
+Compiled bitboard position.
+
+JitBitboardState mirrors BitboardGameState (same `bb` layout: twelve piece
+boards indexed colour * 6 + piece type - 1, then the white, black and
+combined occupancies) as a numba jitclass, and the move generators,
+make/undo and attack tests below are @njit functions over it, so a whole
+perft or search loop can run in nopython mode.
+
+Moves use the 16-bit encoding from move_encoding.
+"""
+import time
+
+import numpy as np
+from numba import njit, int8, int64, uint64, boolean
+from numba.experimental import jitclass
+
+from bitboard_nomagic import KNIGHT_ATTACKS, KING_ATTACKS, WHITE_PAWN_ATTACKS, BLACK_PAWN_ATTACKS
+from constants import WHITE_OCCUPANCY, BLACK_OCCUPANCY, OCCUPIED
+from geometry import BETWEEN, lsb_index
+from slider_attacks import bishop_attacks_jit, rook_attacks_jit, queen_attacks_jit
+from move_encoding import (
+    MAX_MOVES, FLAG_NORMAL, FLAG_PROMOTION, FLAG_EN_PASSANT, FLAG_CASTLING,
+    encode_move, move_from_sq, move_to_sq, move_promo_code, move_flags,
+)
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EP_FILE_KEYS, SIDE_KEY
+
+MAX_PLY = 256  # Initial history capacity; make_move doubles it when a game runs longer
+
+# --- Castling rights bitmask ---
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+
+# Rights kept when a move starts or ends on each square
+CASTLING_MASK = np.full(64, 15, dtype=np.int64)
+CASTLING_MASK[4] = 15 & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[7] = 15 & ~WHITE_KINGSIDE
+CASTLING_MASK[0] = 15 & ~WHITE_QUEENSIDE
+CASTLING_MASK[60] = 15 & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[63] = 15 & ~BLACK_KINGSIDE
+CASTLING_MASK[56] = 15 & ~BLACK_QUEENSIDE
+
+# Zobrist key of every castling rights combination
+CASTLING_COMBO_KEYS = np.zeros(16, dtype=np.uint64)
+for _rights in range(16):
+    for _i in range(4):
+        if _rights & (1 << _i):
+            CASTLING_COMBO_KEYS[_rights] ^= CASTLING_KEYS[_i]
+
+# --- Bit helpers ---
+SQUARE_BB = np.array([1 << sq for sq in range(64)], dtype=np.uint64)
+RANK_3 = np.uint64(0x0000000000FF0000)
+RANK_6 = np.uint64(0x0000FF0000000000)
+RANK_1_8 = np.uint64(0xFF000000000000FF)
+NOT_FILE_A = np.uint64(0xFEFEFEFEFEFEFEFE)
+NOT_FILE_H = np.uint64(0x7F7F7F7F7F7F7F7F)
+
+
+# === Position ===
+spec = [
+    ('bb', uint64[:]),            # Piece boards and occupancies, as BitboardGameState.bb
+    ('board', int8[:]),           # Piece index on each square, -1 if empty
+    ('white_to_move', boolean),
+    ('castling', int64),          # Bitmask: 1 wK, 2 wQ, 4 bK, 8 bQ
+    ('en_passant_target', int64), # Square index or -1
+    ('halfmove_clock', int64),
+    ('fullmove_number', int64),
+    ('zobrist_key', uint64),
+    ('ply', int64),
+    ('history', int64[:, :]),     # Per ply: move, captured piece, castling, en passant, halfmove clock
+    ('key_history', uint64[:]),
+]
+
+
+@jitclass(spec)
+class JitBitboardState:
+    def __init__(self):
+        self.bb = np.zeros(15, dtype=np.uint64)
+        self.board = np.full(64, -1, dtype=np.int8)
+        self.white_to_move = True
+        self.castling = 15
+        self.en_passant_target = -1
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.zobrist_key = 0
+        self.ply = 0
+        self.history = np.zeros((MAX_PLY, 5), dtype=np.int64)
+        self.key_history = np.zeros(MAX_PLY, dtype=np.uint64)
+        self.reset()
+
+    def reset(self):
+        self.bb[:] = 0
+        self.bb[0] = 0x000000000000FF00
+        self.bb[1] = 0x0000000000000042
+        self.bb[2] = 0x0000000000000024
+        self.bb[3] = 0x0000000000000081
+        self.bb[4] = 0x0000000000000008
+        self.bb[5] = 0x0000000000000010
+        self.bb[6] = 0x00FF000000000000
+        self.bb[7] = 0x4200000000000000
+        self.bb[8] = 0x2400000000000000
+        self.bb[9] = 0x8100000000000000
+        self.bb[10] = 0x0800000000000000
+        self.bb[11] = 0x1000000000000000
+        self.white_to_move = True
+        self.castling = 15
+        self.en_passant_target = -1
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.ply = 0
+        self.refresh()
+
+    def refresh(self):
+        """Rebuild occupancies, the square array and the key from the piece boards."""
+        self.update_occupancies()
+        self.board[:] = -1
+        key = np.uint64(0)
+        for piece in range(12):
+            bb = self.bb[piece]
+            while bb:
+                sq = lsb_index(bb)
+                self.board[sq] = piece
+                key ^= PIECE_KEYS[piece, sq]
+                bb &= bb - np.uint64(1)
+        key ^= CASTLING_COMBO_KEYS[self.castling]
+        if self.en_passant_target != -1:
+            key ^= EP_FILE_KEYS[self.en_passant_target & 7]
+        if not self.white_to_move:
+            key ^= SIDE_KEY
+        self.zobrist_key = key
+
+    def update_occupancies(self):
+        bb = self.bb
+        bb[WHITE_OCCUPANCY] = bb[0] | bb[1] | bb[2] | bb[3] | bb[4] | bb[5]
+        bb[BLACK_OCCUPANCY] = bb[6] | bb[7] | bb[8] | bb[9] | bb[10] | bb[11]
+        bb[OCCUPIED] = bb[WHITE_OCCUPANCY] | bb[BLACK_OCCUPANCY]
+
+
+def from_bitboard_state(gs):
+    """Build a JitBitboardState from a BitboardGameState (history is not copied)."""
+    pos = JitBitboardState()
+    pos.bb[:] = np.array(gs.bb, dtype=np.uint64)
+    pos.white_to_move = gs.white_to_move
+    pos.castling = sum(1 << i for i in range(4) if gs.castling_rights[i])
+    pos.en_passant_target = gs.en_passant_target
+    pos.halfmove_clock = gs.halfmove_clock
+    pos.fullmove_number = gs.fullmove_number
+    pos.refresh()
+    return pos
+
+
+# === Attacks ===
+@njit
+def is_square_attacked(pos, square, by_white):
+    """Check if `square` is attacked by side `by_white`."""
+    bb = pos.bb
+    base = 0 if by_white else 6
+    occupancy = bb[OCCUPIED]
+
+    pawn_attacks = BLACK_PAWN_ATTACKS[square] if by_white else WHITE_PAWN_ATTACKS[square]
+    if pawn_attacks & bb[base]:
+        return True
+    if KNIGHT_ATTACKS[square] & bb[base + 1]:
+        return True
+    if KING_ATTACKS[square] & bb[base + 5]:
+        return True
+    if bishop_attacks_jit(square, occupancy) & (bb[base + 2] | bb[base + 4]):
+        return True
+    if rook_attacks_jit(square, occupancy) & (bb[base + 3] | bb[base + 4]):
+        return True
+    return False
+
+
+@njit
+def is_check(pos, white):
+    """Check if side `white` is in check."""
+    king_sq = lsb_index(pos.bb[5 if white else 11])
+    return is_square_attacked(pos, king_sq, not white)
+
+
+@njit
+def attack_map(pos, is_white):
+    bb = pos.bb
+    base = 0 if is_white else 6
+    occupancy = bb[OCCUPIED]
+    attacks = np.uint64(0)
+
+    pawns = bb[base]
+    if is_white:
+        attacks |= ((pawns << np.uint64(7)) & NOT_FILE_H) | ((pawns << np.uint64(9)) & NOT_FILE_A)
+    else:
+        attacks |= ((pawns >> np.uint64(9)) & NOT_FILE_H) | ((pawns >> np.uint64(7)) & NOT_FILE_A)
+
+    knights = bb[base + 1]
+    while knights:
+        attacks |= KNIGHT_ATTACKS[lsb_index(knights)]
+        knights &= knights - np.uint64(1)
+
+    diagonal = bb[base + 2] | bb[base + 4]
+    while diagonal:
+        attacks |= bishop_attacks_jit(lsb_index(diagonal), occupancy)
+        diagonal &= diagonal - np.uint64(1)
+
+    orthogonal = bb[base + 3] | bb[base + 4]
+    while orthogonal:
+        attacks |= rook_attacks_jit(lsb_index(orthogonal), occupancy)
+        orthogonal &= orthogonal - np.uint64(1)
+
+    attacks |= KING_ATTACKS[lsb_index(bb[base + 5])]
+    return attacks
+
+
+# =========== Move Generators ==============
+@njit
+def _add_pawn_moves(buf, n, targets, offset, promotions):
+    while targets:
+        to_sq = lsb_index(targets)
+        from_sq = to_sq - offset
+        if promotions:
+            for promo_code in range(3, -1, -1):
+                buf[n] = encode_move(from_sq, to_sq, promo_code, FLAG_PROMOTION)
+                n += 1
+        else:
+            buf[n] = encode_move(from_sq, to_sq, 0, FLAG_NORMAL)
+            n += 1
+        targets &= targets - np.uint64(1)
+    return n
+
+
+@njit
+def _add_piece_moves(buf, n, from_sq, targets):
+    while targets:
+        buf[n] = encode_move(from_sq, lsb_index(targets), 0, FLAG_NORMAL)
+        n += 1
+        targets &= targets - np.uint64(1)
+    return n
+
+
+@njit
+def generate_pawn_moves(pos, buf, n):
+    bb = pos.bb
+    empty = ~bb[OCCUPIED]
+    if pos.white_to_move:
+        pawns = bb[0]
+        enemy = bb[BLACK_OCCUPANCY]
+        single_push = (pawns << np.uint64(8)) & empty
+        double_push = ((single_push & RANK_3) << np.uint64(8)) & empty
+        left_attacks = (pawns << np.uint64(7)) & enemy & NOT_FILE_H
+        right_attacks = (pawns << np.uint64(9)) & enemy & NOT_FILE_A
+        push, left, right = 8, 7, 9
+    else:
+        pawns = bb[6]
+        enemy = bb[WHITE_OCCUPANCY]
+        single_push = (pawns >> np.uint64(8)) & empty
+        double_push = ((single_push & RANK_6) >> np.uint64(8)) & empty
+        left_attacks = (pawns >> np.uint64(9)) & enemy & NOT_FILE_H
+        right_attacks = (pawns >> np.uint64(7)) & enemy & NOT_FILE_A
+        push, left, right = -8, -9, -7
+
+    n = _add_pawn_moves(buf, n, single_push & ~RANK_1_8, push, False)
+    n = _add_pawn_moves(buf, n, single_push & RANK_1_8, push, True)
+    n = _add_pawn_moves(buf, n, double_push, 2 * push, False)
+    n = _add_pawn_moves(buf, n, left_attacks & ~RANK_1_8, left, False)
+    n = _add_pawn_moves(buf, n, left_attacks & RANK_1_8, left, True)
+    n = _add_pawn_moves(buf, n, right_attacks & ~RANK_1_8, right, False)
+    n = _add_pawn_moves(buf, n, right_attacks & RANK_1_8, right, True)
+
+    # --- En Passant ---
+    ep_sq = pos.en_passant_target
+    if ep_sq != -1:
+        # Our pawns that attack the en passant square
+        attackers = pawns & (BLACK_PAWN_ATTACKS[ep_sq] if pos.white_to_move else WHITE_PAWN_ATTACKS[ep_sq])
+        while attackers:
+            buf[n] = encode_move(lsb_index(attackers), ep_sq, 0, FLAG_EN_PASSANT)
+            n += 1
+            attackers &= attackers - np.uint64(1)
+    return n
+
+
+@njit
+def generate_knight_moves(pos, buf, n):
+    base = 0 if pos.white_to_move else 6
+    not_own = ~pos.bb[WHITE_OCCUPANCY if pos.white_to_move else BLACK_OCCUPANCY]
+    knights = pos.bb[base + 1]
+    while knights:
+        from_sq = lsb_index(knights)
+        n = _add_piece_moves(buf, n, from_sq, KNIGHT_ATTACKS[from_sq] & not_own)
+        knights &= knights - np.uint64(1)
+    return n
+
+
+@njit
+def generate_bishop_moves(pos, buf, n):
+    base = 0 if pos.white_to_move else 6
+    not_own = ~pos.bb[WHITE_OCCUPANCY if pos.white_to_move else BLACK_OCCUPANCY]
+    occupancy = pos.bb[OCCUPIED]
+    bishops = pos.bb[base + 2]
+    while bishops:
+        from_sq = lsb_index(bishops)
+        n = _add_piece_moves(buf, n, from_sq, bishop_attacks_jit(from_sq, occupancy) & not_own)
+        bishops &= bishops - np.uint64(1)
+    return n
+
+
+@njit
+def generate_rook_moves(pos, buf, n):
+    base = 0 if pos.white_to_move else 6
+    not_own = ~pos.bb[WHITE_OCCUPANCY if pos.white_to_move else BLACK_OCCUPANCY]
+    occupancy = pos.bb[OCCUPIED]
+    rooks = pos.bb[base + 3]
+    while rooks:
+        from_sq = lsb_index(rooks)
+        n = _add_piece_moves(buf, n, from_sq, rook_attacks_jit(from_sq, occupancy) & not_own)
+        rooks &= rooks - np.uint64(1)
+    return n
+
+
+@njit
+def generate_queen_moves(pos, buf, n):
+    base = 0 if pos.white_to_move else 6
+    not_own = ~pos.bb[WHITE_OCCUPANCY if pos.white_to_move else BLACK_OCCUPANCY]
+    occupancy = pos.bb[OCCUPIED]
+    queens = pos.bb[base + 4]
+    while queens:
+        from_sq = lsb_index(queens)
+        n = _add_piece_moves(buf, n, from_sq, queen_attacks_jit(from_sq, occupancy) & not_own)
+        queens &= queens - np.uint64(1)
+    return n
+
+
+@njit
+def generate_king_moves(pos, buf, n):
+    base = 0 if pos.white_to_move else 6
+    not_own = ~pos.bb[WHITE_OCCUPANCY if pos.white_to_move else BLACK_OCCUPANCY]
+    from_sq = lsb_index(pos.bb[base + 5])
+    return _add_piece_moves(buf, n, from_sq, KING_ATTACKS[from_sq] & not_own)
+
+
+@njit
+def generate_castling_moves(pos, buf, n):
+    occupancy = pos.bb[OCCUPIED]
+    if pos.white_to_move:
+        rights, king_sq, enemy = pos.castling & 3, 4, False
+    else:
+        rights, king_sq, enemy = (pos.castling >> 2) & 3, 60, True
+    if rights == 0 or is_square_attacked(pos, king_sq, enemy):
+        return n
+
+    # Kingside: f and g squares empty and not attacked
+    if rights & 1 and not occupancy & BETWEEN[king_sq, king_sq + 3]:
+        if not (is_square_attacked(pos, king_sq + 1, enemy) or is_square_attacked(pos, king_sq + 2, enemy)):
+            buf[n] = encode_move(king_sq, king_sq + 2, 0, FLAG_CASTLING)
+            n += 1
+    # Queenside: b, c and d squares empty, c and d not attacked
+    if rights & 2 and not occupancy & BETWEEN[king_sq, king_sq - 4]:
+        if not (is_square_attacked(pos, king_sq - 1, enemy) or is_square_attacked(pos, king_sq - 2, enemy)):
+            buf[n] = encode_move(king_sq, king_sq - 2, 0, FLAG_CASTLING)
+            n += 1
+    return n
+
+
+@njit
+def generate_all_moves(pos, buf):
+    """Write every pseudo-legal move into `buf` and return the count."""
+    n = generate_pawn_moves(pos, buf, 0)
+    n = generate_knight_moves(pos, buf, n)
+    n = generate_bishop_moves(pos, buf, n)
+    n = generate_rook_moves(pos, buf, n)
+    n = generate_queen_moves(pos, buf, n)
+    n = generate_king_moves(pos, buf, n)
+    return generate_castling_moves(pos, buf, n)
+
+
+# === Make / Undo ===
+@njit
+def _grow_history(pos):
+    capacity = pos.history.shape[0]
+    history = np.zeros((2 * capacity, 5), dtype=np.int64)
+    history[:capacity] = pos.history
+    key_history = np.zeros(2 * capacity, dtype=np.uint64)
+    key_history[:capacity] = pos.key_history
+    pos.history = history
+    pos.key_history = key_history
+
+@njit
+def make_move(pos, move):
+    """Apply an encoded move."""
+    # numba does not bounds-check, so the history must have room for this ply
+    if pos.ply == pos.history.shape[0]:
+        _grow_history(pos)
+    bb = pos.bb
+    board = pos.board
+    from_sq = move_from_sq(move)
+    to_sq = move_to_sq(move)
+    flags = move_flags(move)
+    from_bb = SQUARE_BB[from_sq]
+    to_bb = SQUARE_BB[to_sq]
+    us = 0 if pos.white_to_move else 6
+    them = 6 - us
+
+    piece = np.int64(board[from_sq])
+    captured = np.int64(board[to_sq])
+
+    history = pos.history[pos.ply]
+    history[0] = move
+    history[1] = captured
+    history[2] = pos.castling
+    history[3] = pos.en_passant_target
+    history[4] = pos.halfmove_clock
+    pos.key_history[pos.ply] = pos.zobrist_key
+    pos.ply += 1
+
+    key = pos.zobrist_key ^ SIDE_KEY
+    if pos.en_passant_target != -1:
+        key ^= EP_FILE_KEYS[pos.en_passant_target & 7]
+    pos.en_passant_target = -1
+
+    # --- Capture
+    if captured >= 0:
+        bb[captured] ^= to_bb
+        key ^= PIECE_KEYS[captured, to_sq]
+
+    # --- Remove from source, add to destination
+    bb[piece] ^= from_bb | to_bb
+    board[from_sq] = -1
+    board[to_sq] = piece
+    key ^= PIECE_KEYS[piece, from_sq] ^ PIECE_KEYS[piece, to_sq]
+
+    if flags == FLAG_EN_PASSANT:
+        ep_capture_sq = to_sq - 8 if us == 0 else to_sq + 8
+        bb[them] ^= SQUARE_BB[ep_capture_sq]
+        board[ep_capture_sq] = -1
+        key ^= PIECE_KEYS[them, ep_capture_sq]
+    elif flags == FLAG_PROMOTION:
+        promo_piece = us + 1 + move_promo_code(move)
+        bb[piece] ^= to_bb
+        bb[promo_piece] |= to_bb
+        board[to_sq] = promo_piece
+        key ^= PIECE_KEYS[piece, to_sq] ^ PIECE_KEYS[promo_piece, to_sq]
+    elif flags == FLAG_CASTLING:
+        if to_sq > from_sq:
+            rook_from, rook_to = to_sq + 1, to_sq - 1
+        else:
+            rook_from, rook_to = to_sq - 2, to_sq + 1
+        bb[us + 3] ^= SQUARE_BB[rook_from] | SQUARE_BB[rook_to]
+        board[rook_from] = -1
+        board[rook_to] = us + 3
+        key ^= PIECE_KEYS[us + 3, rook_from] ^ PIECE_KEYS[us + 3, rook_to]
+    elif piece == us and (to_sq - from_sq == 16 or from_sq - to_sq == 16):
+        pos.en_passant_target = (from_sq + to_sq) >> 1
+        key ^= EP_FILE_KEYS[pos.en_passant_target & 7]
+
+    # --- Castling rights
+    rights = pos.castling & CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+    if rights != pos.castling:
+        key ^= CASTLING_COMBO_KEYS[pos.castling] ^ CASTLING_COMBO_KEYS[rights]
+        pos.castling = rights
+
+    # --- Move clocks
+    if captured >= 0 or piece == us:
+        pos.halfmove_clock = 0
+    else:
+        pos.halfmove_clock += 1
+    if us:
+        pos.fullmove_number += 1
+
+    pos.update_occupancies()
+    pos.white_to_move = not pos.white_to_move
+    pos.zobrist_key = key
+
+
+@njit
+def undo_move(pos):
+    """Undo the last move made with make_move."""
+    bb = pos.bb
+    board = pos.board
+    pos.ply -= 1
+    history = pos.history[pos.ply]
+    move = history[0]
+    captured = history[1]
+    pos.castling = history[2]
+    pos.en_passant_target = history[3]
+    pos.halfmove_clock = history[4]
+    pos.zobrist_key = pos.key_history[pos.ply]
+    pos.white_to_move = not pos.white_to_move
+
+    from_sq = move_from_sq(move)
+    to_sq = move_to_sq(move)
+    flags = move_flags(move)
+    from_bb = SQUARE_BB[from_sq]
+    to_bb = SQUARE_BB[to_sq]
+    us = 0 if pos.white_to_move else 6
+    them = 6 - us
+
+    piece = np.int64(board[to_sq])
+    if flags == FLAG_PROMOTION:
+        bb[piece] ^= to_bb
+        piece = us
+        bb[piece] ^= from_bb
+    else:
+        bb[piece] ^= from_bb | to_bb
+    board[from_sq] = piece
+    board[to_sq] = captured
+
+    if captured >= 0:
+        bb[captured] |= to_bb
+    elif flags == FLAG_EN_PASSANT:
+        ep_capture_sq = to_sq - 8 if us == 0 else to_sq + 8
+        bb[them] |= SQUARE_BB[ep_capture_sq]
+        board[ep_capture_sq] = them
+    elif flags == FLAG_CASTLING:
+        if to_sq > from_sq:
+            rook_from, rook_to = to_sq + 1, to_sq - 1
+        else:
+            rook_from, rook_to = to_sq - 2, to_sq + 1
+        bb[us + 3] ^= SQUARE_BB[rook_from] | SQUARE_BB[rook_to]
+        board[rook_to] = -1
+        board[rook_from] = us + 3
+
+    if us:
+        pos.fullmove_number -= 1
+    pos.update_occupancies()
+
+
+# === Perft ===
+@njit
+def _perft(pos, depth, buf):
+    if depth == 0:
+        return 1
+
+    nodes = 0
+    moves = buf[depth]
+    n = generate_all_moves(pos, moves)
+    white = pos.white_to_move
+    for i in range(n):
+        make_move(pos, moves[i])
+        if not is_check(pos, white):
+            nodes += _perft(pos, depth - 1, buf)
+        undo_move(pos)
+    return nodes
+
+
+@njit
+def perft(pos, depth):
+    """Count leaf nodes of the legal move tree to `depth`."""
+    buf = np.zeros((depth + 1, MAX_MOVES), dtype=np.uint16)
+    return _perft(pos, depth, buf)
+
+
+if __name__ == "__main__":
+    correct_nodes = [20, 400, 8902, 197281, 4865609]
+    pos = JitBitboardState()
+    start = time.perf_counter()
+    perft(pos, 1)
+    print(f"Compiled in {time.perf_counter() - start:.2f}s")
+    for depth in range(1, 6):
+        start = time.perf_counter()
+        nodes = perft(pos, depth)
+        elapsed = time.perf_counter() - start
+        print(f"Depth {depth}: {nodes}=={correct_nodes[depth - 1]} nodes in {elapsed:.3f}s "
+              f"({nodes / max(elapsed, 1e-9):,.0f} nodes/s)")
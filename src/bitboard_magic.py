@@ -1,28 +1,58 @@
+"""
+Magic bitboard slider attacks.
+
+The tables live in one flat uint64 file, magic_tables/magics.npy: for
+bishops and then rooks, 64 masks, 64 magics, 64 shifts and 64 offsets,
+followed by the shared ("fancy magic") attack table both pieces index
+into. The attacks of a slider on `square` are at
+
+    offsets[square] + (((occupancy & masks[square]) * magics[square]) >> shifts[square])
+
+The file is opened with np.load(mmap_mode='r'), so import only maps it and
+forked workers share its pages. The Python lookups index the mapped attack
+table directly and convert just the 64-entry header arrays to Python ints.
+The @njit lookups are different: numba freezes the global arrays they read
+into the compiled code as constants, so each process that compiles them
+holds its own copy rather than the mapping. Run magic_builder.py (or this
+module) to regenerate the file.
+"""
 import random
-# import pickle
-# from pathlib import Path
-
-# bishop_attack_table = [[0 for _ in range(512)] for _ in range(64)]
-# rook_attack_table = [[0 for _ in range(4096)] for _ in range(64)]
-
-# BISHOP_MASKS = [0] * 64
-# BISHOP_MAGICS = [0] * 64
-# BISHOP_SHIFTS = [0] * 64
-
-# ROOK_MASKS = [0] * 64
-# ROOK_MAGICS = [0] * 64
-# ROOK_SHIFTS = [0] * 64
-
-from magic_tables import (
-    BISHOP_MASKS, 
-    BISHOP_MAGICS, 
-    BISHOP_SHIFTS,
-    ROOK_MASKS, 
-    ROOK_MAGICS, 
-    ROOK_SHIFTS, 
-    rook_attack_table, 
-    bishop_attack_table
-)
+from pathlib import Path
+
+import numpy as np
+from numba import njit
+
+MAGIC_FILE = Path(__file__).resolve().parent.parent / "magic_tables" / "magics.npy"
+
+# Per piece: masks, magics, shifts, offsets (64 entries each)
+FIELDS_PER_PIECE = 4
+HEADER_SIZE = 2 * FIELDS_PER_PIECE * 64
+
+
+def load_magic_tables(path=MAGIC_FILE):
+    """Map a magic table file; returns the eight 64-entry header arrays and the attack table."""
+    data = np.load(path, mmap_mode='r')
+    header = [data[i * 64:(i + 1) * 64] for i in range(2 * FIELDS_PER_PIECE)]
+    return (*header, data[HEADER_SIZE:])
+
+
+(BISHOP_MASKS, BISHOP_MAGICS, BISHOP_SHIFTS, BISHOP_OFFSETS,
+ ROOK_MASKS, ROOK_MAGICS, ROOK_SHIFTS, ROOK_OFFSETS,
+ ATTACK_TABLE) = load_magic_tables()
+
+# Python int copies of the small per-square header arrays for the pure Python lookups below;
+# the attack table itself stays mapped and is read with .item()
+BISHOP_MASKS_PY, BISHOP_MAGICS_PY, BISHOP_SHIFTS_PY, BISHOP_OFFSETS_PY = (
+    BISHOP_MASKS.tolist(), BISHOP_MAGICS.tolist(), BISHOP_SHIFTS.tolist(), BISHOP_OFFSETS.tolist())
+ROOK_MASKS_PY, ROOK_MAGICS_PY, ROOK_SHIFTS_PY, ROOK_OFFSETS_PY = (
+    ROOK_MASKS.tolist(), ROOK_MAGICS.tolist(), ROOK_SHIFTS.tolist(), ROOK_OFFSETS.tolist())
+
+# Plain ndarray views of the mapping for the compiled lookups (frozen into them as constants at compile time)
+BISHOP_MASKS_NP, BISHOP_MAGICS_NP, BISHOP_SHIFTS_NP, BISHOP_OFFSETS_NP = (
+    np.asarray(BISHOP_MASKS), np.asarray(BISHOP_MAGICS), np.asarray(BISHOP_SHIFTS), np.asarray(BISHOP_OFFSETS))
+ROOK_MASKS_NP, ROOK_MAGICS_NP, ROOK_SHIFTS_NP, ROOK_OFFSETS_NP = (
+    np.asarray(ROOK_MASKS), np.asarray(ROOK_MAGICS), np.asarray(ROOK_SHIFTS), np.asarray(ROOK_OFFSETS))
+ATTACK_TABLE_NP = np.asarray(ATTACK_TABLE)
 
 def popcount(x):
     return bin(x).count("1")
@@ -85,107 +115,92 @@ def set_occupancy(index, bits, mask):
                 break
     return occ
 
-def find_magic(square, mask_fn, attack_fn, entries, max_attempts=1000000):
+def magic_entries(magic, shift, occupancies, attacks):
+    """
+    Attack table of one square indexed by `magic`, or None if two
+    occupancies with different attack sets collide.
+    """
+    entries = [None] * (1 << (64 - shift))
+    for occupancy, attack in zip(occupancies, attacks):
+        index = ((occupancy * magic) & 0xFFFFFFFFFFFFFFFF) >> shift
+        if entries[index] is None:
+            entries[index] = attack
+        elif entries[index] != attack:
+            return None
+    return [0 if attack is None else attack for attack in entries]
+
+def square_occupancies(square, mask_fn, attack_fn):
+    """Mask of `square` and every blocker subset of it with the attacks it produces."""
     mask = mask_fn(square)
     bits = popcount(mask)
-    occupancy_count = 1 << bits
+    occupancies = [set_occupancy(i, bits, mask) for i in range(1 << bits)]
+    return mask, occupancies, [attack_fn(square, occ) for occ in occupancies]
 
-    occupancies = [set_occupancy(i, bits, mask) for i in range(occupancy_count)]
-    attacks = [attack_fn(square, occ) for occ in occupancies]
+def find_magic(square, mask_fn, attack_fn, max_attempts=1000000, rng=random):
+    """Search a magic for `square`; returns (mask, magic, shift, entries)."""
+    mask, occupancies, attacks = square_occupancies(square, mask_fn, attack_fn)
+    shift = 64 - popcount(mask)
 
     for _ in range(max_attempts):
-        magic = random.getrandbits(64) & random.getrandbits(64) & random.getrandbits(64)
-        used = {}
-        success = True
-        for i in range(occupancy_count):
-            index = ((occupancies[i] * magic) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
-            if index in used:
-                if used[index] != attacks[i]:
-                    success = False
-                    break
-            else:
-                used[index] = attacks[i]
-        if success:
-            for i in range(occupancy_count):
-                index = ((occupancies[i] * magic) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
-                entries[square][index] = attacks[i]
-            return mask, magic, 64 - bits
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        entries = magic_entries(magic, shift, occupancies, attacks)
+        if entries is not None:
+            return mask, magic, shift, entries
     raise RuntimeError(f"Failed to find magic for square {square}")
 
-def generate_all_magics():
-    for square in range(64):
-        mask, magic, shift = find_magic(square, generate_mask_bishop, compute_bishop_attacks, bishop_attack_table)
-        BISHOP_MASKS[square] = mask
-        BISHOP_MAGICS[square] = magic
-        BISHOP_SHIFTS[square] = shift
-
-        mask, magic, shift = find_magic(square, generate_mask_rook, compute_rook_attacks, rook_attack_table)
-        ROOK_MASKS[square] = mask
-        ROOK_MAGICS[square] = magic
-        ROOK_SHIFTS[square] = shift
+def generate_all_magics(rng=random):
+    """Search bishop and rook magics for every square; returns two lists of (mask, magic, shift, entries)."""
+    bishops = [find_magic(square, generate_mask_bishop, compute_bishop_attacks, rng=rng) for square in range(64)]
+    rooks = [find_magic(square, generate_mask_rook, compute_rook_attacks, rng=rng) for square in range(64)]
+    return bishops, rooks
+
+def pack_magic_tables(bishops, rooks):
+    """Lay out per-square (mask, magic, shift, entries) results in the flat file format."""
+    header = []
+    attacks = []
+    for squares in (bishops, rooks):
+        offsets = []
+        for _, _, _, entries in squares:
+            offsets.append(len(attacks))
+            attacks.extend(entries)
+        header += [entry[0] for entry in squares] + [entry[1] for entry in squares] \
+            + [entry[2] for entry in squares] + offsets
+    return np.array(header + attacks, dtype=np.uint64)
+
+def write_magic_tables(data, path=MAGIC_FILE):
+    np.save(path, data)
 
 def bishop_attacks(square, occupancy):
-    mask = BISHOP_MASKS[square]
-    magic = BISHOP_MAGICS[square]
-    shift = BISHOP_SHIFTS[square]
-    index = ((int(occupancy) & mask) * magic & 0xFFFFFFFFFFFFFFFF) >> shift
-    return bishop_attack_table[square][index]
+    index = ((int(occupancy) & BISHOP_MASKS_PY[square]) * BISHOP_MAGICS_PY[square] & 0xFFFFFFFFFFFFFFFF) \
+        >> BISHOP_SHIFTS_PY[square]
+    return ATTACK_TABLE.item(BISHOP_OFFSETS_PY[square] + index)
 
 def rook_attacks(square, occupancy):
-    mask = ROOK_MASKS[square]
-    magic = ROOK_MAGICS[square]
-    shift = ROOK_SHIFTS[square]
-    index = ((int(occupancy) & mask) * magic & 0xFFFFFFFFFFFFFFFF) >> shift
-    return rook_attack_table[square][index]
+    index = ((int(occupancy) & ROOK_MASKS_PY[square]) * ROOK_MAGICS_PY[square] & 0xFFFFFFFFFFFFFFFF) \
+        >> ROOK_SHIFTS_PY[square]
+    return ATTACK_TABLE.item(ROOK_OFFSETS_PY[square] + index)
 
 def queen_attacks(square, occupancy):
     return bishop_attacks(square, occupancy) | rook_attacks(square, occupancy)
 
-def write_constants_to_file():
-    with open("src/magic_tables.py", "w") as f:
-        f.write("BISHOP_MASKS = [\n")
-        for val in BISHOP_MASKS:
-            f.write(f"    0x{val:016x},\n")
-        f.write("]\n\n")
-
-        f.write("BISHOP_MAGICS = [\n")
-        for val in BISHOP_MAGICS:
-            f.write(f"    0x{val:016x},\n")
-        f.write("]\n\n")
-
-        f.write("BISHOP_SHIFTS = [\n")
-        for val in BISHOP_SHIFTS:
-            f.write(f"    {val},\n")
-        f.write("]\n\n")
-
-        f.write("ROOK_MASKS = [\n")
-        for val in ROOK_MASKS:
-            f.write(f"    0x{val:016x},\n")
-        f.write("]\n\n")
-
-        f.write("ROOK_MAGICS = [\n")
-        for val in ROOK_MAGICS:
-            f.write(f"    0x{val:016x},\n")
-        f.write("]\n\n")
-
-        f.write("ROOK_SHIFTS = [\n")
-        for val in ROOK_SHIFTS:
-            f.write(f"    {val},\n")
-        f.write("]\n\n")
-
-        f.write("bishop_attack_table = [\n")
-        for row in bishop_attack_table:
-            f.write("    [")
-            f.write(", ".join(f"0x{x:016x}" for x in row))
-            f.write("],\n")
-        f.write("]\n\n")
-
-        f.write("rook_attack_table = [\n")
-        for row in rook_attack_table:
-            f.write("    [")
-            f.write(", ".join(f"0x{x:016x}" for x in row))
-            f.write("],\n")
-        f.write("]\n")
-
-# generate_all_magics()
-# write_constants_to_file()
+# === Compiled lookups: same results as np.uint64, usable from @njit code ===
+# Python callers pass the occupancy as np.uint64: numba types Python ints as
+# int64, so an occupancy with bit 63 set would not convert.
+@njit
+def bishop_attacks_jit(square, occupancy):
+    index = ((np.uint64(occupancy) & BISHOP_MASKS_NP[square]) * BISHOP_MAGICS_NP[square]) >> BISHOP_SHIFTS_NP[square]
+    return ATTACK_TABLE_NP[BISHOP_OFFSETS_NP[square] + index]
+
+@njit
+def rook_attacks_jit(square, occupancy):
+    index = ((np.uint64(occupancy) & ROOK_MASKS_NP[square]) * ROOK_MAGICS_NP[square]) >> ROOK_SHIFTS_NP[square]
+    return ATTACK_TABLE_NP[ROOK_OFFSETS_NP[square] + index]
+
+@njit
+def queen_attacks_jit(square, occupancy):
+    return bishop_attacks_jit(square, occupancy) | rook_attacks_jit(square, occupancy)
+
+
+if __name__ == "__main__":
+    from magic_builder import main
+    main()
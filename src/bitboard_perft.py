@@ -1,100 +1,361 @@
 from bitboard_game import BitboardGameState
-from generate_moves import generate_all_moves
+from generate_moves import generate_legal_moves, generate_legal_moves_into, count_legal_moves
+from bitboard_jit import from_bitboard_state, perft as jit_perft
+from move_encoding import MAX_MOVES, DECODED
+from fen import to_fen
+import itertools
+import os
+import struct
+import sys
 import time
-from functools import wraps
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, wraps
+import numpy as np
 
 # Validation tools
 import chess
-import ast
-from typing import List, Tuple
 
 def timeit(func):
+    """Print how long each call took; the return value is passed through unchanged."""
     @wraps(func)
     def wrapper(*args, **kwargs):
         start = time.perf_counter()
         result = func(*args, **kwargs)
         end = time.perf_counter()
-        res = f"{func.__name__} executed in {end - start:.6f} seconds. {result}"
-        return res
+        print(f"{func.__name__} executed in {end - start:.6f} seconds.")
+        return result
     return wrapper
 
-counts_set = set()
-
-def _bitboard_perft(gs, depth, verbose):
+def _bitboard_perft(gs, depth):
     if depth == 0:
         return 1
-    
+    if depth == 1:
+        # Bulk leaf counting: the leaves are only counted, never made
+        return count_legal_moves(gs)
+
     nodes = 0
-    moves = generate_all_moves(gs, verbose)
+    moves = generate_legal_moves(gs)
     for move in moves:
         gs.make_move(move)
-        if not gs.is_check(not gs.white_to_move):
-            nodes += _bitboard_perft(gs, depth-1, verbose)
-            
+        nodes += _bitboard_perft(gs, depth-1)
         gs.undo_move()
         
     return nodes
 
 
-@timeit
-def bitboard_perft(gs, depth, verbose=False):
-    return _bitboard_perft(gs, depth, verbose)
+# =========== Hashed perft ==============
+# Subtree counts keyed by (Zobrist key, remaining depth). Each bucket has two
+# entries: the first keeps the deeper subtree (larger counts are more work to
+# redo), the second always takes the newest one.
+ENTRY_BYTES = 16  # uint64 key + uint64 (count << 8 | depth)
+DEFAULT_TABLE_MB = 64
+
+class PerftTable:
+    __slots__ = ('keys', 'entries', 'mask', 'probes', 'hits')
+
+    def __init__(self, memory_mb=DEFAULT_TABLE_MB):
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= memory_mb * (1 << 20):
+            buckets *= 2
+        self.keys = np.zeros(2 * buckets, dtype=np.uint64)
+        self.entries = np.zeros(2 * buckets, dtype=np.uint64)  # depth 0 marks an empty entry
+        self.mask = buckets - 1
+        self.probes = 0
+        self.hits = 0
+
+    @property
+    def memory_bytes(self):
+        return self.keys.nbytes + self.entries.nbytes
 
-def bitboard_perft_sequences(gs, depth, outfile):
-    sequence = []
-    _bitboard_perft_sequences(gs, depth, sequence, outfile)
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
 
+    def probe(self, key, depth):
+        """Stored node count of (key, depth), or -1."""
+        self.probes += 1
+        index = 2 * (key & self.mask)
+        for slot in (index, index + 1):
+            entry = self.entries.item(slot)
+            if entry & 0xFF == depth and self.keys.item(slot) == key:
+                self.hits += 1
+                return entry >> 8
+        return -1
 
-def _bitboard_perft_sequences(gs, depth, sequence, outfile):
+    def store(self, key, depth, nodes):
+        index = 2 * (key & self.mask)
+        if depth < self.entries.item(index) & 0xFF:
+            index += 1
+        self.keys[index] = key
+        self.entries[index] = (nodes << 8) | depth
+
+def _hashed_perft(gs, depth, table):
     if depth == 0:
-        outfile.write(str(sequence)+"\n")
+        return 1
+    key = gs.zobrist_key
+    nodes = table.probe(key, depth)
+    if nodes != -1:
+        return nodes
+
+    if depth == 1:
+        nodes = count_legal_moves(gs)
+    else:
+        nodes = 0
+        for move in generate_legal_moves(gs):
+            gs.make_move(move)
+            nodes += _hashed_perft(gs, depth - 1, table)
+            gs.undo_move()
+    table.store(key, depth, nodes)
+    return nodes
+
+def hashed_perft_report(gs, depth, memory_mb=DEFAULT_TABLE_MB):
+    """Plain and hashed perft of `gs` side by side: node counts, times, speedup and table hit rate."""
+    start = time.perf_counter()
+    nodes = _bitboard_perft(gs, depth)
+    plain_seconds = time.perf_counter() - start
+    table = PerftTable(memory_mb)
+    start = time.perf_counter()
+    hashed_nodes = _hashed_perft(gs, depth, table)
+    hashed_seconds = time.perf_counter() - start
+    return {
+        'depth': depth,
+        'nodes': nodes,
+        'hashed_nodes': hashed_nodes,
+        'plain_seconds': plain_seconds,
+        'hashed_seconds': hashed_seconds,
+        'speedup': plain_seconds / hashed_seconds,
+        'hit_rate': table.hit_rate,
+        'table_bytes': table.memory_bytes,
+    }
+
+
+# =========== Parallel perft ==============
+# The root moves (or every root move + reply, with split_depth=2, for an even
+# load when a few root moves own most of the tree) are counted in worker
+# processes. Each task is a position's 112-byte to_bytes() record and the
+# remaining depth; with memory_mb, every worker keeps one PerftTable for all
+# of its tasks.
+_worker_table = None
+
+def _init_worker(memory_mb):
+    global _worker_table
+    _worker_table = PerftTable(memory_mb) if memory_mb else None
+
+def _count_subtree(task):
+    data, depth = task
+    gs = BitboardGameState.from_bytes(data)
+    if _worker_table is None:
+        return _bitboard_perft(gs, depth)
+    return _hashed_perft(gs, depth, _worker_table)
+
+def _split_tasks(gs, split_depth, depth, root_index, tasks, owners):
+    """Queue the positions `split_depth` plies below `gs`, each owned by its root move."""
+    if split_depth == 0:
+        tasks.append((gs.to_bytes(), depth))
+        owners.append(root_index)
         return
+    for move in generate_legal_moves(gs):
+        gs.make_move(move)
+        _split_tasks(gs, split_depth - 1, depth - 1, root_index, tasks, owners)
+        gs.undo_move()
 
-    moves = generate_all_moves(gs, verbose=False)
-    for move in moves:
+def parallel_perft(gs, depth, workers=None, split_depth=1, memory_mb=0):
+    """
+    Perft over a ProcessPoolExecutor. Returns (total, divide), with divide
+    the node count below each root move keyed by its algebraic name
+    ("e2e4", "e7e8Q"), in generation order.
+    """
+    if depth < 0:
+        raise ValueError(f"perft depth must be at least 0, got {depth}")
+    if depth == 0:
+        return 1, {}
+    root_moves = generate_legal_moves(gs)
+    names = [gs.get_standard_algebraic(tuple(int(x) for x in move)) for move in root_moves]
+    if depth == 1:
+        divide = dict.fromkeys(names, 1)
+        return len(divide), divide
+
+    split_depth = max(1, min(split_depth, depth - 1))
+    tasks, owners = [], []
+    for root_index, move in enumerate(root_moves):
         gs.make_move(move)
-        if not gs.is_check(not gs.white_to_move):
-            sequence.append(move)
-            _bitboard_perft_sequences(gs, depth - 1, sequence, outfile)
-            sequence.pop()
+        _split_tasks(gs, split_depth - 1, depth - 1, root_index, tasks, owners)
         gs.undo_move()
 
-    return
+    counts = [0] * len(root_moves)
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(memory_mb,)) as executor:
+        chunksize = max(1, len(tasks) // (4 * workers))
+        for root_index, nodes in zip(owners, executor.map(_count_subtree, tasks, chunksize=chunksize)):
+            counts[root_index] += nodes
+    divide = dict(zip(names, counts))
+    return sum(counts), divide
+
+def print_divide(total, divide):
+    for name, nodes in divide.items():
+        print(f"{name}: {nodes}")
+    print(f"\nMoves: {len(divide)}\nNodes: {total}")
+
+
+@timeit
+def bitboard_perft(gs, depth):
+    return _bitboard_perft(gs, depth)
+
+@timeit
+def bitboard_perft_hashed(gs, depth, memory_mb=DEFAULT_TABLE_MB):
+    return _hashed_perft(gs, depth, PerftTable(memory_mb))
+
+@timeit
+def bitboard_perft_jit(gs, depth):
+    """Same count as bitboard_perft, run on the compiled JitBitboardState."""
+    return jit_perft(from_bitboard_state(gs), depth)
+
+# =========== Perft move sequences ==============
+# Every legal move sequence of a perft run as a binary stream: a header
+#
+#     b"PSEQ", version (u8), depth (u8), FEN length (u16), FEN (ASCII)
+#
+# then one record per sequence of `depth` little-endian uint16 move codes
+# (see move_encoding), in perft order. Fixed-width records can be read back
+# in chunks of any size with no parsing.
+SEQUENCE_MAGIC = b"PSEQ"
+SEQUENCE_VERSION = 1
+_SEQUENCE_HEADER = struct.Struct("<4sBBH")
+SEQUENCE_CHUNK = 1 << 16
+
+class SequenceWriter:
+    """Buffers sequences in a (chunk_size, depth) array and writes it out whenever it fills up."""
+    __slots__ = ('file', 'chunk', 'count', 'written')
+
+    def __init__(self, file, depth, fen, chunk_size=SEQUENCE_CHUNK):
+        if not 1 <= depth <= 255:
+            raise ValueError(f"sequence depth must be 1-255, got {depth}")
+        fen = fen.encode("ascii")
+        file.write(_SEQUENCE_HEADER.pack(SEQUENCE_MAGIC, SEQUENCE_VERSION, depth, len(fen)) + fen)
+        self.file = file
+        self.chunk = np.empty((chunk_size, depth), dtype='<u2')
+        self.count = 0
+        self.written = 0
+
+    def write_block(self, prefix, last_codes):
+        """Write one sequence per code in `last_codes`, all starting with `prefix`."""
+        start, total = 0, len(last_codes)
+        while start < total:
+            take = min(total - start, len(self.chunk) - self.count)
+            rows = self.chunk[self.count:self.count + take]
+            rows[:, :-1] = prefix
+            rows[:, -1] = last_codes[start:start + take]
+            self.count += take
+            start += take
+            if self.count == len(self.chunk):
+                self.flush()
+
+    def flush(self):
+        self.file.write(self.chunk[:self.count].tobytes())
+        self.written += self.count
+        self.count = 0
+
+def bitboard_perft_sequences(gs, depth, outfile, chunk_size=SEQUENCE_CHUNK):
+    """Write every legal move sequence of length `depth` to the binary file `outfile`; returns how many."""
+    writer = SequenceWriter(outfile, depth, to_fen(gs), chunk_size)
+    _bitboard_perft_sequences(gs, depth, [], np.empty(MAX_MOVES, dtype=np.uint16), writer)
+    writer.flush()
+    return writer.written
+
+def _bitboard_perft_sequences(gs, depth, prefix, buf, writer):
+    count = generate_legal_moves_into(gs, buf)
+    if depth == 1:
+        # The last ply goes out as one block, moves are never made
+        writer.write_block(prefix, buf[:count])
+        return
+
+    for code in buf[:count].tolist():
+        gs.make_move(DECODED[code])
+        prefix.append(code)
+        _bitboard_perft_sequences(gs, depth - 1, prefix, buf, writer)
+        prefix.pop()
+        gs.undo_move()
+
+def read_sequence_header(file):
+    """(depth, FEN) of a sequence stream, leaving `file` at the first record."""
+    magic, version, depth, fen_length = _SEQUENCE_HEADER.unpack(file.read(_SEQUENCE_HEADER.size))
+    if magic != SEQUENCE_MAGIC or version != SEQUENCE_VERSION:
+        raise ValueError(f"not a version {SEQUENCE_VERSION} perft sequence stream")
+    return depth, file.read(fen_length).decode("ascii")
+
+def read_sequence_chunks(file, depth, chunk_size=SEQUENCE_CHUNK):
+    """Yield (chunk_size, depth) uint16 arrays of sequences until the end of the stream."""
+    record_bytes = 2 * depth
+    while True:
+        data = file.read(chunk_size * record_bytes)
+        if not data:
+            return
+        if len(data) % record_bytes:
+            raise ValueError("sequence stream ends in a partial record")
+        yield np.frombuffer(data, dtype='<u2').reshape(-1, depth)
 
 # VALIDATION
 
-def parse_tuple_list(s: str) -> List[Tuple[int]]:
-    return ast.literal_eval(s)
+@lru_cache(maxsize=None)
+def _chess_move(code):
+    from_sq, to_sq, promo = DECODED[code]
+    return chess.Move(int(from_sq), int(to_sq), int(promo) or None)
 
-def validate(depth: int):
-    with open(f"logs/moves_depth{depth}.txt", "r") as f:
-        sequences = [parse_tuple_list(line) for line in f.readlines()]
-        
-    n = 0
-    for seq in sequences:
-        board = chess.Board()
-        moves = [chess.Move(move[0], move[1]) for move in seq]
-        for move in moves:
-            if move not in board.legal_moves:
-                msg = str(move) + " from "
-                for m in moves:
-                    msg += str(m) + ", "
-                msg += "is not allowed"
-                print(msg)
-                n += 1
-                break
-            
+def _validate_chunk(task):
+    """
+    Replay a chunk of sequences with python-chess. Consecutive sequences
+    share their prefix in perft order, so only the moves after the shared
+    prefix are popped and pushed. Returns (row, plies) of the first illegal
+    move, or None.
+    """
+    fen, sequences = task
+    board = chess.Board(fen)
+    previous = []
+    for row, sequence in enumerate(sequences.tolist()):
+        shared = 0
+        while shared < len(previous) and previous[shared] == sequence[shared]:
+            shared += 1
+        for _ in range(len(previous) - shared):
+            board.pop()
+        for ply in range(shared, len(sequence)):
+            move = _chess_move(sequence[ply])
+            if not board.is_legal(move):
+                return row, ply + 1
             board.push(move)
-            
-    print(f"{n} wrong")
+        previous = sequence
+    return None
+
+def validate_sequences(path, workers=None, chunk_size=SEQUENCE_CHUNK):
+    """
+    Check every sequence of a stream written by bitboard_perft_sequences
+    against python-chess, a chunk per task. At most 2 * workers chunks are
+    in memory at once, and results are taken in stream order, so the run
+    stops at the first failing sequence. Returns (checked, failure): the
+    number of sequences that passed, and None or (sequence index, failing
+    prefix as UCI moves).
+    """
+    workers = workers or os.cpu_count()
+    with open(path, "rb") as file, ProcessPoolExecutor(workers) as executor:
+        depth, fen = read_sequence_header(file)
+        pending = deque()
+        checked = 0
+        chunks = read_sequence_chunks(file, depth, chunk_size)
+        while True:
+            for chunk in itertools.islice(chunks, 2 * workers - len(pending)):
+                pending.append((chunk, executor.submit(_validate_chunk, (fen, chunk))))
+            if not pending:
+                return checked, None
+            chunk, future = pending.popleft()
+            failure = future.result()
+            if failure is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+                row, plies = failure
+                prefix = [_chess_move(code).uci() for code in chunk[row, :plies].tolist()]
+                return checked + row, (checked + row, prefix)
+            checked += len(chunk)
+
 
-    
 if __name__ == "__main__":
-    correct_nodes = [20, 400, 8902, 197281, 4865609]
-    gs = BitboardGameState()
-    for depth in range(5):
-        print(f"Depth {depth+1}: {bitboard_perft(gs, depth+1)}=={correct_nodes[depth]} nodes")
-        # with open(f"logs/moves_depth{depth+1}.txt", "w") as f:
-        #     bitboard_perft_sequences(gs, depth, f)
-        
-        # validate(depth+1)
\ No newline at end of file
+    from perft_suite import main
+    sys.exit(main())
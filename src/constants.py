@@ -27,4 +27,13 @@ LEGAL_FIRST_MOVES = [
     "b1 c3",
     "g1 f3",
     "g1 h3"
-]
\ No newline at end of file
+]
+
+# --- Bitboard layout ---
+# BitboardGameState.bb holds the twelve piece boards, indexed
+# colour * 6 + (piece type - 1), followed by the three occupancies.
+WHITE_SIDE, BLACK_SIDE = 0, 1
+WHITE_PAWNS, WHITE_KNIGHTS, WHITE_BISHOPS, WHITE_ROOKS, WHITE_QUEENS, WHITE_KING = range(6)
+BLACK_PAWNS, BLACK_KNIGHTS, BLACK_BISHOPS, BLACK_ROOKS, BLACK_QUEENS, BLACK_KING = range(6, 12)
+WHITE_OCCUPANCY, BLACK_OCCUPANCY, OCCUPIED = 12, 13, 14
+PIECE_SYMBOLS = "PNBRQKpnbrqk"
@@ -0,0 +1,146 @@
+"""
+Vectorized conversion between the mailbox GameState and BitboardGameState.
+
+Both position models are built from one compact form, the square board: an
+int8 array of 64 piece indices in bitboard square order (0 = a1), -1 for an
+empty square, with piece index colour * 6 + type - 1 as in
+BitboardGameState.board. From it
+
+    piece bitboards  np.packbits over the twelve piece masks, viewed as uint64
+    mailbox board    a lookup of the signed piece codes, ranks flipped so row 0 = rank 8
+
+and back again, with NumPy operations instead of Python loops over squares.
+The array functions accept any number of leading axes, so the same calls
+convert one position or a batch of N: (N, 64) square boards, (N, 12) piece
+bitboards, (N, 8, 8) mailbox boards.
+"""
+import numpy as np
+from numba import njit
+
+from bitboard_game import BitboardGameState
+from game import GameState
+
+PIECE_INDICES = np.arange(12, dtype=np.int8)
+
+# Piece index + 1 -> signed mailbox code (index 0 is the empty square)
+SIGNED_PIECES = np.array([0, 1, 2, 3, 4, 5, 6, -1, -2, -3, -4, -5, -6], dtype=np.int8)
+# Signed mailbox code + 6 -> piece index, -1 for empty
+PIECE_INDEX_OF_CODE = np.array([11, 10, 9, 8, 7, 6, -1, 0, 1, 2, 3, 4, 5], dtype=np.int8)
+
+
+# === Array conversions (any leading shape) ===
+
+def bitboards_from_squares(squares):
+    """(..., 64) square boards -> (..., 12) uint64 piece bitboards."""
+    squares = np.asarray(squares, dtype=np.int8)
+    masks = squares[..., None, :] == PIECE_INDICES[:, None]
+    # Little bit order puts square 0 in bit 0 of byte 0, i.e. bit 0 of a little-endian uint64
+    packed = np.packbits(masks, axis=-1, bitorder='little')
+    return packed.view('<u8')[..., 0].astype(np.uint64)
+
+def squares_from_bitboards(pieces):
+    """(..., 12) uint64 piece bitboards -> (..., 64) square boards."""
+    pieces = np.ascontiguousarray(pieces, dtype='<u8')
+    masks = np.unpackbits(pieces[..., None].view(np.uint8), axis=-1, bitorder='little').astype(bool)
+    return np.where(masks.any(axis=-2), masks.argmax(axis=-2), -1).astype(np.int8)
+
+def mailbox_from_squares(squares):
+    """(..., 64) square boards -> (..., 8, 8) signed int8 mailbox boards, row 0 = rank 8."""
+    squares = np.asarray(squares, dtype=np.int8)
+    boards = SIGNED_PIECES[squares + 1].reshape(*squares.shape[:-1], 8, 8)
+    return np.ascontiguousarray(boards[..., ::-1, :])
+
+def squares_from_mailbox(boards):
+    """(..., 8, 8) signed mailbox boards -> (..., 64) square boards."""
+    boards = np.asarray(boards, dtype=np.int8)
+    return PIECE_INDEX_OF_CODE[boards[..., ::-1, :].reshape(*boards.shape[:-2], 64) + 6]
+
+def mailbox_to_bitboards(boards):
+    """(..., 8, 8) mailbox boards -> (..., 12) piece bitboards."""
+    return bitboards_from_squares(squares_from_mailbox(boards))
+
+def bitboards_to_mailbox(pieces):
+    """(..., 12) piece bitboards -> (..., 8, 8) mailbox boards."""
+    return mailbox_from_squares(squares_from_bitboards(pieces))
+
+
+# === States from one square board ===
+
+def bitboard_state_from_squares(squares, white_to_move=True, castling_rights=(1, 1, 1, 1), en_passant_target=-1,
+                                halfmove_clock=0, fullmove_number=1, zobrist_key=None):
+    """BitboardGameState of a 64-entry square board; `en_passant_target` is a square index or -1."""
+    squares = np.asarray(squares, dtype=np.int8)
+    return BitboardGameState.from_bitboards(
+        bitboards_from_squares(squares).tolist(), squares.tolist(), white_to_move, castling_rights,
+        en_passant_target, halfmove_clock, fullmove_number, zobrist_key)
+
+def game_state_from_squares(squares, white_to_move=True, castling_rights=(1, 1, 1, 1), en_passant_target=-1,
+                            halfmove_clock=0, fullmove_number=1, zobrist_key=None):
+    """Mailbox GameState of a 64-entry square board, with the same arguments as bitboard_state_from_squares."""
+    return _game_state(mailbox_from_squares(squares), white_to_move, castling_rights, en_passant_target,
+                       halfmove_clock, fullmove_number, zobrist_key)
+
+@njit
+def _new_game_state(board, white_to_move, castling_rights, ep_row, ep_col, halfmove_clock, fullmove_number,
+                    zobrist_key):
+    # One compiled call per state: no start-position setup and no per-field boxing
+    gs = GameState(False)
+    gs.board[:, :] = board
+    gs.white_to_move = white_to_move
+    gs.castling_rights[:] = castling_rights
+    gs.en_passant_target[0] = ep_row
+    gs.en_passant_target[1] = ep_col
+    gs.halfmove_clock = halfmove_clock
+    gs.fullmove_number = fullmove_number
+    gs.zobrist_key = zobrist_key
+    return gs
+
+def _game_state(board, white_to_move, castling_rights, en_passant_target, halfmove_clock, fullmove_number,
+                zobrist_key):
+    ep = int(en_passant_target)
+    gs = _new_game_state(np.asarray(board, dtype=np.int8), bool(white_to_move),
+                         np.asarray(castling_rights, dtype=np.int8), -1 if ep == -1 else 7 - ep // 8,
+                         -1 if ep == -1 else ep % 8, halfmove_clock, fullmove_number,
+                         np.uint64(0 if zobrist_key is None else zobrist_key))
+    if zobrist_key is None:
+        gs.update_zobrist_key()
+    return gs
+
+
+# === State conversions ===
+# Both models use the same Zobrist scheme, so the key carries over unchanged
+
+def _en_passant_square(target):
+    row, col = int(target[0]), int(target[1])
+    return -1 if row == -1 else (7 - row) * 8 + col
+
+def _bitboard_state(gs, pieces, squares):
+    return BitboardGameState.from_bitboards(
+        pieces.tolist(), squares.tolist(), gs.white_to_move, gs.castling_rights.tolist(),
+        _en_passant_square(gs.en_passant_target), gs.halfmove_clock, gs.fullmove_number, int(gs.zobrist_key))
+
+def _converted_game_state(bgs, board):
+    return _game_state(board, bgs.white_to_move, bgs.castling_rights, bgs.en_passant_target,
+                       bgs.halfmove_clock, bgs.fullmove_number, bgs.zobrist_key)
+
+def to_bitboard_state(gs):
+    """BitboardGameState of a mailbox GameState (no move history)."""
+    squares = squares_from_mailbox(gs.board)
+    return _bitboard_state(gs, bitboards_from_squares(squares), squares)
+
+def to_game_state(bgs):
+    """Mailbox GameState of a BitboardGameState (no move history)."""
+    return _converted_game_state(bgs, mailbox_from_squares(np.array(bgs.board, dtype=np.int8)))
+
+def to_bitboard_states(games):
+    """BitboardGameStates of a sequence of GameStates, boards converted in one batch."""
+    squares = squares_from_mailbox(np.array([gs.board for gs in games], dtype=np.int8).reshape(-1, 8, 8))
+    pieces = bitboards_from_squares(squares)
+    return [_bitboard_state(gs, pieces[i], squares[i]) for i, gs in enumerate(games)]
+
+def to_game_states(states):
+    """GameStates of a sequence of BitboardGameStates, boards converted in one batch."""
+    boards = mailbox_from_squares(np.array([bgs.board for bgs in states], dtype=np.int8).reshape(-1, 64))
+    castling = np.array([bgs.castling_rights for bgs in states], dtype=np.int8).reshape(-1, 4)
+    return [_game_state(boards[i], bgs.white_to_move, castling[i], bgs.en_passant_target, bgs.halfmove_clock,
+                        bgs.fullmove_number, bgs.zobrist_key) for i, bgs in enumerate(states)]
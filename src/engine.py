@@ -1,7 +1,9 @@
 import numpy as np
+import engine_utils
 from evaluate_board import evaluate_board
-from engine_utils import generate_legal_moves, apply_move, undo_move
-from game import GameState
+from engine_utils import generate_legal_captures, apply_move, undo_move
+from game import GameState, KING
+from move_picker import MovePicker, KILLERS, QUIETS, STAGE_NAMES
 
 class Engine:
     """
@@ -18,6 +20,10 @@ class Engine:
         """
         self.max_depth = max_depth
         self.nodes_searched = 0
+        self.hash_moves = {}
+        self.killers = [[None, None] for _ in range(max_depth + 1)]
+        self.cutoffs_by_stage = [0] * len(STAGE_NAMES)
+        self.generator_calls_saved = 0
 
     def search(self, gs):
         """
@@ -31,6 +37,10 @@ class Engine:
         """
         best_move = None
         best_eval = -np.inf if gs.white_to_move else np.inf
+        self.hash_moves.clear()
+        self.killers = [[None, None] for _ in range(self.max_depth + 1)]
+        self.cutoffs_by_stage = [0] * len(STAGE_NAMES)
+        self.generator_calls_saved = 0
 
         for current_depth in range(1, self.max_depth + 1):
             eval_score, move = self.iterative_deepening(gs, current_depth)
@@ -40,8 +50,19 @@ class Engine:
             print(f"(Depth {current_depth}) Best Move: {self.to_standard_algebraic(best_move)}, Eval: {round(eval_score)}")
 
         print(f"Total nodes searched: {self.nodes_searched}")
+        self.print_cutoff_stats()
         return best_move
 
+    def print_cutoff_stats(self):
+        """Report where beta cutoffs happened and how much move generation they skipped."""
+        cutoffs = sum(self.cutoffs_by_stage)
+        if not cutoffs:
+            return
+        by_stage = ", ".join(f"{name} {100 * count / cutoffs:.0f}%"
+                             for name, count in zip(STAGE_NAMES, self.cutoffs_by_stage) if count)
+        print(f"Cutoff nodes: {cutoffs} ({by_stage})")
+        print(f"Generator calls saved per cutoff node: {self.generator_calls_saved / cutoffs:.2f} of 2")
+
     def iterative_deepening(self, gs, depth):
         """
         Search the position to a specified depth.
@@ -59,9 +80,10 @@ class Engine:
         eval_score, best_move = self._minimax(gs, depth, -np.inf, np.inf, maximizing)
         return eval_score, best_move
 
-    def _minimax(self, gs, depth, alpha, beta, maximizing_player):
+    def _minimax(self, gs, depth, alpha, beta, maximizing_player, ply=0):
         """
-        Minimax with alpha-beta pruning.
+        Minimax with alpha-beta pruning. Moves come from a staged MovePicker,
+        so a cutoff on the hash move or a capture never generates quiet moves.
 
         Args:
             gs (GameState): Current board state.
@@ -69,6 +91,7 @@ class Engine:
             alpha (float): Alpha value for pruning.
             beta (float): Beta value for pruning.
             maximizing_player (bool): True if maximizing, False if minimizing.
+            ply (int): Distance from the root, used to index killer moves.
 
         Returns:
             (eval_score, best_move) (tuple): Best evaluation and corresponding move.
@@ -78,56 +101,60 @@ class Engine:
         if depth == 0:
             return self.quiescence(gs, alpha, beta, maximizing_player), None
 
-        moves = generate_legal_moves(gs)
-        if not moves:
-            return evaluate_board(gs), None
-
-        moves = self.order_moves(gs, moves)
-
+        key = gs.zobrist_key
+        picker = MovePicker(gs, self.hash_moves.get(key), self.killers[ply], movegen=engine_utils)
         best_move = None
+        best_eval = -np.inf if maximizing_player else np.inf
 
-        if maximizing_player:
-            max_eval = -np.inf
-            for move in moves:
-                move_info = apply_move(gs, move)
-                eval_score, _ = self._minimax(gs, depth - 1, alpha, beta, False)
-                undo_move(gs, move, *move_info)
-
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_move = move
+        for move in picker:
+            move_info = apply_move(gs, move)
+            eval_score, _ = self._minimax(gs, depth - 1, alpha, beta, not maximizing_player, ply + 1)
+            undo_move(gs, move, *move_info)
 
+            if maximizing_player:
+                if best_move is None or eval_score > best_eval:
+                    best_eval = eval_score
+                    best_move = move
                 alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval, best_move
-
-        else:
-            min_eval = np.inf
-            for move in moves:
-                move_info = apply_move(gs, move)
-                eval_score, _ = self._minimax(gs, depth - 1, alpha, beta, True)
-                undo_move(gs, move, *move_info)
-
-                if eval_score < min_eval:
-                    min_eval = eval_score
+            else:
+                if best_move is None or eval_score < best_eval:
+                    best_eval = eval_score
                     best_move = move
-
                 beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval, best_move
 
-    def quiescence(self, gs, alpha, beta, maximizing_player):
+            if beta <= alpha:
+                self.record_cutoff(picker, move, ply)
+                break
+
+        if best_move is None:
+            return evaluate_board(gs), None
+
+        self.hash_moves[key] = best_move
+        return best_eval, best_move
+
+    def record_cutoff(self, picker, move, ply):
+        """Update killer moves and cutoff statistics after `move` caused a beta cutoff."""
+        self.cutoffs_by_stage[picker.stage] += 1
+        self.generator_calls_saved += picker.generator_calls_saved
+
+        if picker.stage in (KILLERS, QUIETS):
+            killers = self.killers[ply]
+            if move != killers[0]:
+                killers[1] = killers[0]
+                killers[0] = move
+
+    def quiescence(self, gs, alpha, beta, maximizing_player, qply=0):
         """
         Quiescence search: extends the search on capture moves only,
-        preventing horizon effect on tactical positions.
+        preventing horizon effect on tactical positions. The first
+        quiescence ply also tries quiet checking moves.
 
         Args:
             gs (GameState): Current board state.
             alpha (float): Alpha value for pruning.
             beta (float): Beta value for pruning.
             maximizing_player (bool): True if maximizing, False if minimizing.
+            qply (int): Depth into the quiescence search.
 
         Returns:
             (float): Best evaluation score.
@@ -145,13 +172,13 @@ class Engine:
             if stand_pat < beta:
                 beta = stand_pat
 
-        moves = self.generate_capture_moves(gs, include_checks=True)
+        moves = self.generate_capture_moves(gs, include_checks=qply == 0)
 
         moves = self.order_moves(gs, moves)
 
         for move in moves:
             move_info = apply_move(gs, move)
-            eval_score = -self.quiescence(gs, -beta, -alpha, not maximizing_player)
+            eval_score = self.quiescence(gs, alpha, beta, not maximizing_player, qply + 1)
             undo_move(gs, move, *move_info)
 
             if maximizing_player:
@@ -167,54 +194,19 @@ class Engine:
 
         return alpha if maximizing_player else beta
 
-    def generate_capture_moves(self, gs):
+    def generate_capture_moves(self, gs, include_checks=False):
         """
         Generate only capture moves for quiescence search.
 
         Args:
             gs (GameState): Current board state.
+            include_checks (bool): Also generate quiet moves that give check.
 
         Returns:
-            (list): List of capture moves.
+            (list): List of captures, en passant captures and promotions.
         """
-        moves = generate_legal_moves(gs)
-        capture_moves = []
-        king_pos = self.find_king(gs)
-
-        for move in moves:
-            from_r, from_c, to_r, to_c, promo = move
-            captured = gs.board[to_r, to_c]
-            if captured != 0:
-                capture_moves.append(move)
-            elif include_checks and self.is_check(gs, move, king_pos):
-                capture_moves.append(move)
-
-        return capture_moves
-
-    def order_moves(self, gs, moves):
-        """
-        Heuristically order moves: prefer captures and promotions first.
-
-        Args:
-            gs (GameState): Current board state.
-            moves (list): List of possible moves.
+        return generate_legal_captures(gs, include_checks=include_checks)
 
-        Returns:
-            (list): Moves ordered for better alpha-beta pruning.
-        """
-        scored_moves = []
-        for move in moves:
-            from_r, from_c, to_r, to_c, promo = move
-            captured = gs.board[to_r, to_c]
-            score = 0
-            if captured != 0:
-                score += 1000 + abs(captured)
-            if promo != 0:
-                score += 900 + promo
-            scored_moves.append((score, move))
-        scored_moves.sort(reverse=True)
-        return [move for score, move in scored_moves]
-    
     def to_standard_algebraic(self, move):
         """
         Convert a move tuple into human-readable chess notation (e.g., e2e4).
@@ -232,43 +224,43 @@ class Engine:
         return f"{from_square} {to_square}"
     
     def order_moves(self, gs, moves):
-    """Order moves: captures > promotions > checks > others."""
-    scored_moves = []
-    king_pos = self.find_king(gs)
-
-    for move in moves:
-        from_r, from_c, to_r, to_c, promo = move
-        captured = gs.board[to_r, to_c]
-        score = 0
-
-        if captured != 0:
-            score += 10_000 + abs(captured) - abs(gs.board[from_r, from_c])  # MVV-LVA
-        elif promo != 0:
-            score += 9_000 + promo
-        elif self.is_check(gs, move, king_pos):
-            score += 8_000
-        else:
-            score += 0  # quiet move
-
-        scored_moves.append((score, move))
-
-    scored_moves.sort(reverse=True)
-    return [move for score, move in scored_moves]
-
-def find_king(self, gs):
-    """Find the position of the opponent's king for faster is_check detection."""
-    king = KING if not gs.white_to_move else -KING
-    for r in range(8):
-        for c in range(8):
-            if gs.board[r, c] == king:
-                return (r, c)
-    return (-1, -1)
-
-def is_check(self, gs, move, king_pos):
-    """Rough check detection: does this move attack opponent king square?"""
-    _, _, to_r, to_c, _ = move
-    return (to_r, to_c) == king_pos
-        
+        """Order moves: captures > promotions > checks > others."""
+        scored_moves = []
+        king_pos = self.find_king(gs)
+
+        for move in moves:
+            from_r, from_c, to_r, to_c, promo = move
+            captured = int(gs.board[to_r, to_c])
+            score = 0
+
+            if captured != 0:
+                score += 10_000 + abs(captured) - abs(int(gs.board[from_r, from_c]))  # MVV-LVA
+            elif promo != 0:
+                score += 9_000 + promo
+            elif self.is_check(gs, move, king_pos):
+                score += 8_000
+            else:
+                score += 0  # quiet move
+
+            scored_moves.append((score, move))
+
+        scored_moves.sort(reverse=True)
+        return [move for score, move in scored_moves]
+
+    def find_king(self, gs):
+        """Find the position of the opponent's king for faster is_check detection."""
+        king = KING if not gs.white_to_move else -KING
+        for r in range(8):
+            for c in range(8):
+                if gs.board[r, c] == king:
+                    return (r, c)
+        return (-1, -1)
+
+    def is_check(self, gs, move, king_pos):
+        """Rough check detection: does this move attack opponent king square?"""
+        _, _, to_r, to_c, _ = move
+        return (to_r, to_c) == king_pos
+
 
 # --- Example Runner ---
 if __name__ == "__main__":
@@ -0,0 +1,421 @@
+"""
+Compiled move generation, make and undo for the mailbox GameState.
+
+Moves are (from_row, from_col, to_row, to_col, promotion) with row 0 = rank 8
+and the promotion given as an unsigned piece type (0 for none). The
+generators write legal moves straight into an np.int8 (MAX_MOVES, 5) buffer:
+each pseudo-legal move is played on the board in place, the king is tested
+and the board is put back, so no GameState is copied.
+
+apply_move returns a small undo tuple (captured piece, castling rights as
+bits, en passant target, halfmove clock, Zobrist key) and undo_move(gs, move,
+*undo) restores the position from it. The Zobrist key is updated
+incrementally.
+"""
+import numpy as np
+from numba import njit
+
+from game import EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from move_encoding import MAX_MOVES
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EP_FILE_KEYS, mailbox_piece_index, mailbox_square
+
+# --- Piece steps as (row, col) deltas ---
+KNIGHT_MOVES = np.array([(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)], dtype=np.int64)
+BISHOP_MOVES = np.array([(-1, -1), (-1, 1), (1, -1), (1, 1)], dtype=np.int64)
+ROOK_MOVES = np.array([(-1, 0), (1, 0), (0, -1), (0, 1)], dtype=np.int64)
+QUEEN_MOVES = np.concatenate((BISHOP_MOVES, ROOK_MOVES))
+KING_MOVES = QUEEN_MOVES.copy()
+
+PROMOTION_PIECES = np.array([QUEEN, ROOK, BISHOP, KNIGHT], dtype=np.int8)
+MOVE_FIELDS = 5
+
+# --- Generation stages ---
+ALL_MOVES, CAPTURES, QUIETS = 0, 1, 2
+
+# --- Castling, indexed like GameState.castling_rights [wK, wQ, bK, bQ] ---
+# king row, rook column, king target column, rook target column
+CASTLING_MOVES = np.array([(7, 7, 6, 5), (7, 0, 2, 3), (0, 7, 6, 5), (0, 0, 2, 3)], dtype=np.int64)
+
+# Rights (as bits 1 << index) kept when a move starts or ends on each square
+CASTLING_MASK = np.full((8, 8), 15, dtype=np.int64)
+CASTLING_MASK[7, 4] = 15 & ~(1 | 2)
+CASTLING_MASK[7, 7] = 15 & ~1
+CASTLING_MASK[7, 0] = 15 & ~2
+CASTLING_MASK[0, 4] = 15 & ~(4 | 8)
+CASTLING_MASK[0, 7] = 15 & ~4
+CASTLING_MASK[0, 0] = 15 & ~8
+
+
+# === Attack tests ===
+
+@njit
+def is_square_attacked(board, row, col, by_white):
+    """Whether (row, col) is attacked by a piece of side `by_white`."""
+    sign = 1 if by_white else -1
+
+    # White pawns attack towards row 0, so a white attacker stands one row further down
+    pawn_row = row + 1 if by_white else row - 1
+    if 0 <= pawn_row < 8:
+        for dc in (-1, 1):
+            c = col + dc
+            if 0 <= c < 8 and board[pawn_row, c] == sign * PAWN:
+                return True
+
+    for i in range(KNIGHT_MOVES.shape[0]):
+        r, c = row + KNIGHT_MOVES[i, 0], col + KNIGHT_MOVES[i, 1]
+        if 0 <= r < 8 and 0 <= c < 8 and board[r, c] == sign * KNIGHT:
+            return True
+
+    for i in range(QUEEN_MOVES.shape[0]):
+        dr, dc = QUEEN_MOVES[i, 0], QUEEN_MOVES[i, 1]
+        slider = BISHOP if dr != 0 and dc != 0 else ROOK
+        r, c = row + dr, col + dc
+        distance = 1
+        while 0 <= r < 8 and 0 <= c < 8:
+            piece = board[r, c] * sign
+            if piece != EMPTY:
+                if piece == slider or piece == QUEEN or (piece == KING and distance == 1):
+                    return True
+                break
+            r += dr
+            c += dc
+            distance += 1
+    return False
+
+@njit
+def find_king(board, is_white):
+    king = KING if is_white else -KING
+    for r in range(8):
+        for c in range(8):
+            if board[r, c] == king:
+                return r, c
+    return -1, -1
+
+@njit
+def in_check(gs):
+    """Whether the side to move is in check."""
+    row, col = find_king(gs.board, gs.white_to_move)
+    return row != -1 and is_square_attacked(gs.board, row, col, not gs.white_to_move)
+
+
+# === Legal move generation ===
+
+@njit
+def _add_move(buf, n, board, fr, fc, tr, tc, promo, en_passant, stage, include_checks, kings, is_white):
+    """
+    Append a pseudo-legal move to buf if it belongs to `stage` and does not
+    leave our king attacked. The move is played on the board and taken back.
+    """
+    capture = board[tr, tc] != EMPTY or en_passant or promo != 0
+    if stage == QUIETS and capture:
+        return n
+    if stage == CAPTURES and not capture and not include_checks:
+        return n
+
+    moving, captured = board[fr, fc], board[tr, tc]
+    board[tr, tc] = moving
+    board[fr, fc] = EMPTY
+    passed = EMPTY
+    if en_passant:
+        passed = board[fr, tc]
+        board[fr, tc] = EMPTY
+
+    king_row, king_col, enemy_row, enemy_col = kings
+    if abs(moving) == KING:
+        king_row, king_col = tr, tc
+    legal = king_row == -1 or not is_square_attacked(board, king_row, king_col, not is_white)
+    if legal and stage == CAPTURES and not capture:
+        # Quiet move: only wanted if it checks the enemy king
+        legal = enemy_row != -1 and is_square_attacked(board, enemy_row, enemy_col, is_white)
+
+    board[fr, fc] = moving
+    board[tr, tc] = captured
+    if en_passant:
+        board[fr, tc] = passed
+
+    if legal:
+        buf[n, 0] = fr
+        buf[n, 1] = fc
+        buf[n, 2] = tr
+        buf[n, 3] = tc
+        buf[n, 4] = promo
+        n += 1
+    return n
+
+@njit
+def _add_pawn_move(buf, n, board, fr, fc, tr, tc, en_passant, stage, include_checks, kings, is_white):
+    if tr == 0 or tr == 7:
+        for promo in PROMOTION_PIECES:
+            n = _add_move(buf, n, board, fr, fc, tr, tc, promo, False, stage, include_checks, kings, is_white)
+        return n
+    return _add_move(buf, n, board, fr, fc, tr, tc, 0, en_passant, stage, include_checks, kings, is_white)
+
+@njit
+def _add_piece_moves(buf, n, board, r, c, piece, sign, ep_row, ep_col, stage, include_checks, kings, is_white):
+    """Append the legal moves of the piece on (r, c), `piece` being its unsigned type; castling aside."""
+    if piece == PAWN:
+        forward = -sign
+        tr = r + forward
+        if not 0 <= tr < 8:
+            return n
+        if board[tr, c] == EMPTY:
+            n = _add_pawn_move(buf, n, board, r, c, tr, c, False, stage, include_checks, kings, is_white)
+            if r == (6 if is_white else 1) and board[tr + forward, c] == EMPTY:
+                n = _add_move(buf, n, board, r, c, tr + forward, c, 0, False,
+                              stage, include_checks, kings, is_white)
+        for dc in (-1, 1):
+            tc = c + dc
+            if not 0 <= tc < 8:
+                continue
+            if board[tr, tc] * sign < 0:
+                n = _add_pawn_move(buf, n, board, r, c, tr, tc, False, stage, include_checks, kings, is_white)
+            elif tr == ep_row and tc == ep_col and board[tr, tc] == EMPTY:
+                n = _add_pawn_move(buf, n, board, r, c, tr, tc, True, stage, include_checks, kings, is_white)
+
+    elif piece == KNIGHT or piece == KING:
+        steps = KNIGHT_MOVES if piece == KNIGHT else KING_MOVES
+        for i in range(steps.shape[0]):
+            tr, tc = r + steps[i, 0], c + steps[i, 1]
+            if 0 <= tr < 8 and 0 <= tc < 8 and board[tr, tc] * sign <= 0:
+                n = _add_move(buf, n, board, r, c, tr, tc, 0, False, stage, include_checks, kings, is_white)
+
+    else:
+        directions = BISHOP_MOVES if piece == BISHOP else ROOK_MOVES if piece == ROOK else QUEEN_MOVES
+        for i in range(directions.shape[0]):
+            dr, dc = directions[i, 0], directions[i, 1]
+            tr, tc = r + dr, c + dc
+            while 0 <= tr < 8 and 0 <= tc < 8:
+                target = board[tr, tc] * sign
+                if target > 0:
+                    break
+                n = _add_move(buf, n, board, r, c, tr, tc, 0, False, stage, include_checks, kings, is_white)
+                if target < 0:
+                    break
+                tr += dr
+                tc += dc
+    return n
+
+@njit
+def _kings(board, is_white):
+    king_row, king_col = find_king(board, is_white)
+    enemy_row, enemy_col = find_king(board, not is_white)
+    return (king_row, king_col, enemy_row, enemy_col)
+
+@njit
+def _generate_moves(gs, buf, stage, include_checks):
+    board = gs.board
+    is_white = gs.white_to_move
+    sign = 1 if is_white else -1
+    kings = _kings(board, is_white)
+    ep_row, ep_col = gs.en_passant_target[0], gs.en_passant_target[1]
+    n = 0
+
+    for r in range(8):
+        for c in range(8):
+            piece = board[r, c] * sign
+            if piece > 0:
+                n = _add_piece_moves(buf, n, board, r, c, piece, sign, ep_row, ep_col,
+                                     stage, include_checks, kings, is_white)
+
+    if stage != CAPTURES:
+        n = _add_castling_moves(gs, buf, n, sign, kings[0], kings[1])
+    return n
+
+@njit
+def _add_castling_moves(gs, buf, n, sign, king_row, king_col):
+    board = gs.board
+    first = 0 if sign == 1 else 2
+    for right in range(first, first + 2):
+        if not gs.castling_rights[right]:
+            continue
+        row, rook_col, king_to, rook_to = CASTLING_MOVES[right]
+        if king_row != row or king_col != 4 or board[row, rook_col] != sign * ROOK:
+            continue
+        step = 1 if rook_col > 4 else -1
+        clear = True
+        for col in range(4 + step, rook_col, step):
+            if board[row, col] != EMPTY:
+                clear = False
+                break
+        if not clear:
+            continue
+        # The king may not castle out of, through or into check
+        for col in (4, 4 + step, king_to):
+            if is_square_attacked(board, row, col, sign < 0):
+                clear = False
+                break
+        if clear:
+            buf[n, 0] = row
+            buf[n, 1] = 4
+            buf[n, 2] = row
+            buf[n, 3] = king_to
+            buf[n, 4] = 0
+            n += 1
+    return n
+
+@njit
+def _move_list(buf, count):
+    return [(buf[i, 0], buf[i, 1], buf[i, 2], buf[i, 3], buf[i, 4]) for i in range(count)]
+
+@njit
+def generate_legal_moves_into(gs, buf):
+    """
+    Write the legal moves of `gs` into `buf` (np.int8, shape (MAX_MOVES, 5),
+    reused across plies) and return how many were written.
+    """
+    return _generate_moves(gs, buf, ALL_MOVES, False)
+
+@njit
+def generate_legal_moves(gs):
+    """Legal moves as (from_row, from_col, to_row, to_col, promotion) tuples."""
+    buf = np.empty((MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    return _move_list(buf, _generate_moves(gs, buf, ALL_MOVES, False))
+
+@njit
+def generate_legal_captures(gs, include_checks=False):
+    """
+    Legal captures, en passant captures and promotions. With `include_checks`,
+    quiet moves that give check (castling excepted) are included as well.
+    """
+    buf = np.empty((MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    return _move_list(buf, _generate_moves(gs, buf, CAPTURES, include_checks))
+
+@njit
+def generate_legal_quiets(gs):
+    """Legal moves that are neither captures nor promotions, castling included."""
+    buf = np.empty((MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    return _move_list(buf, _generate_moves(gs, buf, QUIETS, False))
+
+@njit
+def is_legal_move(gs, move):
+    """
+    Whether a move taken from another node (a hash or killer move) is legal
+    here. Only the moves of the piece on its from-square are generated.
+    """
+    board = gs.board
+    is_white = gs.white_to_move
+    fr, fc = move[0], move[1]
+    sign = 1 if is_white else -1
+    piece = board[fr, fc] * sign
+    if piece <= 0:
+        return False
+    kings = _kings(board, is_white)
+    buf = np.empty((MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    n = _add_piece_moves(buf, 0, board, fr, fc, piece, sign, gs.en_passant_target[0], gs.en_passant_target[1],
+                         ALL_MOVES, False, kings, is_white)
+    if piece == KING:
+        n = _add_castling_moves(gs, buf, n, sign, kings[0], kings[1])
+    for i in range(n):
+        if buf[i, 0] == fr and buf[i, 1] == fc and buf[i, 2] == move[2] \
+                and buf[i, 3] == move[3] and buf[i, 4] == move[4]:
+            return True
+    return False
+
+@njit
+def capture_score(gs, move):
+    """MVV-LVA order key for a capture or promotion: most valuable victim, then least valuable attacker."""
+    victim = abs(gs.board[move[2], move[3]])
+    score = 6 - abs(gs.board[move[0], move[1]]) + move[4] * 8
+    if victim != EMPTY:
+        score += victim * 8
+    elif move[4] == 0:
+        score += PAWN * 8  # En passant
+    return score
+
+
+# === Make / undo ===
+
+@njit
+def _piece_key(piece, row, col):
+    return PIECE_KEYS[mailbox_piece_index(piece), mailbox_square(row, col)]
+
+@njit
+def apply_move(gs, move):
+    """
+    Play `move` on `gs` and return the undo tuple (captured, castling bits,
+    en passant row, en passant col, halfmove clock, Zobrist key).
+    """
+    board = gs.board
+    fr, fc, tr, tc, promo = move[0], move[1], move[2], move[3], move[4]
+    piece, captured = board[fr, fc], board[tr, tc]
+    sign = 1 if piece > 0 else -1
+
+    rights = 0
+    for i in range(4):
+        rights |= gs.castling_rights[i] << i
+    # The key is stored as int64 so the tuple can pass through Python (numba reads Python ints as int64)
+    undo = (captured, rights, gs.en_passant_target[0], gs.en_passant_target[1], gs.halfmove_clock,
+            np.int64(gs.zobrist_key))
+
+    key = gs.zobrist_key ^ _piece_key(piece, fr, fc)
+    if captured != EMPTY:
+        key ^= _piece_key(captured, tr, tc)
+    elif abs(piece) == PAWN and fc != tc:
+        # En passant: the captured pawn stands beside the moving one
+        key ^= _piece_key(board[fr, tc], fr, tc)
+        board[fr, tc] = EMPTY
+
+    placed = sign * promo if promo != 0 else piece
+    board[tr, tc] = placed
+    board[fr, fc] = EMPTY
+    key ^= _piece_key(placed, tr, tc)
+
+    if abs(piece) == KING and abs(tc - fc) == 2:
+        rook_from, rook_to = (7, 5) if tc > fc else (0, 3)
+        rook = board[tr, rook_from]
+        board[tr, rook_to] = rook
+        board[tr, rook_from] = EMPTY
+        key ^= _piece_key(rook, tr, rook_from) ^ _piece_key(rook, tr, rook_to)
+
+    if gs.en_passant_target[0] != -1:
+        key ^= EP_FILE_KEYS[gs.en_passant_target[1]]
+    if abs(piece) == PAWN and abs(tr - fr) == 2:
+        gs.en_passant_target[0] = (fr + tr) // 2
+        gs.en_passant_target[1] = fc
+        key ^= EP_FILE_KEYS[fc]
+    else:
+        gs.en_passant_target[0] = -1
+        gs.en_passant_target[1] = -1
+
+    kept = CASTLING_MASK[fr, fc] & CASTLING_MASK[tr, tc]
+    for i in range(4):
+        if gs.castling_rights[i] and not (kept >> i) & 1:
+            gs.castling_rights[i] = 0
+            key ^= CASTLING_KEYS[i]
+
+    if abs(piece) == PAWN or captured != EMPTY:
+        gs.halfmove_clock = 0
+    else:
+        gs.halfmove_clock += 1
+
+    gs.zobrist_key = key
+    gs.switch_turn()
+    return undo
+
+@njit
+def undo_move(gs, move, captured, rights, ep_row, ep_col, halfmove_clock, zobrist_key):
+    """Take back `move` using the tuple apply_move returned for it."""
+    board = gs.board
+    fr, fc, tr, tc, promo = move[0], move[1], move[2], move[3], move[4]
+    piece = board[tr, tc]
+    if promo != 0:
+        piece = PAWN if piece > 0 else -PAWN
+    board[fr, fc] = piece
+    board[tr, tc] = captured
+
+    if abs(piece) == PAWN and fc != tc and captured == EMPTY:
+        board[fr, tc] = -piece
+    elif abs(piece) == KING and abs(tc - fc) == 2:
+        rook_from, rook_to = (7, 5) if tc > fc else (0, 3)
+        board[tr, rook_from] = board[tr, rook_to]
+        board[tr, rook_to] = EMPTY
+
+    for i in range(4):
+        gs.castling_rights[i] = (rights >> i) & 1
+    gs.en_passant_target[0] = ep_row
+    gs.en_passant_target[1] = ep_col
+    gs.halfmove_clock = halfmove_clock
+    gs.zobrist_key = np.uint64(zobrist_key)
+    gs.white_to_move = not gs.white_to_move
+    if not gs.white_to_move:
+        gs.fullmove_number -= 1
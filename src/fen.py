@@ -0,0 +1,179 @@
+"""
+FEN parsing and generation for GameState and BitboardGameState, and a bulk
+loader for FEN/EPD files.
+
+The bulk loader never builds a state object. Per chunk of lines, piece
+placements are expanded to 64 characters with one str.translate, joined
+and read as a single uint8 array, mapped to square boards and packed into
+bitboards with convert.bitboards_from_squares; the Zobrist keys are XOR
+reductions over the key tables. Only side, castling, en passant and clocks
+are split per line in Python. Chunks come out as POSITION_DTYPE record
+arrays (the binary form of bitboard_game), ready for decode_positions,
+batch_attacks or writing to disk.
+
+Usage: python fen.py FILE [chunk_size]   (reports positions per second)
+"""
+import itertools
+import sys
+import time
+
+import numpy as np
+
+from bitboard_game import BitboardGameState, POSITION_DTYPE
+from constants import PIECE_SYMBOLS
+from convert import bitboards_from_squares, game_state_from_squares, squares_from_mailbox
+from zobrist import PIECE_KEYS, CASTLING_KEYS, EP_FILE_KEYS, SIDE_KEY
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+CASTLING_SYMBOLS = "KQkq"
+CHUNK_SIZE = 65536
+
+# Digits expand to that many empty squares ('.'), rank separators disappear
+_EXPAND = str.maketrans({**{str(n): "." * n for n in range(1, 9)}, "/": None})
+# Placement character code -> piece index, -1 for '.', -2 for anything else
+_PIECE_OF_BYTE = np.full(256, -2, dtype=np.int8)
+_PIECE_OF_BYTE[ord(".")] = -1
+for _index, _symbol in enumerate(PIECE_SYMBOLS):
+    _PIECE_OF_BYTE[ord(_symbol)] = _index
+
+# Zobrist key of every castling rights combination (bit i = right i)
+_CASTLING_COMBO_KEYS = np.zeros(16, dtype=np.uint64)
+for _rights in range(16):
+    for _i in range(4):
+        if _rights & (1 << _i):
+            _CASTLING_COMBO_KEYS[_rights] ^= CASTLING_KEYS[_i]
+
+
+# === Single positions ===
+
+def _square_index(name):
+    return (int(name[1]) - 1) * 8 + ord(name[0]) - ord('a')
+
+def _square_name(square):
+    return "abcdefgh"[square % 8] + str(square // 8 + 1)
+
+def _placement_squares(placements):
+    """Square boards (N, 64) of N placement fields, a1 = square 0."""
+    expanded = "".join(placement.translate(_EXPAND) for placement in placements)
+    if len(expanded) != 64 * len(placements):
+        bad = next(placement for placement in placements if len(placement.translate(_EXPAND)) != 64)
+        raise ValueError(f"piece placement {bad!r} does not cover 64 squares")
+    codes = _PIECE_OF_BYTE[np.frombuffer(expanded.encode("ascii"), dtype=np.uint8)]
+    if (codes == -2).any():
+        raise ValueError("unknown piece symbol in piece placement")
+    # FEN lists rank 8 first; flip the ranks so square 0 is a1
+    return codes.reshape(-1, 8, 8)[:, ::-1, :].reshape(-1, 64)
+
+def parse_fen(fen):
+    """
+    Split a FEN (or EPD: clocks optional) into (squares, white_to_move,
+    castling_rights, en_passant_target, halfmove_clock, fullmove_number),
+    with the en passant target as a square index or -1.
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"expected at least 4 fields in {fen!r}")
+    placement, side, castling, ep = fields[:4]
+    if side not in ("w", "b"):
+        raise ValueError(f"bad side to move {side!r}")
+    halfmove, fullmove = 0, 1
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        halfmove, fullmove = int(fields[4]), int(fields[5])
+    return (_placement_squares([placement])[0], side == "w", [int(c in castling) for c in CASTLING_SYMBOLS],
+            -1 if ep == "-" else _square_index(ep), halfmove, fullmove)
+
+def bitboard_state_from_fen(fen):
+    squares, white_to_move, castling, ep, halfmove, fullmove = parse_fen(fen)
+    return BitboardGameState.from_bitboards(bitboards_from_squares(squares).tolist(), squares.tolist(),
+                                            white_to_move, castling, ep, halfmove, fullmove)
+
+def game_state_from_fen(fen):
+    return game_state_from_squares(*parse_fen(fen))
+
+def format_fen(squares, white_to_move, castling_rights, en_passant_target, halfmove_clock, fullmove_number):
+    """FEN of a 64-entry square board and the other fields, as returned by parse_fen."""
+    ranks = []
+    for rank in range(7, -1, -1):
+        row, empty = "", 0
+        for piece in squares[rank * 8:rank * 8 + 8]:
+            if piece == -1:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            row += PIECE_SYMBOLS[piece]
+        ranks.append(row + (str(empty) if empty else ""))
+    castling = "".join(symbol for symbol, right in zip(CASTLING_SYMBOLS, castling_rights) if right) or "-"
+    ep = "-" if en_passant_target == -1 else _square_name(en_passant_target)
+    return f"{'/'.join(ranks)} {'w' if white_to_move else 'b'} {castling} {ep} {halfmove_clock} {fullmove_number}"
+
+def to_fen(gs):
+    """FEN of a BitboardGameState or a mailbox GameState."""
+    if isinstance(gs, BitboardGameState):
+        return format_fen(gs.board, gs.white_to_move, gs.castling_rights, gs.en_passant_target,
+                          gs.halfmove_clock, gs.fullmove_number)
+    row, col = int(gs.en_passant_target[0]), int(gs.en_passant_target[1])
+    return format_fen(squares_from_mailbox(gs.board).tolist(), gs.white_to_move, gs.castling_rights.tolist(),
+                      -1 if row == -1 else (7 - row) * 8 + col, gs.halfmove_clock, gs.fullmove_number)
+
+
+# === Bulk loading ===
+
+def _zobrist_keys(squares, records):
+    occupied = squares >= 0
+    keys = np.where(occupied, PIECE_KEYS[np.where(occupied, squares, 0), np.arange(64)], np.uint64(0))
+    keys = np.bitwise_xor.reduce(keys, axis=1) ^ _CASTLING_COMBO_KEYS[records['castling']]
+    ep = records['en_passant_target']
+    keys ^= np.where(ep >= 0, EP_FILE_KEYS[ep % 8], np.uint64(0))
+    keys ^= np.where(records['white_to_move'] == 0, SIDE_KEY, np.uint64(0))
+    return keys
+
+def fens_to_records(lines):
+    """POSITION_DTYPE records of a list of FEN or EPD lines."""
+    records = np.zeros(len(lines), dtype=POSITION_DTYPE)
+    fields = [line.split() for line in lines]
+    if any(len(f) < 4 for f in fields):
+        raise ValueError("every line needs at least 4 FEN fields")
+    bad_sides = {f[1] for f in fields} - {"w", "b"}
+    if bad_sides:
+        raise ValueError(f"bad side to move {sorted(bad_sides)[0]!r}")
+    squares = _placement_squares([f[0] for f in fields])
+    records['pieces'] = bitboards_from_squares(squares)
+    records['white_to_move'] = [f[1] == "w" for f in fields]
+    records['castling'] = [sum(1 << i for i, symbol in enumerate(CASTLING_SYMBOLS) if symbol in f[2]) for f in fields]
+    records['en_passant_target'] = [-1 if f[3] == "-" else _square_index(f[3]) for f in fields]
+    clocks = [(int(f[4]), int(f[5])) if len(f) >= 6 and f[4].isdigit() and f[5].isdigit() else (0, 1)
+              for f in fields]
+    records['halfmove_clock'] = [halfmove for halfmove, _ in clocks]
+    records['fullmove_number'] = [fullmove for _, fullmove in clocks]
+    records['zobrist_key'] = _zobrist_keys(squares, records)
+    return records
+
+def load_fens(path, chunk_size=CHUNK_SIZE):
+    """
+    Stream a FEN/EPD file as POSITION_DTYPE record arrays of up to
+    `chunk_size` positions. Blank lines and lines starting with '#' are skipped.
+    """
+    with open(path) as file:
+        lines = (line for line in file if line.strip() and not line.startswith("#"))
+        while True:
+            chunk = list(itertools.islice(lines, chunk_size))
+            if not chunk:
+                return
+            yield fens_to_records(chunk)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path, chunk_size = argv[0], int(argv[1]) if len(argv) > 1 else CHUNK_SIZE
+    start = time.perf_counter()
+    positions = 0
+    for records in load_fens(path, chunk_size):
+        positions += len(records)
+    elapsed = time.perf_counter() - start
+    print(f"{positions} positions in {elapsed:.2f}s: {positions / elapsed:,.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
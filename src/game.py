@@ -1,7 +1,9 @@
 import numpy as np
-from numba import int8, boolean, int16
+from numba import int8, boolean, int16, uint64
 from numba.experimental import jitclass
 
+from zobrist import mailbox_key, SIDE_KEY
+
 # --- Constants ---
 EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 0, 1, 2, 3, 4, 5, 6
 WHITE, BLACK = 1, -1
@@ -24,20 +26,24 @@ spec = [
     ('en_passant_target', int8[:]),
     ('castling_rights', int8[:]),  # 4 flags: w_kingside, w_queenside, b_kingside, b_queenside
     ('halfmove_clock', int16),
-    ('fullmove_number', int16)
+    ('fullmove_number', int16),
+    ('zobrist_key', uint64)
 ]
 
 
 @jitclass(spec)
 class GameState:
-    def __init__(self):
+    def __init__(self, reset=True):
+        """The start position; with reset=False an empty board for the caller to fill (key left at 0)."""
         self.board = np.zeros((8,8), dtype=np.int8)
         self.white_to_move = True
         self.en_passant_target = np.array([-1, -1], dtype=np.int8)
         self.castling_rights = np.ones(4, dtype=np.int8)
         self.halfmove_clock = 0
         self.fullmove_number = 1
-        self.reset()
+        self.zobrist_key = 0
+        if reset:
+            self.reset()
 
     def reset(self):
         for r in range(8):
@@ -49,8 +55,14 @@ class GameState:
         self.castling_rights[:] = 1
         self.halfmove_clock = 0
         self.fullmove_number = 1
+        self.update_zobrist_key()
+
+    def update_zobrist_key(self):
+        """Recompute the Zobrist key from scratch (after editing the board directly)."""
+        self.zobrist_key = mailbox_key(self.board, self.white_to_move, self.castling_rights, self.en_passant_target)
 
     def switch_turn(self):
         self.white_to_move = not self.white_to_move
+        self.zobrist_key ^= SIDE_KEY
         if self.white_to_move:
             self.fullmove_number += 1
\ No newline at end of file
@@ -2,10 +2,13 @@ import numpy as np
 from numba import njit
 
 from bitboard_nomagic import (
-    square_mask, knight_attacks, king_attacks, pawn_attacks
+    knight_attacks, king_attacks, pawn_attacks
 )
-from bitboard_magic import bishop_attacks, rook_attacks, queen_attacks
-from constants import KNIGHT, BISHOP, ROOK, QUEEN
+from slider_attacks import bishop_attacks, rook_attacks, queen_attacks
+from bitboard_game import FULL_BOARD
+from geometry import BETWEEN_PY
+from constants import KNIGHT, BISHOP, ROOK, QUEEN, WHITE_OCCUPANCY, BLACK_OCCUPANCY, OCCUPIED
+from move_encoding import FLAG_PROMOTION, FLAG_EN_PASSANT, FLAG_CASTLING, DECODED
 
 
 @njit
@@ -200,7 +203,7 @@ def generate_king_moves(gs, king, is_white, verbose=False):
     from_sq = int(np.log2(int(king)))  # Find king square
 
     own_pieces = gs.white_occupancy if is_white else gs.black_occupancy
-    enemy_attacks = gs.attack_map(not is_white)
+    enemy_attacks = _enemy_attacks(gs, is_white)
     legal_targets = king_attacks(from_sq) & int(~own_pieces) & int(~enemy_attacks)
 
     if verbose:
@@ -232,34 +235,24 @@ def generate_king_moves(gs, king, is_white, verbose=False):
 
 #     return moves
 
+def _enemy_attacks(gs, is_white):
+    """Squares attacked by the opponent of `is_white`, from the cached AttackInfo when it is our move."""
+    if is_white == gs.white_to_move:
+        return gs.get_attack_info().enemy_attacks
+    return gs.attack_map(not is_white)
+
 def generate_castling_moves(gs, is_white, verbose=False):
     moves = []
     occupancy = int(gs.occupied)
-    if is_white:
-        king_sq = 4
-        # White kingside castling (e1 to g1)
-        if gs.castling_rights[0]:
-            if not (occupancy  & (square_mask(5) | square_mask(6))):
-                if not (gs.is_square_attacked(4, False) or gs.is_square_attacked(5, False) or gs.is_square_attacked(6, False)):
-                    moves.append((np.int8(king_sq), np.int8(6), np.int8(0)))
-        # White queenside castling (e1 to c1)
-        if gs.castling_rights[1]:
-            if not (occupancy  & (square_mask(1) | square_mask(2) | square_mask(3))):
-                if not (gs.is_square_attacked(4, False) or gs.is_square_attacked(3, False) or gs.is_square_attacked(2, False)):
-                    moves.append((np.int8(king_sq), np.int8(2), np.int8(0)))
-    else:
-        king_sq = 60
-        # Black kingside castling (e8 to g8)
-        if gs.castling_rights[2]:
-            if not (occupancy  & (square_mask(61) | square_mask(62))):
-                if not (gs.is_square_attacked(60, True) or gs.is_square_attacked(61, True) or gs.is_square_attacked(62, True)):
-                    moves.append((np.int8(king_sq), np.int8(62), np.int8(0)))
-        # Black queenside castling (e8 to c8)
-        if gs.castling_rights[3]:
-            if not (occupancy  & (square_mask(57) | square_mask(58) | square_mask(59))):
-                if not (gs.is_square_attacked(60, True) or gs.is_square_attacked(59, True) or gs.is_square_attacked(58, True)):
-                    moves.append((np.int8(king_sq), np.int8(58), np.int8(0)))
-    
+    enemy_attacks = _enemy_attacks(gs, is_white)
+    king_sq = 4 if is_white else 60
+    # The king may not castle out of, through or into check
+    for right in ((0, 1) if is_white else (2, 3)):
+        code, empty_path, safe_path = CASTLING_PATHS[right]
+        if gs.castling_rights[right] and not occupancy & empty_path \
+                and not enemy_attacks & (safe_path | (1 << king_sq)):
+            moves.append((np.int8(king_sq), np.int8((code >> 6) & 63), np.int8(0)))
+
     if verbose:
         print(f"Castling moves from square {gs.get_standard_algebraic(king_sq)}:")
         gs.print_board()
@@ -291,16 +284,338 @@ def generate_all_moves(gs, verbose=False):
     + generate_king_moves(gs, int(gs.black_king), False, verbose=verbose) \
     + generate_castling_moves(gs, False, verbose=verbose)
         
-# def generate_all_legal_moves(gs, verbose=False):
-#     """Generate only *legal* moves (no king left in check)."""
-#     legal_moves = []
-#     side_to_move = gs.white_to_move
-
-#     for move in generate_all_moves(gs, verbose):
-#         gs.make_move(move)
-#         if not gs.is_check(side_to_move):
-#             legal_moves.append(move)
-        
-#         gs.undo_move()
-        
-#     return legal_moves
\ No newline at end of file
+
+# =========== Legal Move Generator ==============
+PROMOTION_RANKS = 0xFF000000000000FF
+
+# Moves are collected as 16-bit codes (see move_encoding)
+PROMOTION_CODES = tuple((FLAG_PROMOTION << 14) | ((promo - KNIGHT) << 12) for promo in (QUEEN, ROOK, BISHOP, KNIGHT))
+EN_PASSANT_CODE = FLAG_EN_PASSANT << 14
+CASTLING_CODE = FLAG_CASTLING << 14
+
+# Per castling right [wK, wQ, bK, bQ]: move code, squares that must be empty (king to rook)
+# and squares the king crosses or lands on, which must not be attacked
+CASTLING_PATHS = tuple(
+    (king | (king_to << 6) | CASTLING_CODE, BETWEEN_PY[king][rook], BETWEEN_PY[king][king_to] | (1 << king_to))
+    for king, king_to, rook in ((4, 6, 7), (4, 2, 0), (60, 62, 63), (60, 58, 56))
+)
+
+def _append_moves(moves, from_sq, targets):
+    while targets:
+        to_sq = (targets & -targets).bit_length() - 1
+        moves.append(from_sq | (to_sq << 6))
+        targets &= targets - 1
+
+def _append_pawn_moves(moves, targets, offset):
+    while targets:
+        to_sq = (targets & -targets).bit_length() - 1
+        move = (to_sq - offset) | (to_sq << 6)
+        if (1 << to_sq) & PROMOTION_RANKS:
+            for code in PROMOTION_CODES:
+                moves.append(move | code)
+        else:
+            moves.append(move)
+        targets &= targets - 1
+
+def _pawn_targets(pawns, is_white, empty, enemy):
+    """(single pushes, double pushes, left captures, right captures) with the from-to offset of each."""
+    if is_white:
+        single_push = (pawns << 8) & empty
+        double_push = ((single_push & rank_mask(2)) << 8) & empty
+        left_attacks = (pawns << 7) & enemy & ~file_mask(7)
+        right_attacks = (pawns << 9) & enemy & ~file_mask(0)
+        return (single_push, 8), (int(double_push), 16), (left_attacks, 7), (right_attacks, 9)
+    single_push = (pawns >> 8) & empty
+    double_push = ((single_push & rank_mask(5)) >> 8) & empty
+    left_attacks = (pawns >> 9) & enemy & ~file_mask(7)
+    right_attacks = (pawns >> 7) & enemy & ~file_mask(0)
+    return (single_push, -8), (int(double_push), -16), (left_attacks, -9), (right_attacks, -7)
+
+def _legal_pawn_moves(moves, pawns, is_white, empty, enemy, push_mask, capture_mask):
+    """Pushes of `pawns` that land on `push_mask` and captures (not en passant) that land on `capture_mask`."""
+    single, double, left, right = _pawn_targets(pawns, is_white, empty, enemy)
+    _append_pawn_moves(moves, single[0] & push_mask, single[1])
+    _append_pawn_moves(moves, double[0] & push_mask, double[1])
+    _append_pawn_moves(moves, left[0] & capture_mask, left[1])
+    _append_pawn_moves(moves, right[0] & capture_mask, right[1])
+
+def _count_pawn_moves(pawns, is_white, empty, enemy, push_mask, capture_mask):
+    """Number of moves _legal_pawn_moves would append; a promotion counts once per piece."""
+    single, double, left, right = _pawn_targets(pawns, is_white, empty, enemy)
+    count = (double[0] & push_mask).bit_count()
+    for targets in (single[0] & push_mask, left[0] & capture_mask, right[0] & capture_mask):
+        count += targets.bit_count() + 3 * (targets & PROMOTION_RANKS).bit_count()
+    return count
+
+# Move sets the legal generator can be restricted to
+ALL_MOVES, CAPTURES, QUIETS = 0, 1, 2
+
+def generate_legal_moves(gs):
+    """Legal moves as (from, to, promo) tuples."""
+    return [DECODED[move] for move in _legal_move_codes(gs)]
+
+def generate_legal_captures(gs, include_checks=False):
+    """
+    Legal captures, en passant captures and promotions: the moves quiescence
+    search looks at. Attack sets are intersected with the enemy occupancy up
+    front, so no quiet move is generated and thrown away.
+
+    With `include_checks`, quiet moves that give check (directly or by
+    discovery, castling excepted) are included as well, for the first
+    quiescence ply.
+    """
+    return [DECODED[move] for move in _legal_move_codes(gs, CAPTURES, include_checks=include_checks)]
+
+def generate_legal_quiets(gs):
+    """Legal moves that are neither captures nor promotions, castling included."""
+    return [DECODED[move] for move in _legal_move_codes(gs, QUIETS)]
+
+def is_legal_move(gs, move):
+    """
+    Whether a (from, to, promo) move taken from another node (a hash or
+    killer move) is legal here. Only moves to its target square are generated.
+    """
+    to_sq = int(move[1])
+    return tuple(move) in [DECODED[code] for code in _legal_move_codes(gs, ALL_MOVES, 1 << to_sq)]
+
+def capture_score(gs, move):
+    """MVV-LVA order key for a capture or promotion: most valuable victim, then least valuable attacker."""
+    from_sq, to_sq, promo = int(move[0]), int(move[1]), int(move[2])
+    victim = gs.board[to_sq]
+    score = 5 - gs.board[from_sq] % 6 + promo * 8
+    if victim != -1:
+        score += (victim % 6 + 1) * 8
+    elif not promo:
+        score += 8  # En passant
+    return score
+
+def generate_legal_moves_into(gs, buf):
+    """
+    Write the legal moves of `gs` into `buf` (an np.uint16 array of at least
+    MAX_MOVES entries, reused across plies) as 16-bit codes and return how
+    many were written.
+    """
+    moves = _legal_move_codes(gs)
+    count = len(moves)
+    buf[:count] = moves
+    return count
+
+def count_legal_moves(gs):
+    """
+    Number of legal moves, without building a move list: the targets of
+    knights, sliders, king and set-wise pawns are only counted. Same pins,
+    checks and evasion mask as _legal_move_codes, so it always equals
+    len(generate_legal_moves(gs)). Used for the leaves of perft.
+    """
+    bb = gs.bb
+    is_white = gs.white_to_move
+    us, them = (0, 6) if is_white else (6, 0)
+    own = bb[WHITE_OCCUPANCY if is_white else BLACK_OCCUPANCY]
+    enemy = bb[BLACK_OCCUPANCY if is_white else WHITE_OCCUPANCY]
+    occupied = bb[OCCUPIED]
+    empty = ~occupied & FULL_BOARD
+    king_sq = bb[us + 5].bit_length() - 1
+
+    info = gs.get_attack_info()
+    checkers, check_mask, pinned, pin_rays = info.checkers, info.check_mask, info.pinned, info.pin_rays
+
+    count = (king_attacks(king_sq) & ~own & ~info.enemy_attacks).bit_count()
+    if not check_mask:
+        return count
+
+    special = []
+    if not checkers:
+        _append_castling_moves(special, gs, is_white, occupied, info.enemy_attacks)
+
+    pawns = bb[us]
+    count += _count_pawn_moves(pawns & ~pinned, is_white, empty, enemy, check_mask, check_mask)
+    pinned_pawns = pawns & pinned
+    while pinned_pawns:
+        sq = (pinned_pawns & -pinned_pawns).bit_length() - 1
+        pin_ray = check_mask & pin_rays[sq]
+        count += _count_pawn_moves(1 << sq, is_white, empty, enemy, pin_ray, pin_ray)
+        pinned_pawns &= pinned_pawns - 1
+
+    if gs.en_passant_target != -1:
+        _append_en_passant_moves(special, gs, is_white, pawns, occupied, king_sq, checkers,
+                                 bb[them + 2] | bb[them + 4], bb[them + 3] | bb[them + 4])
+
+    not_own_mask = ~own & check_mask
+    knights = bb[us + 1] & ~pinned
+    while knights:
+        from_sq = (knights & -knights).bit_length() - 1
+        count += (knight_attacks(from_sq) & not_own_mask).bit_count()
+        knights &= knights - 1
+
+    for piece_type, slider_attacks in ((2, bishop_attacks), (3, rook_attacks), (4, queen_attacks)):
+        sliders = bb[us + piece_type]
+        while sliders:
+            from_sq = (sliders & -sliders).bit_length() - 1
+            targets = slider_attacks(from_sq, occupied) & not_own_mask
+            if (1 << from_sq) & pinned:
+                targets &= pin_rays[from_sq]
+            count += targets.bit_count()
+            sliders &= sliders - 1
+
+    return count + len(special)
+
+def _quiet_check_targets(gs, is_white, occupied, own, empty):
+    """
+    Squares from which each of our piece types would check the enemy king
+    (empty squares only), and our pieces that would give a discovered check
+    by leaving the returned ray.
+    """
+    bb = gs.bb
+    us = 0 if is_white else 6
+    their_king_sq = bb[6 - us + 5].bit_length() - 1
+    diagonal = bishop_attacks(their_king_sq, occupied) & empty
+    orthogonal = rook_attacks(their_king_sq, occupied) & empty
+    check_targets = (
+        pawn_attacks(their_king_sq, not is_white) & empty,
+        knight_attacks(their_king_sq) & empty,
+        diagonal,
+        orthogonal,
+        diagonal | orthogonal,
+        0,
+    )
+
+    # A single piece of ours between the enemy king and one of our sliders
+    enemy_and_king = occupied & ~own
+    discover_rays = {}
+    snipers = (rook_attacks(their_king_sq, enemy_and_king) & (bb[us + 3] | bb[us + 4])) \
+        | (bishop_attacks(their_king_sq, enemy_and_king) & (bb[us + 2] | bb[us + 4]))
+    between = BETWEEN_PY[their_king_sq]
+    while snipers:
+        sniper_sq = (snipers & -snipers).bit_length() - 1
+        ray = between[sniper_sq]
+        blockers = ray & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            discover_rays[blockers.bit_length() - 1] = ray
+        snipers &= snipers - 1
+    return check_targets, discover_rays
+
+def _legal_move_codes(gs, stage=ALL_MOVES, target_filter=FULL_BOARD, include_checks=False):
+    """
+    Generate only legal moves, as a list of 16-bit codes. Checkers, pinned
+    pieces and the check evasion mask come from the position's cached
+    AttackInfo, so no candidate move has to be made and unmade to test it.
+
+    `stage` restricts the output to CAPTURES (captures, en passant and all
+    promotions) or QUIETS (everything else); `target_filter` restricts the
+    destination squares of non-castling moves. `include_checks` adds quiet
+    checking moves to the CAPTURES stage.
+    """
+    moves = []
+    bb = gs.bb
+    is_white = gs.white_to_move
+    us, them = (0, 6) if is_white else (6, 0)
+    own = bb[WHITE_OCCUPANCY if is_white else BLACK_OCCUPANCY]
+    enemy = bb[BLACK_OCCUPANCY if is_white else WHITE_OCCUPANCY]
+    occupied = bb[OCCUPIED]
+    empty = ~occupied & FULL_BOARD
+    king_sq = bb[us + 5].bit_length() - 1
+    enemy_diagonal = bb[them + 2] | bb[them + 4]
+    enemy_orthogonal = bb[them + 3] | bb[them + 4]
+
+    if stage == CAPTURES:
+        destinations, push_filter, capture_filter = enemy & target_filter, PROMOTION_RANKS & target_filter, target_filter
+    elif stage == QUIETS:
+        destinations, push_filter, capture_filter = empty & target_filter, ~PROMOTION_RANKS & target_filter, 0
+    else:
+        destinations = push_filter = capture_filter = target_filter
+
+    # Destinations by piece type, and extra destinations for pieces that discover a check
+    piece_destinations = (destinations,) * 6
+    discover_rays = {}
+    if include_checks and stage == CAPTURES:
+        check_targets, discover_rays = _quiet_check_targets(gs, is_white, occupied, own, empty)
+        piece_destinations = tuple(destinations | (targets & target_filter) for targets in check_targets)
+        push_filter |= check_targets[0] & target_filter
+        discover_rays = {sq: empty & ~ray & target_filter for sq, ray in discover_rays.items()}
+
+    info = gs.get_attack_info()
+    checkers, check_mask, pinned, pin_rays = info.checkers, info.check_mask, info.pinned, info.pin_rays
+
+    # --- King moves: the enemy attack map sees through our king, so it cannot step back along a checking ray
+    king_targets = piece_destinations[5] | discover_rays.get(king_sq, 0)
+    _append_moves(moves, king_sq, king_attacks(king_sq) & ~own & ~info.enemy_attacks & king_targets)
+
+    if not check_mask:
+        return moves  # Double check: only the king can move
+    if not checkers and stage != CAPTURES:
+        _append_castling_moves(moves, gs, is_white, occupied, info.enemy_attacks)
+
+    # --- Pawns: unpinned pawns set-wise, pinned and discovering pawns one at a time
+    pawns = bb[us]
+    push_mask = check_mask & push_filter
+    capture_mask = check_mask & capture_filter
+    single_pawns = pinned | sum(1 << sq for sq in discover_rays)
+    _legal_pawn_moves(moves, pawns & ~single_pawns, is_white, empty, enemy, push_mask, capture_mask)
+    single_pawns &= pawns
+    while single_pawns:
+        sq = (single_pawns & -single_pawns).bit_length() - 1
+        pawn_push_mask = push_mask | (check_mask & discover_rays.get(sq, 0))
+        pin_ray = pin_rays.get(sq, FULL_BOARD)
+        _legal_pawn_moves(moves, 1 << sq, is_white, empty, enemy, pawn_push_mask & pin_ray, capture_mask & pin_ray)
+        single_pawns &= single_pawns - 1
+
+    # --- En passant
+    if gs.en_passant_target != -1 and stage != QUIETS and (1 << gs.en_passant_target) & target_filter:
+        _append_en_passant_moves(moves, gs, is_white, pawns, occupied, king_sq, checkers,
+                                 enemy_diagonal, enemy_orthogonal)
+
+    # --- Knights (a pinned knight can never move) and sliders
+    not_own_mask = ~own & check_mask
+    knights = bb[us + 1] & ~pinned
+    knight_destinations = piece_destinations[1]
+    while knights:
+        from_sq = (knights & -knights).bit_length() - 1
+        targets = knight_destinations
+        if discover_rays:
+            targets |= discover_rays.get(from_sq, 0)
+        _append_moves(moves, from_sq, knight_attacks(from_sq) & not_own_mask & targets)
+        knights &= knights - 1
+
+    for piece_type, slider_attacks in ((2, bishop_attacks), (3, rook_attacks), (4, queen_attacks)):
+        sliders = bb[us + piece_type]
+        slider_destinations = not_own_mask & piece_destinations[piece_type]
+        while sliders:
+            from_sq = (sliders & -sliders).bit_length() - 1
+            targets = slider_attacks(from_sq, occupied) & slider_destinations
+            if discover_rays and from_sq in discover_rays:
+                targets |= slider_attacks(from_sq, occupied) & not_own_mask & discover_rays[from_sq]
+            if (1 << from_sq) & pinned:
+                targets &= pin_rays[from_sq]
+            _append_moves(moves, from_sq, targets)
+            sliders &= sliders - 1
+
+    return moves
+
+def _append_castling_moves(moves, gs, is_white, occupied, enemy_attacks):
+    """Castling moves for a king that is not in check."""
+    rights = gs.castling_rights
+    for right in ((0, 1) if is_white else (2, 3)):
+        code, empty_path, safe_path = CASTLING_PATHS[right]
+        if rights[right] and not occupied & empty_path and not enemy_attacks & safe_path:
+            moves.append(code)
+
+def _append_en_passant_moves(moves, gs, is_white, pawns, occupied, king_sq, checkers, enemy_diagonal, enemy_orthogonal):
+    """
+    En passant captures, tested on the position after the capture for slider
+    attacks on the king, which also catches the two pawns leaving the king's
+    rank together.
+    """
+    ep_sq = gs.en_passant_target
+    capture_sq = ep_sq - 8 if is_white else ep_sq + 8
+    capture_bb = 1 << capture_sq
+    # Knight and pawn checks are only resolved by capturing the checker
+    if checkers & ~capture_bb & ~enemy_diagonal & ~enemy_orthogonal:
+        return
+    ep_attackers = pawns & pawn_attacks(ep_sq, not is_white)
+    while ep_attackers:
+        from_sq = (ep_attackers & -ep_attackers).bit_length() - 1
+        after = occupied ^ (1 << from_sq) ^ capture_bb ^ (1 << ep_sq)
+        if not (rook_attacks(king_sq, after) & enemy_orthogonal) \
+                and not (bishop_attacks(king_sq, after) & enemy_diagonal):
+            moves.append(from_sq | (ep_sq << 6) | EN_PASSANT_CODE)
+        ep_attackers &= ep_attackers - 1
@@ -0,0 +1,82 @@
+"""
+Board geometry tables, built once at import.
+
+    RAYS[direction, sq]  squares from sq to the edge in one direction (sq excluded)
+    BETWEEN[a, b]        squares strictly between a and b, 0 if they are not aligned
+    LINE[a, b]           the whole rank, file or diagonal through a and b, 0 if not aligned
+    DEBRUIJN_INDEX       De Bruijn bit scan table, see lsb_index
+
+The np.uint64 arrays can be read directly from @njit code. The `*_PY`
+copies hold Python ints for the pure Python generators, where mixing
+np.uint64 with negative Python ints (~mask) is not allowed.
+"""
+import numpy as np
+from numba import njit
+
+# --- Directions as (rank, file) steps; opposite directions are 4 apart ---
+NORTH, NORTH_EAST, EAST, SOUTH_EAST, SOUTH, SOUTH_WEST, WEST, NORTH_WEST = range(8)
+DIRECTION_STEPS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+
+def _build_rays():
+    rays = [[0] * 64 for _ in range(8)]
+    for direction, (dr, df) in enumerate(DIRECTION_STEPS):
+        for sq in range(64):
+            r, f = sq // 8 + dr, sq % 8 + df
+            while 0 <= r < 8 and 0 <= f < 8:
+                rays[direction][sq] |= 1 << (r * 8 + f)
+                r, f = r + dr, f + df
+    return rays
+
+
+def _build_between_and_line(rays):
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for direction in range(8):
+            ray = rays[direction][a]
+            full_line = ray | rays[(direction + 4) % 8][a] | (1 << a)
+            targets = ray
+            while targets:
+                b = (targets & -targets).bit_length() - 1
+                between[a][b] = ray & ~rays[direction][b] & ~(1 << b)
+                line[a][b] = full_line
+                targets &= targets - 1
+    return between, line
+
+
+RAYS_PY = _build_rays()
+BETWEEN_PY, LINE_PY = _build_between_and_line(RAYS_PY)
+
+RAYS = np.array(RAYS_PY, dtype=np.uint64)
+BETWEEN = np.array(BETWEEN_PY, dtype=np.uint64)
+LINE = np.array(LINE_PY, dtype=np.uint64)
+
+
+@njit
+def between(a, b):
+    return BETWEEN[a, b]
+
+
+@njit
+def line(a, b):
+    return LINE[a, b]
+
+
+@njit
+def aligned(a, b, c):
+    """Whether c lies on the line through a and b."""
+    return (LINE[a, b] >> np.uint64(c)) & np.uint64(1) != 0
+
+
+# --- De Bruijn bit scan ---
+DEBRUIJN_64 = np.uint64(0x03F79D71B4CB0A89)
+DEBRUIJN_INDEX = np.zeros(64, dtype=np.int64)
+for _sq in range(64):
+    DEBRUIJN_INDEX[(((1 << _sq) * int(DEBRUIJN_64)) & 0xFFFFFFFFFFFFFFFF) >> 58] = _sq
+
+
+@njit(inline='always')
+def lsb_index(bb):
+    """Index of the least significant set bit of a non-zero uint64."""
+    return DEBRUIJN_INDEX[((bb & (~bb + np.uint64(1))) * DEBRUIJN_64) >> np.uint64(58)]
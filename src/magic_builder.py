@@ -0,0 +1,199 @@
+"""
+Parallel, reproducible magic table builder.
+
+Every (piece, square) pair is searched independently on a process pool with
+its own RNG stream derived from one seed, so the result depends only on the
+seed and not on the worker count or scheduling order. Optionally each square
+also tries index tables smaller than 2 ** popcount(mask), which only works
+when the magic maps different blocker sets with the same attacks onto the
+same entry ("constructive collisions").
+
+Magics already in the target file are reused for every square whose mask is
+unchanged, provided the file was built with the same seed and at least the
+requested shrink (recorded in a .json file next to it; a file without one
+counts as seed 0, no shrink). Their attack entries are rebuilt and checked,
+so a layout change only searches the squares it touches. The result is
+verified against the ray walk and written in the flat format of
+bitboard_magic.
+
+Usage: python magic_builder.py [--seed N] [--workers N] [--shrink N] [--force] [--output PATH]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bitboard_magic import (
+    MAGIC_FILE, HEADER_SIZE, generate_mask_bishop, generate_mask_rook, compute_bishop_attacks,
+    compute_rook_attacks, load_magic_tables, magic_entries, square_occupancies, popcount,
+    pack_magic_tables, write_magic_tables,
+)
+
+BISHOP, ROOK = 0, 1
+PIECE_NAMES = ("bishop", "rook")
+MASK_FUNCTIONS = (generate_mask_bishop, generate_mask_rook)
+ATTACK_FUNCTIONS = (compute_bishop_attacks, compute_rook_attacks)
+
+# Attempts for the full-size table, and for each smaller size tried after it
+MAX_ATTEMPTS = 1000000
+SHRINK_ATTEMPTS = 100000
+
+
+def square_rng(seed, piece, square):
+    """Independent RNG stream of one (piece, square) search."""
+    return random.Random((seed << 7) | (piece << 6) | square)
+
+
+def search_square(piece, square, seed=0, shrink=0, max_attempts=MAX_ATTEMPTS,
+                  shrink_attempts=SHRINK_ATTEMPTS):
+    """
+    Search a magic for one square; returns (mask, magic, shift, entries).
+    With `shrink` > 0, up to that many index bits fewer than the mask has are
+    tried after the full-size table is found, keeping the smallest that works.
+    """
+    rng = square_rng(seed, piece, square)
+    mask, occupancies, attacks = square_occupancies(square, MASK_FUNCTIONS[piece], ATTACK_FUNCTIONS[piece])
+    bits = popcount(mask)
+
+    best = None
+    for index_bits in range(bits, bits - shrink - 1, -1):
+        found = _search(rng, mask, 64 - index_bits, occupancies, attacks,
+                        max_attempts if best is None else shrink_attempts)
+        if found is None:
+            break
+        best = found
+    if best is None:
+        raise RuntimeError(f"Failed to find {PIECE_NAMES[piece]} magic for square {square}")
+    return best
+
+def _search(rng, mask, shift, occupancies, attacks, attempts):
+    for _ in range(attempts):
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        # A magic must spread the mask into the top byte; skip obvious misses cheaply
+        if popcount((mask * magic) & 0xFF00000000000000) < 6:
+            continue
+        entries = magic_entries(magic, shift, occupancies, attacks)
+        if entries is not None:
+            return mask, magic, shift, entries
+    return None
+
+def _search_task(task):
+    return task[:2], search_square(*task)
+
+
+# --- Cache ---
+
+def cached_magics(path=MAGIC_FILE):
+    """(mask, magic, shift) per (piece, square) from an existing table file, or {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    tables = load_magic_tables(path)
+    cached = {}
+    for piece in (BISHOP, ROOK):
+        masks, magics, shifts = tables[4 * piece:4 * piece + 3]
+        for square in range(64):
+            cached[piece, square] = (int(masks[square]), int(magics[square]), int(shifts[square]))
+    return cached
+
+def settings_path(path):
+    return Path(path).with_suffix(".json")
+
+def cached_settings(path=MAGIC_FILE):
+    """(seed, shrink) the table file was built with."""
+    try:
+        with open(settings_path(path)) as f:
+            settings = json.load(f)
+    except FileNotFoundError:
+        return 0, 0
+    return settings["seed"], settings["shrink"]
+
+def write_settings(seed, shrink, path=MAGIC_FILE):
+    with open(settings_path(path), "w") as f:
+        json.dump({"seed": seed, "shrink": shrink}, f)
+        f.write("\n")
+
+def _reuse_square(piece, square, cached):
+    """Rebuild a square from its cached magic if the mask is unchanged and the magic still works."""
+    if (piece, square) not in cached:
+        return None
+    mask, magic, shift = cached[piece, square]
+    current_mask, occupancies, attacks = square_occupancies(square, MASK_FUNCTIONS[piece], ATTACK_FUNCTIONS[piece])
+    if mask != current_mask:
+        return None
+    entries = magic_entries(magic, shift, occupancies, attacks)
+    return None if entries is None else (mask, magic, shift, entries)
+
+
+# --- Build ---
+
+def verify_magic_tables(data):
+    """Check every blocker subset of every square against the ray walk."""
+    for piece in (BISHOP, ROOK):
+        base = 4 * 64 * piece
+        for square in range(64):
+            mask, magic, shift, offset = (int(data[base + field * 64 + square]) for field in range(4))
+            _, occupancies, attacks = square_occupancies(square, MASK_FUNCTIONS[piece], ATTACK_FUNCTIONS[piece])
+            for occupancy, attack in zip(occupancies, attacks):
+                index = ((occupancy * magic) & 0xFFFFFFFFFFFFFFFF) >> shift
+                if int(data[HEADER_SIZE + offset + index]) != attack:
+                    raise ValueError(f"{PIECE_NAMES[piece]} table is wrong on square {square}")
+
+def build_magic_tables(path=MAGIC_FILE, seed=0, workers=None, shrink=0, force=False,
+                       max_attempts=MAX_ATTEMPTS, shrink_attempts=SHRINK_ATTEMPTS):
+    """
+    Build, verify and write the flat magic tables to `path`. Returns the packed
+    array and the number of squares that had to be searched (0 when every
+    square came from the cache).
+    """
+    cached = {} if force else cached_magics(path)
+    cached_seed, cached_shrink = cached_settings(path)
+    if cached_seed != seed or cached_shrink < shrink:
+        # A different stream or a smaller table was asked for: the cached magics do not answer it
+        cached = {}
+    results = {}
+    tasks = []
+    for piece in (BISHOP, ROOK):
+        for square in range(64):
+            reused = _reuse_square(piece, square, cached)
+            if reused is not None:
+                results[piece, square] = reused
+            else:
+                tasks.append((piece, square, seed, shrink, max_attempts, shrink_attempts))
+
+    if tasks:
+        if workers == 1:
+            results.update(map(_search_task, tasks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Rooks have the largest tables, so hand them out first
+                results.update(pool.map(_search_task, sorted(tasks, key=lambda task: -task[0])))
+
+    data = pack_magic_tables([results[BISHOP, square] for square in range(64)],
+                             [results[ROOK, square] for square in range(64)])
+    verify_magic_tables(data)
+    if tasks or not os.path.exists(path):
+        write_magic_tables(data, path)
+        write_settings(seed, shrink, path)
+    return data, len(tasks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the flat magic bitboard tables.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="process count (default: all cores)")
+    parser.add_argument("--shrink", type=int, default=0, help="also try up to N index bits fewer per square")
+    parser.add_argument("--force", action="store_true", help="ignore magics already in the output file")
+    parser.add_argument("--output", default=MAGIC_FILE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    data, searched = build_magic_tables(args.output, args.seed, args.workers, args.shrink, args.force)
+    print(f"Searched {searched} of 128 squares in {time.perf_counter() - start:.1f}s, "
+          f"attack table {len(data) - HEADER_SIZE} entries -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
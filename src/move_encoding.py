@@ -0,0 +1,76 @@
+"""
+16-bit move encoding shared by the Python and compiled bitboard paths.
+
+    bits 0-5   from square
+    bits 6-11  to square
+    bits 12-13 promotion piece (0 = knight, 1 = bishop, 2 = rook, 3 = queen)
+    bits 14-15 flags (normal, promotion, en passant, castling)
+"""
+import numpy as np
+from numba import njit
+
+from constants import KNIGHT, BISHOP, ROOK, QUEEN
+
+# Longest move list a generator may write into a buffer
+MAX_MOVES = 256
+
+FLAG_NORMAL, FLAG_PROMOTION, FLAG_EN_PASSANT, FLAG_CASTLING = 0, 1, 2, 3
+PROMO_PIECES = (KNIGHT, BISHOP, ROOK, QUEEN)
+
+
+@njit
+def encode_move(from_sq, to_sq, promo_code, flags):
+    return from_sq | (to_sq << 6) | (promo_code << 12) | (flags << 14)
+
+
+@njit
+def move_from_sq(move):
+    return np.int64(move) & 63
+
+
+@njit
+def move_to_sq(move):
+    return (np.int64(move) >> 6) & 63
+
+
+@njit
+def move_promo_code(move):
+    return (np.int64(move) >> 12) & 3
+
+
+@njit
+def move_flags(move):
+    return np.int64(move) >> 14
+
+
+def _decode(move):
+    promo = PROMO_PIECES[(move >> 12) & 3] if move >> 14 == FLAG_PROMOTION else 0
+    return (_INT8[move & 63], _INT8[(move >> 6) & 63], _INT8[promo])
+
+
+# Every code decoded once up front; the tuples (and their np.int8 scalars) are shared
+_INT8 = [np.int8(i) for i in range(64)]
+DECODED = [_decode(move) for move in range(1 << 16)]
+
+
+def decode_move(move):
+    """Convert an encoded move to the (from, to, promo) tuple used by BitboardGameState."""
+    return DECODED[int(move)]
+
+
+def decode_moves(buf, count):
+    """Decode the first `count` moves of a move buffer."""
+    return [DECODED[move] for move in buf[:count].tolist()]
+
+
+def encode_move_tuple(gs, move):
+    """Encode a (from, to, promo) tuple, reading the flags from the position it is played in."""
+    from_sq, to_sq, promo = int(move[0]), int(move[1]), int(move[2])
+    piece = gs.board[from_sq] % 6
+    if promo:
+        return from_sq | (to_sq << 6) | ((promo - KNIGHT) << 12) | (FLAG_PROMOTION << 14)
+    if piece == 0 and to_sq == gs.en_passant_target:
+        return from_sq | (to_sq << 6) | (FLAG_EN_PASSANT << 14)
+    if piece == 5 and abs(to_sq - from_sq) == 2:
+        return from_sq | (to_sq << 6) | (FLAG_CASTLING << 14)
+    return from_sq | (to_sq << 6)
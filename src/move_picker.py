@@ -0,0 +1,80 @@
+"""
+Staged move picker.
+
+Most beta cutoffs happen on the first or second move, so instead of
+generating and sorting every move up front, MovePicker hands moves out one
+stage at a time and only generates what the search actually asks for:
+
+    1. hash move - checked for legality, nothing is generated
+    2. captures  - captures, en passant and promotions, best MVV-LVA first
+    3. killers   - quiet moves that caused a cutoff at the same ply
+    4. quiets    - everything else
+
+It works with any move generator module that provides
+generate_legal_captures, generate_legal_quiets, is_legal_move and
+capture_score: generate_moves for BitboardGameState, or engine_utils for
+the mailbox GameState.
+"""
+import generate_moves
+
+# --- Stages ---
+HASH_MOVE, CAPTURES, KILLERS, QUIETS, DONE = range(5)
+STAGE_NAMES = ("hash move", "captures", "killers", "quiets", "done")
+
+# Generator calls made when every move is generated up front (captures + quiets)
+FULL_GENERATION_CALLS = 2
+
+
+class MovePicker:
+    """
+    Iterate over the legal moves of `gs` in stage order. `stage` is the stage
+    of the move handed out last, and `generator_calls` counts the generators
+    run so far, so a search that breaks out early can tell how much
+    generation it skipped.
+    """
+    def __init__(self, gs, hash_move=None, killers=(), movegen=generate_moves):
+        self.gs = gs
+        self.hash_move = hash_move
+        self.killers = killers
+        self.movegen = movegen
+        self.stage = HASH_MOVE
+        self.generator_calls = 0
+
+    def __iter__(self):
+        gs, movegen = self.gs, self.movegen
+
+        hash_move = self.hash_move
+        if hash_move is not None:
+            if movegen.is_legal_move(gs, hash_move):
+                yield hash_move
+            else:
+                hash_move = None
+
+        self.stage = CAPTURES
+        captures = movegen.generate_legal_captures(gs)
+        self.generator_calls += 1
+        captures.sort(key=lambda move: movegen.capture_score(gs, move), reverse=True)
+        for move in captures:
+            if move != hash_move:
+                yield move
+
+        self.stage = KILLERS
+        killers = []
+        for killer in self.killers:
+            if killer is not None and killer != hash_move and killer not in captures \
+                    and movegen.is_legal_move(gs, killer):
+                killers.append(killer)
+                yield killer
+
+        self.stage = QUIETS
+        quiets = movegen.generate_legal_quiets(gs)
+        self.generator_calls += 1
+        for move in quiets:
+            if move != hash_move and move not in killers:
+                yield move
+
+        self.stage = DONE
+
+    @property
+    def generator_calls_saved(self):
+        return FULL_GENERATION_CALLS - self.generator_calls
@@ -1,6 +1,6 @@
 from numba import njit
 
-from engine_utils import generate_legal_moves, apply_move
+from engine_utils import generate_legal_moves_into, apply_move, undo_move, MAX_MOVES, MOVE_FIELDS
 from evaluate_board import evaluate_board
 from game import GameState
 
@@ -8,39 +8,32 @@ import time
 import numpy as np
 
 @njit
-def fast_perft(gs, depth):
+def _perft(gs, depth, buffers):
     if depth == 0:
         return 1
 
     nodes = 0
-    moves = generate_legal_moves(gs)
-
-    original_board = gs.board.copy()
-    original_en_passant = np.copy(gs.en_passant_target)
-    original_castling_rights = np.copy(gs.castling_rights)
-    original_halfmove_clock = gs.halfmove_clock
-    original_fullmove_number = gs.fullmove_number
-    original_white_to_move = gs.white_to_move
+    moves = buffers[depth - 1]
+    count = generate_legal_moves_into(gs, moves)
 
-    for move in moves:
-        moving_piece = gs.board[move[0], move[1]]
-        captured_piece = gs.board[move[2], move[3]]
-
-        apply_move(gs, move)
+    for i in range(count):
+        move = moves[i]
+        undo = apply_move(gs, move)
         evaluate_board(gs)
-        
-        nodes += fast_perft(gs, depth - 1)
+
+        nodes += _perft(gs, depth - 1, buffers)
 
         # Undo move when finished traversing 1-move subtree
-        gs.board[:, :] = original_board
-        gs.en_passant_target[:] = original_en_passant
-        gs.castling_rights[:] = original_castling_rights
-        gs.halfmove_clock = original_halfmove_clock
-        gs.fullmove_number = original_fullmove_number
-        gs.white_to_move = original_white_to_move
+        undo_move(gs, move, *undo)
 
     return nodes
 
+@njit
+def fast_perft(gs, depth):
+    # One move buffer per remaining depth, so a ply never overwrites the moves of its parent
+    buffers = np.empty((max(depth, 1), MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    return _perft(gs, depth, buffers)
+
 if __name__=="__main__":
     gs = GameState()
     start = time.time()
@@ -48,4 +41,4 @@ if __name__=="__main__":
     runtime = time.time() - start
     print("Nodes:", nodes)
     print(f"Time: {round(runtime)}s")
-    print("Nodes/second:", round(nodes / runtime))
\ No newline at end of file
+    print("Nodes/second:", round(nodes / runtime))
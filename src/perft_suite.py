@@ -0,0 +1,121 @@
+"""
+Perft regression suite: the standard test positions (start, Kiwipete and
+positions 3-6 from the chess programming wiki) and the edge-case set for
+en passant pins, castling through or into check, promotions and
+stalemate, with reference node counts per depth.
+
+Each position runs at min(depth, deepest known count) and reports nodes,
+seconds, nodes per second and pass/fail as JSON, so movegen throughput can
+be compared between releases.
+
+Usage: python perft_suite.py [--depth D] [--positions NAME ...] [--workers W]
+                             [--hash MB] [--output FILE]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+from bitboard_perft import PerftTable, _bitboard_perft, _hashed_perft, parallel_perft
+from fen import START_FEN, bitboard_state_from_fen
+
+DEFAULT_DEPTH = 3
+
+# name -> (FEN, node counts at depth 1, 2, ...)
+PERFT_POSITIONS = {
+    'start': (START_FEN, (20, 400, 8902, 197281, 4865609, 119060324)),
+    'kiwipete': ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 (48, 2039, 97862, 4085603, 193690690)),
+    'position_3': ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624, 11030083)),
+    'position_4': ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                   (6, 264, 9467, 422333, 15833292)),
+    'position_5': ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487, 89941194)),
+    'position_6': ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                   (46, 2079, 89890, 3894594, 164075551)),
+    'illegal_ep_1': ("3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1", (18, 92, 1670, 10138, 185429, 1134888)),
+    'illegal_ep_2': ("8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1", (13, 102, 1266, 10276, 135655, 1015133)),
+    'ep_capture_checks': ("8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1", (15, 126, 1928, 13931, 206379, 1440467)),
+    'short_castle_check': ("5k2/8/8/8/8/8/8/4K2R w K - 0 1", (15, 66, 1198, 6399, 120330, 661072)),
+    'long_castle_check': ("3k4/8/8/8/8/8/8/R3K3 w Q - 0 1", (16, 71, 1286, 7418, 141077, 803711)),
+    'castle_rights': ("r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1", (26, 1141, 27826, 1274206, 31912360)),
+    'castling_prevented': ("r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1", (44, 1494, 50509, 1720476, 58773923)),
+    'promote_out_of_check': ("2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1", (11, 133, 1442, 19174, 266199, 3821001)),
+    'discovered_check': ("8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1", (29, 165, 5160, 31961, 1004658, 6334638)),
+    'promote_to_check': ("4k3/1P6/8/8/8/8/K7/8 w - - 0 1", (9, 40, 472, 2661, 38983, 217342)),
+    'underpromote_to_check': ("8/P1k5/K7/8/8/8/8/8 w - - 0 1", (6, 27, 273, 1329, 18135, 92683)),
+    'self_stalemate': ("K1k5/8/P7/8/8/8/8/8 w - - 0 1", (2, 6, 13, 63, 382, 2217)),
+    'stalemate_checkmate_1': ("8/k1P5/8/1K6/8/8/8/8 w - - 0 1", (10, 25, 268, 926, 10857, 43261, 567584)),
+    'stalemate_checkmate_2': ("8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1", (37, 183, 6559, 23527, 811573, 3114998)),
+}
+
+
+def run_position(name, depth=DEFAULT_DEPTH, workers=0, memory_mb=0):
+    """Perft one suite position; `workers` > 0 runs parallel_perft, `memory_mb` > 0 hashes."""
+    if depth < 1:
+        raise ValueError(f"suite depth must be at least 1, got {depth}")
+    fen, counts = PERFT_POSITIONS[name]
+    depth = min(depth, len(counts))
+    gs = bitboard_state_from_fen(fen)
+    start = time.perf_counter()
+    if workers:
+        nodes = parallel_perft(gs, depth, workers, split_depth=2, memory_mb=memory_mb)[0]
+    elif memory_mb:
+        nodes = _hashed_perft(gs, depth, PerftTable(memory_mb))
+    else:
+        nodes = _bitboard_perft(gs, depth)
+    seconds = time.perf_counter() - start
+    return {
+        'name': name,
+        'fen': fen,
+        'depth': depth,
+        'nodes': nodes,
+        'expected': counts[depth - 1],
+        'seconds': round(seconds, 6),
+        'nps': round(nodes / seconds) if seconds else None,
+        'passed': nodes == counts[depth - 1],
+    }
+
+def run_suite(names=None, depth=DEFAULT_DEPTH, workers=0, memory_mb=0):
+    """Suite results as a JSON-ready dict: per-position results and totals."""
+    # Compile the lazily jitted helpers first, so the first position's time is not charged for it
+    _bitboard_perft(bitboard_state_from_fen(START_FEN), 2)
+    results = [run_position(name, depth, workers, memory_mb) for name in names or PERFT_POSITIONS]
+    nodes = sum(result['nodes'] for result in results)
+    seconds = sum(result['seconds'] for result in results)
+    return {
+        'depth': depth,
+        'workers': workers,
+        'hash_mb': memory_mb,
+        'python': platform.python_version(),
+        'results': results,
+        'nodes': nodes,
+        'seconds': round(seconds, 6),
+        'nps': round(nodes / seconds) if seconds else None,
+        'passed': all(result['passed'] for result in results),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the perft suite and print JSON results.")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help="depth per position, capped at its deepest reference count")
+    parser.add_argument('--positions', nargs='+', choices=list(PERFT_POSITIONS), metavar='NAME',
+                        help="positions to run (default: all)")
+    parser.add_argument('--workers', type=int, default=0, help="run parallel_perft with this many processes")
+    parser.add_argument('--hash', type=float, default=0, dest='memory_mb', help="perft table size in MB")
+    parser.add_argument('--output', help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.positions, args.depth, args.workers, args.memory_mb)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0 if report['passed'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Slider attack backends.
+
+Every backend computes bishop, rook and queen attacks from (square,
+occupancy) and returns the attacked squares as a bitboard, blockers
+included:
+
+    magic         fancy magic table lookup (bitboard_magic)
+    classical     RAYS lookup, cut at the first blocker with a bit scan
+    kogge-stone   occluded fills of the slider bitboard, no tables at all
+
+Each has a pure Python version (Python ints) and an @njit version
+(np.uint64, for nopython code). The backend used by the move generators
+is chosen once at startup from the SLIDER_BACKEND environment variable
+(default "magic") and exported as bishop_attacks / rook_attacks /
+queen_attacks and their *_jit counterparts. bench_sliders.py compares
+the backends.
+"""
+import os
+
+import numpy as np
+from numba import njit
+
+import bitboard_magic
+from geometry import RAYS, RAYS_PY, lsb_index, NORTH, NORTH_EAST, EAST, SOUTH_EAST, SOUTH, SOUTH_WEST, WEST, NORTH_WEST
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+NOT_FILE_A = 0xFEFEFEFEFEFEFEFE
+NOT_FILE_H = 0x7F7F7F7F7F7F7F7F
+
+BISHOP_DIRECTIONS = (NORTH_EAST, SOUTH_EAST, SOUTH_WEST, NORTH_WEST)
+ROOK_DIRECTIONS = (NORTH, EAST, SOUTH, WEST)
+# Rays towards higher square indices hit their nearest blocker at the lowest set bit
+INCREASING = (True, True, True, False, False, False, False, True)
+
+# Kogge-Stone: square index step of one move in each direction, and the
+# squares a step may land on without wrapping around the board edge
+SHIFTS = (8, 9, 1, -7, -8, -9, -1, 7)
+WRAP_MASKS = (FULL_BOARD, NOT_FILE_A, NOT_FILE_A, NOT_FILE_A, FULL_BOARD, NOT_FILE_H, NOT_FILE_H, NOT_FILE_H)
+
+
+class SliderBackend:
+    """bishop, rook and queen attack functions of one backend, all (square, occupancy) -> bitboard."""
+    __slots__ = ('name', 'bishop_attacks', 'rook_attacks', 'queen_attacks')
+
+    def __init__(self, name, bishop_attacks, rook_attacks, queen_attacks):
+        self.name = name
+        self.bishop_attacks = bishop_attacks
+        self.rook_attacks = rook_attacks
+        self.queen_attacks = queen_attacks
+
+
+# === Classical rays ===
+
+def _ray_attacks(square, occupancy, direction):
+    ray = RAYS_PY[direction][square]
+    blockers = ray & occupancy
+    if blockers:
+        if INCREASING[direction]:
+            blocker = (blockers & -blockers).bit_length() - 1
+        else:
+            blocker = blockers.bit_length() - 1
+        ray ^= RAYS_PY[direction][blocker]
+    return ray
+
+def classical_bishop_attacks(square, occupancy):
+    occupancy = int(occupancy)
+    return (_ray_attacks(square, occupancy, NORTH_EAST) | _ray_attacks(square, occupancy, SOUTH_EAST)
+            | _ray_attacks(square, occupancy, SOUTH_WEST) | _ray_attacks(square, occupancy, NORTH_WEST))
+
+def classical_rook_attacks(square, occupancy):
+    occupancy = int(occupancy)
+    return (_ray_attacks(square, occupancy, NORTH) | _ray_attacks(square, occupancy, EAST)
+            | _ray_attacks(square, occupancy, SOUTH) | _ray_attacks(square, occupancy, WEST))
+
+def classical_queen_attacks(square, occupancy):
+    return classical_bishop_attacks(square, occupancy) | classical_rook_attacks(square, occupancy)
+
+
+# === Kogge-Stone occluded fill ===
+
+def _shift(bb, shift):
+    return (bb << shift) & FULL_BOARD if shift > 0 else bb >> -shift
+
+def _fill_attacks(slider, empty, direction):
+    """Squares attacked in `direction` by the sliders in `slider`, moving through `empty`."""
+    shift, wrap = SHIFTS[direction], WRAP_MASKS[direction]
+    empty &= wrap
+    slider |= empty & _shift(slider, shift)
+    empty &= _shift(empty, shift)
+    slider |= empty & _shift(slider, 2 * shift)
+    empty &= _shift(empty, 2 * shift)
+    slider |= empty & _shift(slider, 4 * shift)
+    return _shift(slider, shift) & wrap
+
+def kogge_stone_bishop_attacks(square, occupancy):
+    slider, empty = 1 << square, ~int(occupancy) & FULL_BOARD
+    return (_fill_attacks(slider, empty, NORTH_EAST) | _fill_attacks(slider, empty, SOUTH_EAST)
+            | _fill_attacks(slider, empty, SOUTH_WEST) | _fill_attacks(slider, empty, NORTH_WEST))
+
+def kogge_stone_rook_attacks(square, occupancy):
+    slider, empty = 1 << square, ~int(occupancy) & FULL_BOARD
+    return (_fill_attacks(slider, empty, NORTH) | _fill_attacks(slider, empty, EAST)
+            | _fill_attacks(slider, empty, SOUTH) | _fill_attacks(slider, empty, WEST))
+
+def kogge_stone_queen_attacks(square, occupancy):
+    return kogge_stone_bishop_attacks(square, occupancy) | kogge_stone_rook_attacks(square, occupancy)
+
+
+# === Compiled versions: np.uint64 in and out ===
+
+SHIFTS_NP = np.array(SHIFTS, dtype=np.int64)
+WRAP_MASKS_NP = np.array(WRAP_MASKS, dtype=np.uint64)
+INCREASING_NP = np.array(INCREASING)
+
+@njit(inline='always')
+def _ray_attacks_jit(square, occupancy, direction):
+    ray = RAYS[direction, square]
+    blockers = ray & occupancy
+    if blockers:
+        if INCREASING_NP[direction]:
+            bit = blockers & (~blockers + np.uint64(1))
+        else:
+            # Smear the highest blocker downwards, then keep only its bit
+            for shift in (1, 2, 4, 8, 16, 32):
+                blockers |= blockers >> np.uint64(shift)
+            bit = blockers ^ (blockers >> np.uint64(1))
+        ray ^= RAYS[direction, lsb_index(bit)]
+    return ray
+
+@njit
+def classical_bishop_attacks_jit(square, occupancy):
+    occupancy = np.uint64(occupancy)
+    return (_ray_attacks_jit(square, occupancy, NORTH_EAST) | _ray_attacks_jit(square, occupancy, SOUTH_EAST)
+            | _ray_attacks_jit(square, occupancy, SOUTH_WEST) | _ray_attacks_jit(square, occupancy, NORTH_WEST))
+
+@njit
+def classical_rook_attacks_jit(square, occupancy):
+    occupancy = np.uint64(occupancy)
+    return (_ray_attacks_jit(square, occupancy, NORTH) | _ray_attacks_jit(square, occupancy, EAST)
+            | _ray_attacks_jit(square, occupancy, SOUTH) | _ray_attacks_jit(square, occupancy, WEST))
+
+@njit
+def classical_queen_attacks_jit(square, occupancy):
+    return classical_bishop_attacks_jit(square, occupancy) | classical_rook_attacks_jit(square, occupancy)
+
+@njit(inline='always')
+def _shift_jit(bb, shift):
+    return bb << np.uint64(shift) if shift > 0 else bb >> np.uint64(-shift)
+
+@njit(inline='always')
+def _fill_attacks_jit(slider, empty, direction):
+    shift, wrap = SHIFTS_NP[direction], WRAP_MASKS_NP[direction]
+    empty &= wrap
+    slider |= empty & _shift_jit(slider, shift)
+    empty &= _shift_jit(empty, shift)
+    slider |= empty & _shift_jit(slider, 2 * shift)
+    empty &= _shift_jit(empty, 2 * shift)
+    slider |= empty & _shift_jit(slider, 4 * shift)
+    return _shift_jit(slider, shift) & wrap
+
+@njit
+def kogge_stone_bishop_attacks_jit(square, occupancy):
+    slider, empty = np.uint64(1) << np.uint64(square), ~np.uint64(occupancy)
+    return (_fill_attacks_jit(slider, empty, NORTH_EAST) | _fill_attacks_jit(slider, empty, SOUTH_EAST)
+            | _fill_attacks_jit(slider, empty, SOUTH_WEST) | _fill_attacks_jit(slider, empty, NORTH_WEST))
+
+@njit
+def kogge_stone_rook_attacks_jit(square, occupancy):
+    slider, empty = np.uint64(1) << np.uint64(square), ~np.uint64(occupancy)
+    return (_fill_attacks_jit(slider, empty, NORTH) | _fill_attacks_jit(slider, empty, EAST)
+            | _fill_attacks_jit(slider, empty, SOUTH) | _fill_attacks_jit(slider, empty, WEST))
+
+@njit
+def kogge_stone_queen_attacks_jit(square, occupancy):
+    return kogge_stone_bishop_attacks_jit(square, occupancy) | kogge_stone_rook_attacks_jit(square, occupancy)
+
+
+# === Registry and startup selection ===
+
+PYTHON_BACKENDS = {
+    "magic": SliderBackend("magic", bitboard_magic.bishop_attacks, bitboard_magic.rook_attacks,
+                           bitboard_magic.queen_attacks),
+    "classical": SliderBackend("classical", classical_bishop_attacks, classical_rook_attacks,
+                               classical_queen_attacks),
+    "kogge-stone": SliderBackend("kogge-stone", kogge_stone_bishop_attacks, kogge_stone_rook_attacks,
+                                 kogge_stone_queen_attacks),
+}
+JIT_BACKENDS = {
+    "magic": SliderBackend("magic", bitboard_magic.bishop_attacks_jit, bitboard_magic.rook_attacks_jit,
+                           bitboard_magic.queen_attacks_jit),
+    "classical": SliderBackend("classical", classical_bishop_attacks_jit, classical_rook_attacks_jit,
+                               classical_queen_attacks_jit),
+    "kogge-stone": SliderBackend("kogge-stone", kogge_stone_bishop_attacks_jit, kogge_stone_rook_attacks_jit,
+                                 kogge_stone_queen_attacks_jit),
+}
+
+DEFAULT_BACKEND = "magic"
+
+def get_backend(name=DEFAULT_BACKEND, compiled=False):
+    backends = JIT_BACKENDS if compiled else PYTHON_BACKENDS
+    if name not in backends:
+        raise ValueError(f"Unknown slider backend {name!r}, expected one of {', '.join(backends)}")
+    return backends[name]
+
+# Compiled code binds these at compile time, so the choice is fixed for the process
+SLIDER_BACKEND = os.environ.get("SLIDER_BACKEND", DEFAULT_BACKEND)
+_python, _compiled = get_backend(SLIDER_BACKEND), get_backend(SLIDER_BACKEND, compiled=True)
+bishop_attacks, rook_attacks, queen_attacks = _python.bishop_attacks, _python.rook_attacks, _python.queen_attacks
+bishop_attacks_jit, rook_attacks_jit, queen_attacks_jit = (
+    _compiled.bishop_attacks, _compiled.rook_attacks, _compiled.queen_attacks)
@@ -0,0 +1,73 @@
+import numpy as np
+from numba import njit
+
+# === Zobrist Keys ===
+# Piece index: 0-5 white pawn..king, 6-11 black pawn..king.
+# Squares use the bitboard layout (0 = a1, 63 = h8) for both representations.
+ZOBRIST_SEED = 0x5EED_C0DE
+
+_rng = np.random.default_rng(ZOBRIST_SEED)
+_UINT64_MAX = np.iinfo(np.uint64).max
+
+PIECE_KEYS = _rng.integers(0, _UINT64_MAX, size=(12, 64), dtype=np.uint64, endpoint=True)
+CASTLING_KEYS = _rng.integers(0, _UINT64_MAX, size=4, dtype=np.uint64, endpoint=True)  # [wK, wQ, bK, bQ]
+EP_FILE_KEYS = _rng.integers(0, _UINT64_MAX, size=8, dtype=np.uint64, endpoint=True)
+SIDE_KEY = _rng.integers(0, _UINT64_MAX, dtype=np.uint64, endpoint=True)  # XORed in when black to move
+
+# Python int copies for the interpreted BitboardGameState path
+PIECE_KEYS_PY = PIECE_KEYS.tolist()
+CASTLING_KEYS_PY = CASTLING_KEYS.tolist()
+EP_FILE_KEYS_PY = EP_FILE_KEYS.tolist()
+SIDE_KEY_PY = int(SIDE_KEY)
+
+
+def bitboard_key(gs):
+    """Compute the Zobrist key of a BitboardGameState from scratch."""
+    key = 0
+    for piece in range(12):
+        bb = gs.bb[piece]
+        while bb:
+            sq = (bb & -bb).bit_length() - 1
+            key ^= PIECE_KEYS_PY[piece][sq]
+            bb &= bb - 1
+
+    for i in range(4):
+        if gs.castling_rights[i]:
+            key ^= CASTLING_KEYS_PY[i]
+    if gs.en_passant_target != -1:
+        key ^= EP_FILE_KEYS_PY[gs.en_passant_target % 8]
+    if not gs.white_to_move:
+        key ^= SIDE_KEY_PY
+    return key
+
+
+@njit
+def mailbox_piece_index(piece):
+    """Map a signed mailbox piece code (+/-1..6) to its Zobrist piece index."""
+    return piece - 1 if piece > 0 else 5 - piece
+
+
+@njit
+def mailbox_square(row, col):
+    """Map a mailbox (row, col) with row 0 = rank 8 to a bitboard square index."""
+    return (7 - row) * 8 + col
+
+
+@njit
+def mailbox_key(board, white_to_move, castling_rights, en_passant_target):
+    """Compute the Zobrist key of a mailbox GameState from scratch."""
+    key = np.uint64(0)
+    for r in range(8):
+        for c in range(8):
+            piece = board[r, c]
+            if piece != 0:
+                key ^= PIECE_KEYS[mailbox_piece_index(piece), mailbox_square(r, c)]
+
+    for i in range(4):
+        if castling_rights[i]:
+            key ^= CASTLING_KEYS[i]
+    if en_passant_target[0] != -1:
+        key ^= EP_FILE_KEYS[en_passant_target[1]]
+    if not white_to_move:
+        key ^= SIDE_KEY
+    return key
@@ -0,0 +1,32 @@
+"""Shared test helpers: the reference legal move filter and random playouts on BitboardGameState."""
+from bitboard_game import BitboardGameState
+from generate_moves import generate_all_moves, generate_legal_moves
+
+def filtered_legal_moves(gs):
+    """Reference legal moves: pseudo-legal moves that do not leave the mover in check, found by make/undo."""
+    moves = []
+    for move in generate_all_moves(gs):
+        gs.make_move(move)
+        if not gs.is_check(not gs.white_to_move):
+            moves.append(move)
+        gs.undo_move()
+    return moves
+
+def random_playout(rng, plies, gs=None, legal_moves=generate_legal_moves):
+    """
+    Play up to `plies` random legal moves from `gs` (default: the start
+    position), yielding the position before each move, and the final one
+    when the game ends in mate or stalemate. The position at the k-th yield
+    is at ply k.
+    """
+    gs = BitboardGameState() if gs is None else gs
+    for _ in range(plies):
+        yield gs
+        moves = legal_moves(gs)
+        if not moves:
+            return
+        gs.make_move(rng.choice(moves))
+
+def random_game_positions(rng, games, plies, legal_moves=generate_legal_moves):
+    """Copies of every position random_playout yields over `games` games."""
+    return [gs.copy() for _ in range(games) for gs in random_playout(rng, plies, legal_moves=legal_moves)]
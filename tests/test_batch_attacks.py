@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_game import BitboardGameState
+from batch_attacks import (
+    batch_attacks, batch_checkers, batch_mobility, batch_attack_info, stack_bitboards, popcount,
+)
+from bitboard_nomagic import knight_attacks, king_attacks
+from slider_attacks import bishop_attacks, rook_attacks, queen_attacks
+from fen import bitboard_state_from_fen
+from tests.test_legal_moves import KIWIPETE
+from tests.helpers import random_game_positions
+
+@pytest.fixture(scope="module")
+def states():
+    return random_game_positions(random.Random(11), 8, 80)
+
+def test_attacks_match_attack_map(states):
+    attacks = batch_attacks(stack_bitboards(states))
+    assert attacks.shape == (len(states), 2) and attacks.dtype == np.uint64
+    for gs, (white, black) in zip(states, attacks):
+        assert int(white) == gs.attack_map(True) and int(black) == gs.attack_map(False)
+
+def test_checkers_match_attack_info(states):
+    checkers = batch_checkers(stack_bitboards(states))
+    assert any(checkers.ravel())
+    for gs, row in zip(states, checkers):
+        assert int(row[0 if gs.white_to_move else 1]) == gs.get_attack_info().checkers
+
+def test_start_position_mobility():
+    # Knights reach a3 c3 f3 h3 per side; every other piece is boxed in
+    assert batch_mobility(stack_bitboards([BitboardGameState()])).tolist() == [[4, 4]]
+
+def piece_mobility(gs, colour):
+    """Reference mobility: attacks of each knight, bishop, rook, queen and king off own pieces, summed."""
+    occupied, own = gs.bb[14], gs.bb[12 + colour]
+    attacks = (knight_attacks, lambda sq: bishop_attacks(sq, occupied), lambda sq: rook_attacks(sq, occupied),
+               lambda sq: queen_attacks(sq, occupied), king_attacks)
+    total = 0
+    for piece_type, attack in enumerate(attacks, start=1):
+        board = gs.bb[6 * colour + piece_type]
+        for sq in range(64):
+            if board >> sq & 1:
+                total += (attack(sq) & ~own).bit_count()
+    return total
+
+def test_mobility_counts_every_piece(states):
+    mobility = batch_mobility(stack_bitboards(states))
+    for gs, row in zip(states, mobility):
+        assert row.tolist() == [piece_mobility(gs, 0), piece_mobility(gs, 1)]
+
+def test_shared_square_counts_once_per_piece():
+    # Knights on c3 and e3 both reach d1 and d5; each knight's eight squares count
+    gs = bitboard_state_from_fen("k7/8/8/8/8/2N1N3/8/7K w - - 0 1")
+    assert batch_mobility(stack_bitboards([gs])).tolist() == [[8 + 8 + 3, 3]]
+
+def test_popcount():
+    values = [0, 1, 0x8000000000000000, 0xFFFFFFFFFFFFFFFF, 0x0123456789ABCDEF]
+    assert popcount(np.array(values, dtype=np.uint64)).tolist() == [bin(v).count("1") for v in values]
+
+def test_attack_info_matches_single_calls(states):
+    pieces = stack_bitboards(states + [bitboard_state_from_fen(KIWIPETE)])
+    attacks, checkers, mobility = batch_attack_info(pieces)
+    assert np.array_equal(attacks, batch_attacks(pieces))
+    assert np.array_equal(checkers, batch_checkers(pieces))
+    assert np.array_equal(mobility, batch_mobility(pieces))
+
+def test_rejects_wrong_shape():
+    with pytest.raises(ValueError):
+        batch_attacks(np.zeros((4, 6), dtype=np.uint64))
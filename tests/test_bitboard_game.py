@@ -0,0 +1,95 @@
+import random
+
+import pytest
+from bitboard_game import BitboardGameState, MAX_PLY, POSITION_SIZE, encode_positions, decode_positions
+from tests.helpers import filtered_legal_moves, random_playout
+
+@pytest.fixture
+def new_game():
+    return BitboardGameState()
+
+def snapshot(gs):
+    return (list(gs.bb), list(gs.board), gs.white_to_move, list(gs.castling_rights), gs.en_passant_target,
+            gs.halfmove_clock, gs.fullmove_number, gs.zobrist_key)
+
+def test_undo_restores_full_state_on_random_games():
+    rng = random.Random(3)
+    for _ in range(5):
+        gs = BitboardGameState()
+        snapshots = [snapshot(gs) for gs in random_playout(rng, 100, gs, filtered_legal_moves)]
+
+        while gs.ply:
+            gs.undo_move()
+            assert snapshot(gs) == snapshots[gs.ply]
+
+def test_undo_restores_castling_rights(new_game):
+    # e4 e5 Ke2: white loses both castling rights
+    for move in [(12, 28, 0), (52, 36, 0), (4, 12, 0)]:
+        new_game.make_move(move)
+    assert new_game.castling_rights == [0, 0, 1, 1]
+
+    new_game.undo_move()
+    assert new_game.castling_rights == [1, 1, 1, 1]
+
+def test_undo_stack_is_reused(new_game):
+    for _ in range(10):
+        for move in [(6, 21, 0), (62, 45, 0), (21, 6, 0), (45, 62, 0)]:
+            new_game.make_move(move)
+    assert new_game.ply == 40
+    for _ in range(40):
+        new_game.undo_move()
+    assert len(new_game.undo_stack) == MAX_PLY
+
+def test_square_array_tracks_bitboards():
+    rng = random.Random(8)
+    for gs in random_playout(rng, 121, legal_moves=filtered_legal_moves):
+        board = list(gs.board)
+        gs.update_board()
+        assert board == gs.board
+
+def test_piece_at(new_game):
+    assert new_game.piece_at(4) == 5  # White king on e1
+    assert new_game.piece_at(59) == 10  # Black queen on d8
+    assert new_game.piece_at(28) == -1
+
+def test_attack_info_is_cached_per_node(new_game):
+    info = new_game.get_attack_info()
+    assert new_game.get_attack_info() is info
+    new_game.make_move((12, 28, 0))
+    assert new_game.attack_info is None
+    new_game.undo_move()
+    assert new_game.attack_info is None
+    assert new_game.get_attack_info().enemy_attacks == info.enemy_attacks
+
+def test_attack_info_matches_recompute_on_random_games():
+    rng = random.Random(21)
+    for gs in random_playout(rng, 120, legal_moves=filtered_legal_moves):
+        info = gs.get_attack_info()
+        king_sq = info.king_square
+        assert (info.checkers != 0) == gs.is_square_attacked(king_sq, not gs.white_to_move)
+        assert info.enemy_attacks == gs.attack_map(not gs.white_to_move, gs.occupied ^ (1 << king_sq))
+
+def random_positions(count, seed=8):
+    rng = random.Random(seed)
+    positions = [gs.copy() for gs in random_playout(rng, count + 1, legal_moves=filtered_legal_moves)]
+    return positions[1:]
+
+def test_bytes_round_trip():
+    for gs in random_positions(60):
+        data = gs.to_bytes()
+        assert len(data) == POSITION_SIZE
+        assert snapshot(BitboardGameState.from_bytes(data)) == snapshot(gs)
+
+def test_batch_encoding_is_contiguous_records():
+    positions = random_positions(40, seed=9)
+    buffer = encode_positions(positions).tobytes()
+    assert len(buffer) == 40 * POSITION_SIZE
+    assert buffer[5 * POSITION_SIZE:6 * POSITION_SIZE] == positions[5].to_bytes()
+    assert [snapshot(gs) for gs in decode_positions(buffer)] == [snapshot(gs) for gs in positions]
+
+def test_copy_is_independent(new_game):
+    copy = new_game.copy()
+    copy.make_move((12, 28, 0))
+    assert snapshot(new_game) == snapshot(BitboardGameState())
+    copy.undo_move()
+    assert snapshot(copy) == snapshot(new_game)
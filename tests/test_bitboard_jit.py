@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_game import BitboardGameState
+from bitboard_jit import (
+    JitBitboardState, from_bitboard_state, generate_all_moves, make_move, undo_move,
+    is_check, attack_map, perft, MAX_MOVES, MAX_PLY,
+)
+from move_encoding import decode_move
+from tests.helpers import filtered_legal_moves
+
+@pytest.fixture
+def new_position():
+    return JitBitboardState()
+
+def legal_moves(pos):
+    buf = np.zeros(MAX_MOVES, dtype=np.uint16)
+    moves = []
+    for i in range(generate_all_moves(pos, buf)):
+        make_move(pos, buf[i])
+        if not is_check(pos, not pos.white_to_move):
+            moves.append(int(buf[i]))
+        undo_move(pos)
+    return moves
+
+@pytest.mark.parametrize("depth, nodes", [(1, 20), (2, 400), (3, 8902), (4, 197281)])
+def test_start_position_perft(new_position, depth, nodes):
+    assert perft(new_position, depth) == nodes
+
+def test_matches_python_state_on_random_games():
+    rng = random.Random(11)
+    for _ in range(10):
+        gs = BitboardGameState()
+        pos = from_bitboard_state(gs)
+        for _ in range(80):
+            moves = legal_moves(pos)
+            reference = sorted(tuple(int(x) for x in m) for m in filtered_legal_moves(gs))
+            assert sorted(decode_move(m) for m in moves) == reference
+            assert pos.zobrist_key == gs.zobrist_key
+            assert list(pos.bb) == gs.bb
+            assert attack_map(pos, True) == gs.attack_map(True)
+            if not moves:
+                break
+            move = rng.choice(moves)
+            make_move(pos, move)
+            gs.make_move(decode_move(move))
+
+def test_undo_restores_position(new_position):
+    rng = random.Random(5)
+    snapshots = []
+    for _ in range(40):
+        moves = legal_moves(new_position)
+        if not moves:
+            break
+        snapshots.append((new_position.bb.copy(), new_position.board.copy(), new_position.zobrist_key,
+                          new_position.castling, new_position.en_passant_target))
+        make_move(new_position, rng.choice(moves))
+
+    while snapshots:
+        bb, board, key, castling, ep = snapshots.pop()
+        undo_move(new_position)
+        assert np.array_equal(new_position.bb, bb)
+        assert np.array_equal(new_position.board, board)
+        assert new_position.zobrist_key == key
+        assert new_position.castling == castling
+        assert new_position.en_passant_target == ep
+
+def test_history_grows_past_max_ply(new_position):
+    pos = new_position
+    start_key = pos.zobrist_key
+    # Knights out and back, more plies than the initial history holds
+    shuffle = [from_sq | (to_sq << 6) for from_sq, to_sq in ((6, 21), (62, 45), (21, 6), (45, 62))]
+    plies = MAX_PLY + 44
+    for ply in range(plies):
+        make_move(pos, shuffle[ply % 4])
+    assert pos.ply == plies and pos.history.shape[0] >= plies
+    for _ in range(plies):
+        undo_move(pos)
+    assert pos.ply == 0 and pos.zobrist_key == start_key
+    assert pos.fullmove_number == 1 and pos.white_to_move
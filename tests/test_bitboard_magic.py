@@ -0,0 +1,55 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_magic import (
+    bishop_attacks, rook_attacks, queen_attacks, bishop_attacks_jit, rook_attacks_jit, queen_attacks_jit,
+    compute_bishop_attacks, compute_rook_attacks,
+    load_magic_tables, popcount, pack_magic_tables, find_magic, generate_mask_bishop,
+    BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_OFFSETS, ROOK_MASKS, ROOK_SHIFTS, ROOK_OFFSETS, ATTACK_TABLE,
+)
+
+@pytest.mark.parametrize("lookup, reference", [
+    (bishop_attacks, compute_bishop_attacks),
+    (rook_attacks, compute_rook_attacks),
+])
+def test_lookups_match_ray_walk(lookup, reference):
+    rng = random.Random(7)
+    for square in range(64):
+        for _ in range(50):
+            occupancy = rng.getrandbits(64) & rng.getrandbits(64)
+            assert lookup(square, occupancy) == reference(square, occupancy)
+
+def test_compiled_lookups_match_python():
+    rng = random.Random(3)
+    for square in range(64):
+        for _ in range(10):
+            occupancy = rng.getrandbits(64) | 1 << 63
+            for compiled, lookup in ((bishop_attacks_jit, bishop_attacks), (rook_attacks_jit, rook_attacks),
+                                     (queen_attacks_jit, queen_attacks)):
+                assert int(compiled(square, np.uint64(occupancy))) == lookup(square, occupancy)
+
+def test_queen_is_bishop_plus_rook():
+    assert queen_attacks(27, 0) == compute_bishop_attacks(27, 0) | compute_rook_attacks(27, 0)
+
+def test_tables_are_memory_mapped_and_flat():
+    assert isinstance(ATTACK_TABLE, np.memmap) and ATTACK_TABLE.dtype == np.uint64
+    # Each square owns 2 ** bits consecutive entries of the shared table
+    expected = 0
+    for masks, shifts, offsets in ((BISHOP_MASKS, BISHOP_SHIFTS, BISHOP_OFFSETS), (ROOK_MASKS, ROOK_SHIFTS, ROOK_OFFSETS)):
+        for square in range(64):
+            assert int(shifts[square]) == 64 - popcount(int(masks[square]))
+            assert int(offsets[square]) == expected
+            expected += 2 ** (64 - int(shifts[square]))
+    assert expected == len(ATTACK_TABLE)
+
+def test_written_tables_round_trip(tmp_path):
+    rng = random.Random(1)
+    bishops = [find_magic(square, generate_mask_bishop, compute_bishop_attacks, rng=rng) for square in range(64)]
+    path = tmp_path / "magics.npy"
+    np.save(path, pack_magic_tables(bishops, bishops))
+    masks, magics, shifts, offsets, *_, attacks = load_magic_tables(path)
+    square = 27
+    occupancy = 0x0000_0400_0020_0000
+    index = (((occupancy & int(masks[square])) * int(magics[square])) & 0xFFFFFFFFFFFFFFFF) >> int(shifts[square])
+    assert int(attacks[int(offsets[square]) + index]) == compute_bishop_attacks(square, occupancy)
@@ -0,0 +1,125 @@
+import chess
+import numpy as np
+import pytest
+from bitboard_game import BitboardGameState
+from bitboard_perft import (
+    PerftTable, ENTRY_BYTES, _bitboard_perft, _hashed_perft, hashed_perft_report, parallel_perft,
+    bitboard_perft_sequences, read_sequence_header, read_sequence_chunks, validate_sequences,
+)
+from move_encoding import decode_move
+from generate_moves import generate_legal_moves
+from fen import bitboard_state_from_fen
+from tests.test_legal_moves import START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5
+
+@pytest.mark.parametrize("fen, depth, nodes", [
+    (START, 4, 197281),
+    (KIWIPETE, 3, 97862),
+    (POSITION_3, 4, 43238),
+    (POSITION_4, 3, 9467),
+    (POSITION_5, 3, 62379),
+])
+def test_hashed_perft_reference_counts(fen, depth, nodes):
+    table = PerftTable(1)
+    assert _hashed_perft(bitboard_state_from_fen(fen), depth, table) == nodes
+    assert table.hits <= table.probes
+    if depth >= 4:
+        assert table.hits > 0
+
+def test_tiny_table_keeps_counts_exact():
+    table = PerftTable(0)
+    assert len(table.keys) == 2
+    assert _hashed_perft(bitboard_state_from_fen(KIWIPETE), 3, table) == 97862
+
+def test_memory_cap():
+    for memory_mb in (0.5, 1, 3):
+        table = PerftTable(memory_mb)
+        assert table.memory_bytes <= memory_mb * (1 << 20) < 2 * table.memory_bytes
+        assert table.memory_bytes == len(table.keys) * ENTRY_BYTES
+
+def test_replacement_keeps_deeper_entry():
+    table = PerftTable(0)
+    table.store(1, 5, 1000)
+    table.store(2, 3, 30)
+    table.store(3, 2, 20)
+    assert table.probe(1, 5) == 1000
+    assert table.probe(2, 3) == -1
+    assert table.probe(3, 2) == 20
+    assert table.probe(1, 4) == -1
+    assert table.hit_rate == 0.5
+
+def test_report_matches_plain_count():
+    report = hashed_perft_report(BitboardGameState(), 4, memory_mb=1)
+    assert report['nodes'] == report['hashed_nodes'] == 197281
+    assert 0 < report['hit_rate'] < 1
+    assert report['speedup'] > 0
+
+def sequential_divide(gs, depth):
+    divide = {}
+    for move in generate_legal_moves(gs):
+        gs.make_move(move)
+        divide[gs.get_standard_algebraic(tuple(int(x) for x in move))] = _bitboard_perft(gs, depth - 1)
+        gs.undo_move()
+    return divide
+
+@pytest.mark.parametrize("split_depth, memory_mb", [(1, 0), (2, 0), (2, 1)])
+def test_parallel_divide_matches_sequential(split_depth, memory_mb):
+    gs = bitboard_state_from_fen(KIWIPETE)
+    total, divide = parallel_perft(gs, 3, workers=2, split_depth=split_depth, memory_mb=memory_mb)
+    assert total == 97862
+    assert divide == sequential_divide(gs, 3)
+    assert list(divide) == list(sequential_divide(gs, 3))
+
+def test_parallel_shallow_depths():
+    gs = bitboard_state_from_fen(POSITION_5)
+    assert parallel_perft(gs, 0, workers=2) == (1, {})
+    assert parallel_perft(gs, 1, workers=2)[0] == 44
+    with pytest.raises(ValueError):
+        parallel_perft(gs, -1)
+    # split_depth is clamped to leave at least one ply per task
+    assert parallel_perft(gs, 2, workers=2, split_depth=3)[0] == 1486
+    assert "d7c8Q" in parallel_perft(gs, 2, workers=2)[1]
+
+def write_sequences(path, fen, depth, chunk_size=1000):
+    with open(path, "wb") as f:
+        return bitboard_perft_sequences(bitboard_state_from_fen(fen), depth, f, chunk_size)
+
+@pytest.mark.parametrize("fen, depth, nodes", [(START, 3, 8902), (POSITION_5, 2, 1486), (POSITION_3, 1, 14)])
+def test_sequence_stream_round_trip(tmp_path, fen, depth, nodes):
+    path = tmp_path / "sequences.bin"
+    assert write_sequences(path, fen, depth) == nodes
+    with open(path, "rb") as f:
+        assert read_sequence_header(f) == (depth, fen)
+        chunks = list(read_sequence_chunks(f, depth, chunk_size=500))
+    sequences = np.concatenate(chunks)
+    assert sequences.shape == (nodes, depth)
+    assert len({tuple(sequence) for sequence in sequences.tolist()}) == nodes
+    assert validate_sequences(path, workers=2, chunk_size=500) == (nodes, None)
+
+def chess_uci(code):
+    from_sq, to_sq, _ = decode_move(code)
+    return chess.square_name(int(from_sq)) + chess.square_name(int(to_sq))
+
+def test_validator_stops_at_first_failing_prefix(tmp_path):
+    path = tmp_path / "sequences.bin"
+    write_sequences(path, START, 3)
+    with open(path, "rb") as f:
+        depth, _ = read_sequence_header(f)
+        header = path.read_bytes()[:f.tell()]
+        sequences = np.concatenate(list(read_sequence_chunks(f, depth))).copy()
+    # Second ply of sequence 5000 replaced by a white move, which is illegal with black to move
+    sequences[5000, 1] = sequences[0, 0]
+    sequences[7000, 2] = sequences[0, 0]
+    path.write_bytes(header + sequences.tobytes())
+    checked, (index, prefix) = validate_sequences(path, workers=2, chunk_size=300)
+    assert checked == index == 5000
+    assert prefix == [chess_uci(sequences[5000, 0]), chess_uci(sequences[0, 0])]
+
+def test_sequence_stream_rejects_bad_input(tmp_path):
+    path = tmp_path / "sequences.bin"
+    write_sequences(path, START, 2)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        validate_sequences(path, workers=1)
+    path.write_bytes(b"NOPE" + bytes(8))
+    with pytest.raises(ValueError):
+        validate_sequences(path, workers=1)
@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_game import BitboardGameState
+from game import GameState
+from generate_moves import generate_legal_moves
+import engine_utils
+from convert import (
+    bitboards_from_squares, squares_from_bitboards, mailbox_to_bitboards, bitboards_to_mailbox,
+    to_bitboard_state, to_game_state, to_bitboard_states, to_game_states,
+    bitboard_state_from_squares, game_state_from_squares,
+)
+from tests.helpers import random_game_positions
+
+@pytest.fixture(scope="module")
+def states():
+    return random_game_positions(random.Random(6), 5, 60)
+
+def as_squares(mailbox_moves):
+    return sorted(((7 - fr) * 8 + fc, (7 - tr) * 8 + tc, promo) for fr, fc, tr, tc, promo in mailbox_moves)
+
+def test_start_position_arrays():
+    gs, bgs = GameState(), BitboardGameState()
+    assert mailbox_to_bitboards(gs.board).tolist() == bgs.bb[:12]
+    assert np.array_equal(bitboards_to_mailbox(np.array(bgs.bb[:12], dtype=np.uint64)), gs.board)
+
+def test_batch_arrays_round_trip():
+    rng = np.random.default_rng(3)
+    squares = rng.integers(-1, 12, size=(50, 64)).astype(np.int8)
+    pieces = bitboards_from_squares(squares)
+    assert pieces.shape == (50, 12) and pieces.dtype == np.uint64
+    assert np.array_equal(squares_from_bitboards(pieces), squares)
+    assert np.array_equal(mailbox_to_bitboards(bitboards_to_mailbox(pieces)), pieces)
+
+def test_states_round_trip(states):
+    games = to_game_states(states)
+    for bgs, gs, back in zip(states, games, to_bitboard_states(games)):
+        assert back.bb == bgs.bb and back.board == bgs.board
+        assert (back.white_to_move, back.castling_rights, back.en_passant_target, back.zobrist_key) == \
+            (bgs.white_to_move, bgs.castling_rights, bgs.en_passant_target, bgs.zobrist_key)
+        assert (gs.halfmove_clock, gs.fullmove_number) == (bgs.halfmove_clock, bgs.fullmove_number)
+        assert as_squares(engine_utils.generate_legal_moves(gs)) == \
+            sorted(tuple(int(x) for x in move) for move in generate_legal_moves(bgs))
+
+def test_single_state_conversions(states):
+    bgs = states[-1]
+    gs = to_game_state(bgs)
+    key = gs.zobrist_key
+    gs.update_zobrist_key()
+    assert gs.zobrist_key == key
+    assert to_bitboard_state(gs).bb == bgs.bb
+
+def test_both_states_from_one_square_board(states):
+    bgs = states[17]
+    squares = np.array(bgs.board, dtype=np.int8)
+    args = (bgs.white_to_move, bgs.castling_rights, bgs.en_passant_target, bgs.halfmove_clock, bgs.fullmove_number)
+    from_squares = bitboard_state_from_squares(squares, *args)
+    assert from_squares.bb == bgs.bb and from_squares.zobrist_key == bgs.zobrist_key
+    assert int(game_state_from_squares(squares, *args).zobrist_key) == bgs.zobrist_key
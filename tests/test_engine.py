@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+from engine import Engine
+from evaluate_board import evaluate_board
+from fen import game_state_from_fen
+
+@pytest.mark.parametrize("fen, white, after", [
+    # exd5 wins the queen, after which neither side has a capture
+    ("4k3/8/8/3q4/4P3/8/8/4K3 w - - 0 1", True, "4k3/8/8/3P4/8/8/8/4K3 b - - 0 1"),
+    ("4k3/8/8/4p3/3Q4/8/8/4K3 b - - 0 1", False, "4k3/8/8/8/3p4/8/8/4K3 w - - 0 2"),
+])
+def test_quiescence_scores_winning_capture(fen, white, after):
+    gs = game_state_from_fen(fen)
+    stand_pat = evaluate_board(gs)
+    score = Engine().quiescence(gs, -np.inf, np.inf, white)
+    assert score == evaluate_board(game_state_from_fen(after))
+    assert (score > stand_pat) if white else (score < stand_pat)
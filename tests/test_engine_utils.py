@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+import engine_utils
+from game import GameState
+from engine_utils import (
+    generate_legal_moves, generate_legal_moves_into, generate_legal_captures, generate_legal_quiets,
+    is_legal_move, apply_move, undo_move, MAX_MOVES, MOVE_FIELDS,
+)
+from move_picker import MovePicker
+from perft import fast_perft
+from zobrist import mailbox_key
+from fen import START_FEN, game_state_from_fen
+
+def snapshot(gs):
+    return (gs.board.copy().tolist(), gs.white_to_move, tuple(gs.en_passant_target), tuple(gs.castling_rights),
+            gs.halfmove_clock, gs.fullmove_number, gs.zobrist_key)
+
+@pytest.mark.parametrize("depth, nodes", [(1, 20), (2, 400), (3, 8902)])
+def test_start_position_perft(depth, nodes):
+    gs = GameState()
+    before = snapshot(gs)
+    assert fast_perft(gs, depth) == nodes
+    assert snapshot(gs) == before
+
+def test_moves_into_buffer_match_list():
+    gs = GameState()
+    buf = np.zeros((MAX_MOVES, MOVE_FIELDS), dtype=np.int8)
+    count = generate_legal_moves_into(gs, buf)
+    assert sorted(tuple(int(x) for x in row) for row in buf[:count]) == sorted(generate_legal_moves(gs))
+
+def test_apply_and_undo_round_trip_on_random_games():
+    rng = random.Random(4)
+    for _ in range(6):
+        gs = GameState()
+        for _ in range(120):
+            moves = generate_legal_moves(gs)
+            if not moves:
+                break
+            before = snapshot(gs)
+            for move in moves:
+                undo = apply_move(gs, move)
+                assert gs.zobrist_key == mailbox_key(gs.board, gs.white_to_move, gs.castling_rights,
+                                                     gs.en_passant_target)
+                undo_move(gs, move, *undo)
+                assert snapshot(gs) == before
+            assert sorted(generate_legal_captures(gs) + generate_legal_quiets(gs)) == sorted(moves)
+            apply_move(gs, rng.choice(moves))
+
+def test_promotion_and_its_undo():
+    gs = GameState()
+    gs.board[1, 0] = 1   # white pawn on a7
+    gs.board[6, 0] = 0
+    moves = [move for move in generate_legal_moves(gs) if move[:4] == (1, 0, 0, 1)]
+    assert sorted(move[4] for move in moves) == [2, 3, 4, 5]
+    before = snapshot(gs)
+    undo = apply_move(gs, (1, 0, 0, 1, 5))
+    assert gs.board[0, 1] == 5 and gs.board[1, 0] == 0
+    undo_move(gs, (1, 0, 0, 1, 5), *undo)
+    assert snapshot(gs) == before
+
+def test_mailbox_move_picker():
+    gs = GameState()
+    assert not is_legal_move(gs, (7, 4, 5, 4, 0))
+    picked = list(MovePicker(gs, (6, 4, 4, 4, 0), [None, None], movegen=engine_utils))
+    assert picked[0] == (6, 4, 4, 4, 0)
+    assert sorted(picked) == sorted(generate_legal_moves(gs))
+
+def test_is_legal_move_matches_move_list_on_random_games():
+    rng = random.Random(17)
+    for fen in ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", START_FEN):
+        gs = game_state_from_fen(fen)
+        seen = set()
+        for _ in range(60):
+            moves = generate_legal_moves(gs)
+            if not moves:
+                break
+            seen.update(moves)
+            # Moves of earlier plies stand in for hash and killer moves from other nodes
+            assert {move for move in seen if is_legal_move(gs, move)} == set(moves)
+            apply_move(gs, rng.choice(moves))
@@ -0,0 +1,70 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_game import BitboardGameState, decode_positions
+from game import GameState
+from convert import to_game_state
+from fen import START_FEN, bitboard_state_from_fen, game_state_from_fen, to_fen, fens_to_records, load_fens
+from zobrist import bitboard_key
+from tests.test_legal_moves import KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6
+from tests.helpers import random_game_positions
+
+@pytest.fixture(scope="module")
+def fens():
+    return [to_fen(gs) for gs in random_game_positions(random.Random(20), 4, 60)]
+
+def test_start_position():
+    assert to_fen(BitboardGameState()) == START_FEN
+    assert to_fen(GameState()) == START_FEN
+    gs = bitboard_state_from_fen(START_FEN)
+    assert gs.bb == BitboardGameState().bb
+    assert gs.zobrist_key == BitboardGameState().zobrist_key
+
+@pytest.mark.parametrize("fen", [START_FEN, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_round_trip_both_states(fen):
+    assert to_fen(bitboard_state_from_fen(fen)) == fen
+    gs = game_state_from_fen(fen)
+    assert to_fen(gs) == fen
+    assert int(gs.zobrist_key) == bitboard_state_from_fen(fen).zobrist_key
+
+def test_played_positions_round_trip(fens):
+    for fen in fens:
+        gs = bitboard_state_from_fen(fen)
+        assert to_fen(gs) == fen
+        assert gs.zobrist_key == bitboard_key(gs)
+        assert to_fen(to_game_state(gs)) == fen
+
+def test_epd_defaults_clocks():
+    gs = bitboard_state_from_fen("8/8/8/1Pp4r/8/8/K7/7k w - c6")
+    assert (gs.en_passant_target, gs.halfmove_clock, gs.fullmove_number) == (42, 0, 1)
+
+@pytest.mark.parametrize("fen", [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNX w KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR x KQkq - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w",
+])
+def test_bad_fen_raises(fen):
+    with pytest.raises(ValueError):
+        bitboard_state_from_fen(fen)
+
+@pytest.mark.parametrize("side", ["x", "W", "white"])
+def test_bulk_loader_rejects_bad_side_to_move(side):
+    with pytest.raises(ValueError):
+        fens_to_records([START_FEN, f"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR {side} KQkq - 0 1"])
+
+def test_records_match_states(fens):
+    records = fens_to_records(fens)
+    for fen, gs in zip(fens, decode_positions(records)):
+        expected = bitboard_state_from_fen(fen)
+        assert to_fen(gs) == fen
+        assert gs.zobrist_key == expected.zobrist_key
+        assert gs.bb == expected.bb
+
+def test_load_fens_streams_chunks(tmp_path, fens):
+    path = tmp_path / "positions.epd"
+    path.write_text("# header\n\n" + "\n".join(fens) + "\n")
+    chunks = list(load_fens(path, chunk_size=64))
+    assert [len(chunk) for chunk in chunks] == [64] * (len(fens) // 64) + [len(fens) % 64] * bool(len(fens) % 64)
+    assert np.array_equal(np.concatenate(chunks), fens_to_records(fens))
@@ -0,0 +1,40 @@
+import numpy as np
+from numba import njit
+from bitboard_magic import bishop_attacks, rook_attacks
+from geometry import BETWEEN, BETWEEN_PY, LINE, LINE_PY, RAYS, NORTH, EAST, SOUTH_WEST, between, aligned
+
+def test_between_matches_slider_attacks():
+    for a in range(64):
+        for b in range(64):
+            expected = 0
+            for attacks in (bishop_attacks, rook_attacks):
+                if attacks(a, 0) & (1 << b):
+                    expected = attacks(a, 1 << b) & attacks(b, 1 << a)
+            assert BETWEEN_PY[a][b] == expected
+
+def test_line_contains_both_squares_and_is_symmetric():
+    for a in range(64):
+        for b in range(64):
+            assert LINE_PY[a][b] == LINE_PY[b][a]
+            if LINE_PY[a][b]:
+                assert LINE_PY[a][b] & (1 << a) and LINE_PY[a][b] & (1 << b)
+                assert BETWEEN_PY[a][b] & ~LINE_PY[a][b] == 0
+    assert LINE_PY[0][63] == 0x8040201008040201  # a1-h8 diagonal
+    assert LINE_PY[0][1] == 0xFF  # First rank
+    assert LINE_PY[0][10] == 0  # a1 and c2 are not aligned
+
+def test_rays():
+    assert int(RAYS[NORTH, 0]) == 0x0101010101010100
+    assert int(RAYS[EAST, 0]) == 0xFE
+    assert int(RAYS[SOUTH_WEST, 0]) == 0
+
+def test_tables_usable_from_njit():
+    @njit
+    def castling_path_empty(occupancy):
+        return occupancy & BETWEEN[4, 7] == 0
+
+    assert castling_path_empty(np.uint64(0x91))
+    assert not castling_path_empty(np.uint64(0xF1))
+    assert between(4, 7) == BETWEEN[4, 7] == 0x60
+    assert aligned(0, 63, 27) and not aligned(0, 63, 26)
+    assert LINE.dtype == np.uint64
@@ -0,0 +1,133 @@
+import random
+
+import numpy as np
+import pytest
+from generate_moves import (
+    generate_legal_moves, generate_legal_moves_into, generate_legal_captures, generate_legal_quiets,
+    count_legal_moves,
+)
+from move_encoding import MAX_MOVES, decode_move, decode_moves, encode_move_tuple
+from fen import bitboard_state_from_fen
+from bitboard_perft import _bitboard_perft
+from tests.helpers import filtered_legal_moves
+
+def perft(gs, depth):
+    moves = generate_legal_moves(gs)
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        gs.make_move(move)
+        nodes += perft(gs, depth - 1)
+        gs.undo_move()
+    return nodes
+
+START = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+KIWIPETE = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+POSITION_3 = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+POSITION_4 = "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1"
+POSITION_5 = "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8"
+POSITION_6 = "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10"
+
+@pytest.mark.parametrize("fen, depth, nodes", [
+    (START, 3, 8902),
+    (KIWIPETE, 2, 2039),
+    (POSITION_3, 4, 43238),
+    (POSITION_4, 3, 9467),
+    (POSITION_5, 2, 1486),
+    (POSITION_6, 2, 2079),
+])
+def test_perft_reference_counts(fen, depth, nodes):
+    assert perft(bitboard_state_from_fen(fen), depth) == nodes
+    assert _bitboard_perft(bitboard_state_from_fen(fen), depth) == nodes
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_count_matches_generated_moves_on_random_games(fen):
+    rng = random.Random(21)
+    for _ in range(3):
+        gs = bitboard_state_from_fen(fen)
+        for _ in range(80):
+            moves = generate_legal_moves(gs)
+            assert count_legal_moves(gs) == len(moves)
+            if not moves:
+                break
+            gs.make_move(rng.choice(moves))
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_matches_make_and_test_filter(fen):
+    gs = bitboard_state_from_fen(fen)
+    legal = sorted(tuple(int(x) for x in m) for m in generate_legal_moves(gs))
+    filtered = sorted(tuple(int(x) for x in m) for m in filtered_legal_moves(gs))
+    assert legal == filtered
+
+def test_en_passant_discovered_check_along_rank():
+    # b5xc6 e.p. would remove both pawns from the fifth rank and expose the king to the rook
+    gs = bitboard_state_from_fen("8/8/8/KPp4r/8/8/8/7k w - c6 0 1")
+    assert (33, 42, 0) not in generate_legal_moves(gs)
+
+def test_en_passant_allowed_when_not_pinned():
+    gs = bitboard_state_from_fen("8/8/8/1Pp4r/8/8/K7/7k w - c6 0 1")
+    assert (33, 42, 0) in generate_legal_moves(gs)
+
+def test_double_check_only_king_moves():
+    # Knight on f6 and rook on e1 both check the black king on e8
+    gs = bitboard_state_from_fen("4k3/8/5N2/8/8/8/8/K3R3 b - - 0 1")
+    moves = generate_legal_moves(gs)
+    assert moves and all(m[0] == 60 for m in moves)
+
+def test_pinned_piece_moves_along_pin():
+    # The white rook on e4 is pinned by the black rook on e8 and may only move on the e-file
+    gs = bitboard_state_from_fen("4r2k/8/8/8/4R3/8/8/4K3 w - - 0 1")
+    rook_moves = [m for m in generate_legal_moves(gs) if m[0] == 28]
+    assert rook_moves and all(m[1] % 8 == 4 for m in rook_moves)
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_buffer_matches_tuple_moves(fen):
+    gs = bitboard_state_from_fen(fen)
+    buf = np.zeros(MAX_MOVES, dtype=np.uint16)
+    count = generate_legal_moves_into(gs, buf)
+    assert decode_moves(buf, count) == generate_legal_moves(gs)
+
+def test_encoded_moves_round_trip():
+    gs = bitboard_state_from_fen(POSITION_4)
+    buf = np.zeros(MAX_MOVES, dtype=np.uint16)
+    for move in buf[:generate_legal_moves_into(gs, buf)].tolist():
+        assert encode_move_tuple(gs, decode_move(move)) == move
+
+def test_buffer_is_reused_across_plies():
+    gs = bitboard_state_from_fen(START)
+    buf = np.zeros(MAX_MOVES, dtype=np.uint16)
+    count = generate_legal_moves_into(gs, buf)
+    assert count == 20 and decode_moves(buf, count) == generate_legal_moves(gs)
+    gs.make_move(decode_move(buf[0]))
+    assert generate_legal_moves_into(gs, buf) == 20
+    assert decode_moves(buf, 20) == generate_legal_moves(gs)
+
+def quiet_checks(gs):
+    """Quiet non-castling moves that leave the opponent in check, found by making each move."""
+    checks = []
+    for move in generate_legal_quiets(gs):
+        is_castling = gs.board[move[0]] % 6 == 5 and abs(int(move[1]) - int(move[0])) == 2
+        gs.make_move(move)
+        if not is_castling and gs.is_check(gs.white_to_move):
+            checks.append(move)
+        gs.undo_move()
+    return checks
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_captures_with_checks_on_random_games(fen):
+    rng = random.Random(fen)
+    gs = bitboard_state_from_fen(fen)
+    for _ in range(40):
+        captures = generate_legal_captures(gs)
+        with_checks = generate_legal_captures(gs, include_checks=True)
+        assert sorted(with_checks) == sorted(captures + quiet_checks(gs))
+        moves = generate_legal_moves(gs)
+        if not moves:
+            break
+        gs.make_move(rng.choice(moves))
+
+def test_discovered_check_by_pawn_push():
+    # The d4 pawn blocks the bishop on b2; pushing it uncovers check on the h8 king
+    gs = bitboard_state_from_fen("7k/8/8/8/3P4/8/1B6/K7 w - - 0 1")
+    assert (27, 35, 0) in generate_legal_captures(gs, include_checks=True)
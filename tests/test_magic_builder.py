@@ -0,0 +1,65 @@
+import shutil
+
+import numpy as np
+import pytest
+from bitboard_magic import MAGIC_FILE, compute_bishop_attacks, popcount
+import magic_builder
+from magic_builder import (
+    BISHOP, ROOK, search_square, build_magic_tables, cached_magics, cached_settings, _reuse_square,
+)
+
+def test_square_search_is_reproducible():
+    first = search_square(ROOK, 9, seed=3)
+    assert search_square(ROOK, 9, seed=3) == first
+    assert search_square(ROOK, 9, seed=4)[1] != first[1]
+
+def test_shrink_never_grows_the_table():
+    mask, magic, shift, entries = search_square(BISHOP, 27, seed=1, shrink=1, shrink_attempts=1000)
+    assert 64 - shift in (popcount(mask), popcount(mask) - 1)
+    assert len(entries) == 1 << (64 - shift)
+
+def test_unchanged_masks_reuse_the_cached_file(tmp_path):
+    path = tmp_path / "magics.npy"
+    shutil.copy(MAGIC_FILE, path)
+    data, searched = build_magic_tables(path, workers=1)
+    assert searched == 0
+    assert np.array_equal(data, np.load(MAGIC_FILE))
+
+def test_broken_cached_square_is_searched_again(tmp_path):
+    path = tmp_path / "magics.npy"
+    data = np.load(MAGIC_FILE)
+    data[64 + 27] = 1  # bishop magic of d4
+    np.save(path, data)
+    rebuilt, searched = build_magic_tables(path, workers=1)
+    assert searched == 1
+    magic, shift, offset = int(rebuilt[64 + 27]), int(rebuilt[128 + 27]), int(rebuilt[192 + 27])
+    index = (((1 << 36) * magic) & 0xFFFFFFFFFFFFFFFF) >> shift
+    assert int(rebuilt[512 + offset + index]) == compute_bishop_attacks(27, 1 << 36)
+
+@pytest.fixture
+def stub_search(monkeypatch):
+    """Replace the (slow) square search by the committed magics, recording what was searched."""
+    committed = cached_magics(MAGIC_FILE)
+    searched = []
+    def search(task):
+        searched.append(task)
+        return task[:2], _reuse_square(task[0], task[1], committed)
+    monkeypatch.setattr(magic_builder, "_search_task", search)
+    return searched
+
+@pytest.mark.parametrize("options", [{"shrink": 1}, {"seed": 5}])
+def test_new_settings_are_searched_without_force(tmp_path, stub_search, options):
+    path = tmp_path / "magics.npy"
+    shutil.copy(MAGIC_FILE, path)
+    _, searched = build_magic_tables(path, workers=1, **options)
+    assert searched == len(stub_search) == 128
+    assert all(task[2:4] == (options.get("seed", 0), options.get("shrink", 0)) for task in stub_search)
+    assert cached_settings(path) == (options.get("seed", 0), options.get("shrink", 0))
+
+def test_cache_built_with_more_shrink_is_reused(tmp_path, stub_search):
+    path = tmp_path / "magics.npy"
+    shutil.copy(MAGIC_FILE, path)
+    build_magic_tables(path, workers=1, shrink=2)
+    assert build_magic_tables(path, workers=1, shrink=2)[1] == 0
+    assert build_magic_tables(path, workers=1, shrink=1)[1] == 0
+    assert build_magic_tables(path, workers=1, shrink=3)[1] == 128
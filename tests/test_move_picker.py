@@ -0,0 +1,61 @@
+import pytest
+from generate_moves import (
+    generate_legal_moves, generate_legal_captures, generate_legal_quiets, is_legal_move, capture_score,
+)
+from move_picker import MovePicker, HASH_MOVE, CAPTURES, QUIETS, DONE
+from fen import bitboard_state_from_fen
+from tests.test_legal_moves import START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6
+
+def as_ints(moves):
+    return sorted(tuple(int(x) for x in m) for m in moves)
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_3, POSITION_4, POSITION_5, POSITION_6])
+def test_captures_and_quiets_partition_legal_moves(fen):
+    gs = bitboard_state_from_fen(fen)
+    captures, quiets = generate_legal_captures(gs), generate_legal_quiets(gs)
+    assert as_ints(captures + quiets) == as_ints(generate_legal_moves(gs))
+    for from_sq, to_sq, promo in captures:
+        assert gs.board[to_sq] != -1 or promo or to_sq == gs.en_passant_target
+    for from_sq, to_sq, promo in quiets:
+        assert gs.board[to_sq] == -1 and not promo
+
+@pytest.mark.parametrize("fen", [START, KIWIPETE, POSITION_4, POSITION_5])
+def test_picker_yields_every_legal_move_once(fen):
+    gs = bitboard_state_from_fen(fen)
+    legal = generate_legal_moves(gs)
+    hash_move, killer = legal[-1], generate_legal_quiets(gs)[0]
+    picked = list(MovePicker(gs, hash_move, [killer, None]))
+    assert picked[0] == hash_move
+    assert as_ints(picked) == as_ints(legal)
+
+def test_captures_come_in_mvv_lva_order():
+    gs = bitboard_state_from_fen(KIWIPETE)
+    picker = iter(MovePicker(gs))
+    captures = generate_legal_captures(gs)
+    scores = [capture_score(gs, next(picker)) for _ in captures]
+    assert scores == sorted(scores, reverse=True)
+
+def test_illegal_hash_and_killer_moves_are_skipped():
+    gs = bitboard_state_from_fen(START)
+    bogus = [(4, 20, 0), (0, 8, 0)]  # Ke1-e3, Ra1xa2
+    assert not any(is_legal_move(gs, move) for move in bogus)
+    picked = list(MovePicker(gs, bogus[0], bogus[1:]))
+    assert len(picked) == 20 and not set(bogus) & set(picked)
+
+def test_hash_move_cutoff_generates_nothing():
+    gs = bitboard_state_from_fen(START)
+    picker = MovePicker(gs, (12, 28, 0))
+    assert next(iter(picker)) == (12, 28, 0)
+    assert picker.stage == HASH_MOVE and picker.generator_calls_saved == 2
+
+def test_quiets_only_generated_when_reached():
+    gs = bitboard_state_from_fen(KIWIPETE)
+    picker = MovePicker(gs)
+    moves = iter(picker)
+    for _ in generate_legal_captures(gs):
+        next(moves)
+    assert picker.stage == CAPTURES and picker.generator_calls_saved == 1
+    next(moves)
+    assert picker.stage == QUIETS and picker.generator_calls_saved == 0
+    list(moves)
+    assert picker.stage == DONE
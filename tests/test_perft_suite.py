@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from perft_suite import PERFT_POSITIONS, run_position, run_suite, main
+from bitboard_perft import bitboard_perft
+from bitboard_game import BitboardGameState
+
+def test_suite_passes_at_depth_2():
+    report = run_suite(depth=2)
+    assert report['passed']
+    assert [result['name'] for result in report['results']] == list(PERFT_POSITIONS)
+    assert report['nodes'] == sum(counts[1] for _, counts in PERFT_POSITIONS.values())
+    for result in report['results']:
+        assert result['nodes'] == result['expected']
+        assert result['seconds'] > 0 and result['nps'] > 0
+
+@pytest.mark.parametrize("workers, memory_mb", [(0, 1), (2, 0)])
+def test_hashed_and_parallel_modes(workers, memory_mb):
+    result = run_position('kiwipete', 3, workers, memory_mb)
+    assert result['passed'] and result['nodes'] == 97862
+
+def test_depth_is_capped_at_reference_counts():
+    assert run_position('self_stalemate', 99)['depth'] == len(PERFT_POSITIONS['self_stalemate'][1])
+
+@pytest.mark.parametrize("depth", [0, -1])
+def test_depth_below_one_is_rejected(depth):
+    with pytest.raises(ValueError):
+        run_position('start', depth)
+
+def test_wrong_count_fails(monkeypatch):
+    fen, counts = PERFT_POSITIONS['start']
+    monkeypatch.setitem(PERFT_POSITIONS, 'start', (fen, (20, 401)))
+    result = run_position('start', 2)
+    assert not result['passed'] and result['expected'] == 401
+    assert main(['--positions', 'start', '--depth', '2']) == 1
+
+def test_main_writes_json(tmp_path, capsys):
+    path = tmp_path / "perft.json"
+    assert main(['--positions', 'start', 'illegal_ep_1', '--depth', '3', '--output', str(path)]) == 0
+    report = json.loads(path.read_text())
+    assert report['passed'] and report['nodes'] == 8902 + 1670
+    assert capsys.readouterr().out == ""
+
+def test_timeit_returns_the_count(capsys):
+    assert bitboard_perft(BitboardGameState(), 2) == 400
+    assert "bitboard_perft executed in" in capsys.readouterr().out
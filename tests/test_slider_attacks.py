@@ -0,0 +1,26 @@
+import random
+
+import numpy as np
+import pytest
+from bitboard_magic import compute_bishop_attacks, compute_rook_attacks
+from slider_attacks import PYTHON_BACKENDS, get_backend
+
+def random_occupancies(count=300, seed=5):
+    rng = random.Random(seed)
+    return [(rng.randrange(64), rng.getrandbits(64) & rng.getrandbits(64)) for _ in range(count)] \
+        + [(sq, 0) for sq in range(64)] + [(63, 1 << 63 | 1 << 54), (0, 0xFFFFFFFFFFFFFFFF)]
+
+@pytest.mark.parametrize("name", list(PYTHON_BACKENDS))
+@pytest.mark.parametrize("compiled", [False, True])
+def test_backend_matches_ray_walk(name, compiled):
+    backend = get_backend(name, compiled)
+    for square, occupancy in random_occupancies():
+        occ = np.uint64(occupancy) if compiled else occupancy
+        bishop, rook = compute_bishop_attacks(square, occupancy), compute_rook_attacks(square, occupancy)
+        assert int(backend.bishop_attacks(square, occ)) == bishop
+        assert int(backend.rook_attacks(square, occ)) == rook
+        assert int(backend.queen_attacks(square, occ)) == bishop | rook
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_backend("rotated")
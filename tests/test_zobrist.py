@@ -0,0 +1,61 @@
+import random
+
+import pytest
+from bitboard_game import BitboardGameState
+from game import GameState, EMPTY, PAWN
+from zobrist import bitboard_key
+from tests.helpers import filtered_legal_moves, random_playout
+
+@pytest.fixture
+def new_bitboard_game():
+    return BitboardGameState()
+
+def test_start_key_matches_full_recompute(new_bitboard_game):
+    assert new_bitboard_game.zobrist_key == bitboard_key(new_bitboard_game)
+
+def test_incremental_key_matches_recompute_on_random_games():
+    rng = random.Random(2024)
+    for _ in range(5):
+        gs = BitboardGameState()
+        keys = []
+        for gs in random_playout(rng, 61, gs, filtered_legal_moves):
+            assert gs.zobrist_key == bitboard_key(gs), "Incremental key diverged from full recompute!"
+            keys.append(gs.zobrist_key)
+
+        # Undo must restore every earlier key
+        while gs.ply:
+            gs.undo_move()
+            assert gs.zobrist_key == keys[gs.ply], "undo_move did not restore the key!"
+
+def test_transposition_gives_same_key():
+    a = BitboardGameState()
+    for move in [(6, 21, 0), (62, 45, 0), (1, 18, 0), (57, 42, 0)]:  # Nf3 Nf6 Nc3 Nc6
+        a.make_move(move)
+    b = BitboardGameState()
+    for move in [(1, 18, 0), (57, 42, 0), (6, 21, 0), (62, 45, 0)]:  # Nc3 Nc6 Nf3 Nf6
+        b.make_move(move)
+    assert a.zobrist_key == b.zobrist_key
+
+def test_side_to_move_changes_key(new_bitboard_game):
+    start_key = new_bitboard_game.zobrist_key
+    new_bitboard_game.make_move((6, 21, 0))  # Nf3
+    new_bitboard_game.make_move((62, 45, 0))  # Nf6
+    new_bitboard_game.make_move((21, 6, 0))  # Ng1
+    assert new_bitboard_game.zobrist_key != start_key
+
+def test_mailbox_start_key_matches_bitboard():
+    assert GameState().zobrist_key == BitboardGameState().zobrist_key
+
+def test_mailbox_key_matches_bitboard_after_double_push():
+    bgs = BitboardGameState()
+    bgs.make_move((12, 28, 0))  # e2 e4
+
+    gs = GameState()
+    gs.board[6, 4] = EMPTY
+    gs.board[4, 4] = PAWN
+    gs.en_passant_target[0] = 5
+    gs.en_passant_target[1] = 4
+    gs.white_to_move = False
+    gs.update_zobrist_key()
+
+    assert gs.zobrist_key == bgs.zobrist_key